@@ -1,13 +1,20 @@
+import functools
+import os
+import time
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
-import json
-import networkx as nx
-from data_processor import PhilosopherDataProcessor
+from pathlib import Path
+from data_processor import DATA_PATHS, PhilosopherDataProcessor
+from data_watch import FileWatcher
+from figure_payload import PayloadCache
+from dataset_view import DatasetView
+from instrumentation import METRICS, PAYLOAD_SAMPLE_EVERY, SIZE_BUCKETS, current_session, start_exporter
+from orb_layout import LAYOUT_MODES
+from selection import apply_selection
+from sql_backend import SQLiteBackend
 from visualization import PhilosophicalOrb
 from styles import apply_retro_styles
+from timeline import format_year
 
 # Configure page
 st.set_page_config(
@@ -20,30 +27,109 @@ st.set_page_config(
 # Apply custom styles
 apply_retro_styles()
 
-# Initialize data processor
-@st.cache_data
+# Initialize data processor once per process; the dataset and its indexes
+# are read-only after loading, so every session shares the same objects
+@st.cache_resource
 def load_philosopher_data():
     """Load and process philosopher data"""
-    processor = PhilosopherDataProcessor()
+    # NEXUS_DATABASE points at a SQLite file built with sql_backend.py
+    database = os.environ.get('NEXUS_DATABASE')
+    backend = SQLiteBackend(database) if database and Path(database).exists() else None
+    processor = PhilosopherDataProcessor(backend=backend)
     return processor.load_data(), processor
 
+@st.cache_resource
+def load_orb(_processor):
+    """One orb renderer per process; it holds no per-session state.
+
+    Rendered orbs are kept as gzip-compressed JSON shared by every
+    session, which saves rebuilding them (not the bytes sent to the
+    browser); NEXUS_PAYLOAD_CACHE_MB sets the budget (0 turns it off).
+    """
+    budget = int(os.environ.get('NEXUS_PAYLOAD_CACHE_MB', '64'))
+    return PhilosophicalOrb(_processor, payload_cache=PayloadCache(budget << 20) if budget > 0 else None)
+
+@st.cache_resource
+def start_data_watcher(_processor):
+    """Apply edits to the data files in place as they happen (once per process).
+
+    Every corpus location load_data reads is watched, so adding a file
+    or a higher-priority working copy is picked up too. Set
+    NEXUS_WATCH_DATA=0 to turn this off.
+    """
+    if os.environ.get('NEXUS_WATCH_DATA', '1') == '0' or _processor.backend is not None:
+        return None
+    return FileWatcher(DATA_PATHS, _processor.reload_changes).start()
+
+@st.cache_resource
+def start_metrics_exporter():
+    """Serve metrics over HTTP when NEXUS_METRICS_PORT is set (once per process).
+
+    The exporter listens on localhost; NEXUS_METRICS_HOST overrides it.
+    """
+    port = os.environ.get('NEXUS_METRICS_PORT')
+    if not port:
+        return None
+    return start_exporter(int(port), host=os.environ.get('NEXUS_METRICS_HOST', '127.0.0.1'))
+
+def plotly_chart(fig, **kwargs):
+    """st.plotly_chart with render timing, and payload size sampled when
+    NEXUS_PAYLOAD_SAMPLE is set"""
+    with METRICS.span('plotly_chart'):
+        event = st.plotly_chart(fig, **kwargs)
+    METRICS.count('plotly_chart.renders')
+    renders = METRICS.counters.get('plotly_chart.renders', 1)
+    if PAYLOAD_SAMPLE_EVERY and (renders - 1) % PAYLOAD_SAMPLE_EVERY == 0:
+        METRICS.observe('plotly_chart.payload_bytes', len(fig.to_json()), SIZE_BUCKETS)
+    return event
+
+def on_chart_select(key, processor):
+    """on_select callback: fold a chart's selection into the session state.
+
+    Callbacks run before the rerun the selection triggers, so that single
+    run already renders the new selection.
+    """
+    if apply_selection(st.session_state, st.session_state.get(key), processor.store):
+        METRICS.count('selection.changes')
+
+def clear_selection():
+    st.session_state.selected_philosophers = []
+    st.session_state.selected_philosopher = None
+
+def collapse_clusters():
+    st.session_state.expanded_clusters = []
+
+VIEWS = {
+    'orb': "🌐 Orb",
+    'timeline': "⏳ Timeline",
+    'network': "🕸️ Influence Network"
+}
+
+# Years per bar of the timeline density chart
+TIMELINE_STEP = 10
+
 # Initialize session state
 if 'selected_philosopher' not in st.session_state:
     st.session_state.selected_philosopher = None
+if 'selected_philosophers' not in st.session_state:
+    st.session_state.selected_philosophers = []
 if 'filter_domain' not in st.session_state:
-    st.session_state.filter_domain = "All"
+    st.session_state.filter_domain = []
 if 'filter_era' not in st.session_state:
-    st.session_state.filter_era = "All"
+    st.session_state.filter_era = []
+if 'expanded_clusters' not in st.session_state:
+    st.session_state.expanded_clusters = []
 
 def main():
-    # Load data
-    philosophers_df, processor = load_philosopher_data()
+    start_metrics_exporter()
+    METRICS.count('reruns')
     
-    if philosophers_df.empty:
-        st.error("No philosopher data could be loaded. Please check the data file.")
+    # Hidden diagnostics page: append ?diagnostics=1 to the URL
+    if st.query_params.get("diagnostics") == "1":
+        display_diagnostics()
         return
     
-    # Header
+    # Header first, so the page paints while the dataset loads
     st.markdown("""
     <div style='text-align: center; padding: 20px;'>
         <h1 style='color: #00FF00; font-family: monospace; font-size: 3rem; text-shadow: 0 0 10px #00FF00;'>
@@ -55,23 +141,84 @@ def main():
     </div>
     """, unsafe_allow_html=True)
     
+    # Load data
+    philosophers_df, processor = load_philosopher_data()
+    watcher = start_data_watcher(processor)
+    # Edits applied by the watcher replace the shared frame
+    if processor.store is not None:
+        philosophers_df = processor.layout_frame()
+    
+    if philosophers_df.empty:
+        st.error("No philosopher data could be loaded. Please check the data file.")
+        return
+
+    # Report records that had to be skipped while loading
+    if processor.load_report is not None and not processor.load_report.ok:
+        st.warning(f"Some philosopher records could not be read: {processor.load_report.summary()}")
+    elif processor.load_report is not None and processor.load_report.unmapped_genome:
+        st.warning(f"Some genome values are not recognised: {processor.load_report.summary()}")
+    if watcher is not None and watcher.last_error:
+        st.warning(f"Could not apply the latest data file changes: {watcher.last_error}")
+    
     # Sidebar controls
     with st.sidebar:
         st.markdown("### 🎛️ CONTROL PANEL")
         
         # Search functionality
-        search_term = st.text_input("🔍 Search Philosophers", placeholder="Enter philosopher name...")
+        search_mode = st.radio(
+            "Search in", ["name", "text"], horizontal=True,
+            format_func=lambda mode: "Names" if mode == "name" else "Full text",
+            key="search_mode"
+        )
+        search_term = st.text_input(
+            "🔍 Search Philosophers",
+            placeholder="Enter philosopher name..." if search_mode == "name"
+            else "Ideas, works, quotes, switch points...",
+            key="search_term"
+        )
         
         # Filters
         st.markdown("#### 📊 Filters")
         
-        # Domain filter
-        all_domains = ["All"] + sorted(processor.get_all_domains())
-        filter_domain = st.selectbox("Domain", all_domains, index=0, key="domain_filter")
+        # Live counts next to every option, from the precomputed facet
+        # cubes and the selections made so far
+        counts = processor.facet_counts(
+            st.session_state.get("domain_filter"), st.session_state.get("era_filter"), search_term,
+            st.session_state.get("domain_mode", "any"), search_mode, st.session_state.get("stage_filter")
+        )
+        
+        # Domain filter (empty selection means all domains)
+        all_domains = sorted(processor.get_all_domains())
+        filter_domain = st.multiselect(
+            "Domain", all_domains, placeholder="All", key="domain_filter",
+            format_func=lambda domain: f"{domain} ({counts['domain'].get(domain, 0):,})"
+        )
+        domain_mode = st.radio(
+            "Match domains", ["any", "all"], horizontal=True,
+            format_func=lambda mode: "Any selected" if mode == "any" else "All selected",
+            key="domain_mode"
+        )
+        
+        # Era filter (empty selection means all eras)
+        all_eras = sorted(processor.get_all_eras())
+        filter_era = st.multiselect(
+            "Era", all_eras, placeholder="All", key="era_filter",
+            format_func=lambda era: f"{era} ({counts['era'].get(era, 0):,})"
+        )
         
-        # Era filter
-        all_eras = ["All"] + sorted(processor.get_all_eras())
-        filter_era = st.selectbox("Era", all_eras, index=0, key="era_filter")
+        # Spiral dynamics stage filter (empty selection means all stages)
+        all_stages = sorted(processor.get_all_stages())
+        filter_stage = st.multiselect(
+            "Spiral Stage", all_stages, placeholder="All", key="stage_filter",
+            format_func=lambda stage: f"{stage} ({counts['stage'].get(stage, 0):,})"
+        )
+        
+        # Orb layout
+        layout_mode = st.selectbox(
+            "Orb Layout", list(LAYOUT_MODES), index=0,
+            format_func=LAYOUT_MODES.get, key="layout_mode"
+        )
+        philosophers_df = processor.layout_frame(layout_mode)
         
         # Update session state
         st.session_state.filter_domain = filter_domain
@@ -79,63 +226,102 @@ def main():
         
         # Statistics
         st.markdown("#### 📈 Statistics")
-        filtered_df = processor.filter_philosophers(philosophers_df, filter_domain, filter_era, search_term)
+        # The session keeps only row ids; the frame below is the shared one
+        # or a gather for this render
+        selection = processor.view(
+            filter_domain, filter_era, search_term, domain_mode, search_mode, layout=layout_mode,
+            stage_filter=filter_stage
+        )
+        filtered_df = selection.frame()
         st.metric("Total Philosophers", len(philosophers_df))
-        st.metric("Filtered Results", len(filtered_df))
+        st.metric("Filtered Results", len(selection))
+        if processor.last_reload:
+            reload = processor.last_reload
+            changes = ("full reload" if reload['full_reload'] else
+                       f"{reload['updated']} updated, {reload['inserted']} added, {reload['deleted']} removed")
+            st.caption(f"Data file reloaded {time.strftime('%H:%M:%S', time.localtime(reload['at']))}: {changes}")
         
         # Selected philosopher info
+        if st.session_state.selected_philosophers:
+            # Several selected (box, lasso or shift-click): pick the one to show
+            store = processor.store
+            chosen = DatasetView(
+                processor, store.rows_of(st.session_state.selected_philosophers), layout_mode, store
+            ).frame()
+            if len(chosen) > 1:
+                st.markdown(f"#### 🎯 Selected ({len(chosen)})")
+                ids = chosen['id'].tolist()
+                names = dict(zip(ids, chosen['name']))
+                focus = st.session_state.selected_philosopher
+                st.session_state.selected_philosopher = st.selectbox(
+                    "Show details of", ids, index=ids.index(focus) if focus in ids else 0,
+                    format_func=names.get
+                )
         if st.session_state.selected_philosopher:
-            st.markdown("#### 🎯 Selected")
+            if len(st.session_state.selected_philosophers) <= 1:
+                st.markdown("#### 🎯 Selected")
             philosopher = processor.get_philosopher_by_id(philosophers_df, st.session_state.selected_philosopher)
             if philosopher is not None:
                 st.write(f"**{philosopher['name']}**")
                 st.write(f"Era: {philosopher['era']}")
                 st.write(f"Domain: {philosopher['primaryDomain']}")
+            st.button("Clear selection", on_click=clear_selection)
     
     # Main content area - give more space to the orb
     col1, col2 = st.columns([4, 1])
     
     with col1:
-        # Create and display the 3D orb
-        orb = PhilosophicalOrb(processor)
-        filtered_df = processor.filter_philosophers(philosophers_df, filter_domain, filter_era, search_term)
+        view = st.radio(
+            "View", list(VIEWS), horizontal=True, label_visibility="collapsed",
+            format_func=VIEWS.get, key="main_view"
+        )
+        orb = load_orb(processor)
         
-        if len(filtered_df) > 0:
-            fig = orb.create_3d_orb(filtered_df)
+        if view == "network":
+            # Influence and critique links among the filtered philosophers
+            if len(filtered_df) > 0:
+                # Box and lasso select work here across node traces
+                plotly_chart(orb.create_network_graph(filtered_df), use_container_width=True,
+                             key="philosopher_network", selection_mode=("points", "box", "lasso"),
+                             on_select=functools.partial(on_chart_select, "philosopher_network", processor))
+            else:
+                st.warning("No philosophers match the current filters.")
+        else:
+            orb_df = filtered_df
+            if view == "timeline":
+                # Only the philosophers alive in the chosen year
+                orb_df = display_timeline_controls(processor, selection, orb, layout_mode)
             
-            # Display with full container width and height
-            selected_points = st.plotly_chart(
-                fig, 
-                use_container_width=True,
-                config={
-                    'displayModeBar': True,
-                    'displaylogo': False,
-                    'modeBarButtonsToRemove': ['pan2d', 'lasso2d', 'select2d', 'autoScale2d'],
-                    'toImageButtonOptions': {
-                        'format': 'png',
-                        'filename': 'philosophical_nexus',
-                        'height': 800,
-                        'width': 1200,
-                        'scale': 1
-                    }
-                },
-                key="philosopher_orb",
-                on_select="rerun"
-            )
+            # Create and display the 3D orb
+            if len(orb_df) > 0:
+                fig = orb.cached_3d_orb(orb_df, st.session_state.expanded_clusters, processor.version)
             
-            # Update selected philosopher based on click
-            if hasattr(st.session_state, 'philosopher_orb') and st.session_state.philosopher_orb:
-                selection = st.session_state.philosopher_orb.get('selection', {})
-                if selection and 'points' in selection and selection['points']:
-                    point_index = selection['points'][0]['pointIndex']
-                    if point_index < len(filtered_df):
-                        if hasattr(filtered_df, 'iloc'):
-                            st.session_state.selected_philosopher = filtered_df.iloc[point_index]['id']
-                        else:
-                            st.session_state.selected_philosopher = filtered_df[point_index]['id']
-                        st.rerun()
-        else:
-            st.warning("No philosophers match the current filters.")
+                # Display with full container width and height; clicks
+                # (shift-click to add) resolve by the id in customdata
+                plotly_chart(
+                    fig, 
+                    use_container_width=True,
+                    config={
+                        'displayModeBar': True,
+                        'displaylogo': False,
+                        'modeBarButtonsToRemove': ['pan2d', 'lasso2d', 'select2d', 'autoScale2d'],
+                        'toImageButtonOptions': {
+                            'format': 'png',
+                            'filename': 'philosophical_nexus',
+                            'height': 800,
+                            'width': 1200,
+                            'scale': 1
+                        }
+                    },
+                    key="philosopher_orb",
+                    selection_mode="points",
+                    on_select=functools.partial(on_chart_select, "philosopher_orb", processor)
+                )
+                
+                if st.session_state.expanded_clusters:
+                    st.button("Collapse expanded clusters", on_click=collapse_clusters)
+            else:
+                st.warning("No philosophers match the current filters.")
     
     with col2:
         # Philosopher details panel
@@ -144,7 +330,8 @@ def main():
         if st.session_state.selected_philosopher:
             philosopher = processor.get_philosopher_by_id(philosophers_df, st.session_state.selected_philosopher)
             if philosopher is not None:
-                display_philosopher_details(philosopher)
+                others = [i for i in st.session_state.selected_philosophers if i != philosopher['id']]
+                display_philosopher_details(philosopher, processor, others)
         else:
             st.markdown("""
             <div style='padding: 20px; border: 1px solid #00FF00; border-radius: 5px; background: rgba(0, 255, 0, 0.05);'>
@@ -154,8 +341,27 @@ def main():
             </div>
             """, unsafe_allow_html=True)
 
-def display_philosopher_details(philosopher):
-    """Display detailed information about a selected philosopher"""
+def display_timeline_controls(processor, selection, orb, layout_mode):
+    """Year slider and lifespan density; returns the frame of those alive that year"""
+    span = processor.timeline.span if processor.timeline is not None else None
+    if span is None:
+        st.warning("No philosophers have birth or death years.")
+        return selection.frame().iloc[:0]
+    
+    # Start at the busiest period of the selection
+    periods, counts = processor.timeline.density(TIMELINE_STEP, selection.rows)
+    start = int(periods[counts.argmax()]) + TIMELINE_STEP // 2 if len(periods) else span[0]
+    year = st.slider("Year", span[0], span[1], value=min(max(start, span[0]), span[1]), key="timeline_year")
+    plotly_chart(orb.create_timeline_density(periods, counts, year, TIMELINE_STEP),
+                 use_container_width=True, config={'displayModeBar': False}, key="timeline_density")
+    
+    alive = DatasetView(processor, processor.alive_in(year, selection.rows), layout_mode)
+    st.caption(f"{len(alive):,} of {len(selection):,} philosophers alive in {format_year(year)}")
+    return alive.frame()
+
+def display_philosopher_details(philosopher, processor, others=()):
+    """Display detailed information about a selected philosopher, compared
+    with the other selected philosophers"""
     
     # Basic info
     st.markdown(f"**Name:** {philosopher['name']}")
@@ -195,13 +401,123 @@ def display_philosopher_details(philosopher):
         else:
             st.write(biography)
     
-    # Switch points
+    # Influence network neighbours
+    neighbors = processor.get_influence_neighbors(philosopher['id'])
+    if neighbors:
+        st.markdown("**Influence Links:**")
+        st.write(", ".join(
+            neighbor['name'] if neighbor['inCorpus'] else f"*{neighbor['name']}*"
+            for neighbor in neighbors[:12]
+        ))
+
+    # Philosophers whose lifespans overlapped
+    contemporaries = processor.get_contemporaries(philosopher['id'], limit=12)
+    if contemporaries:
+        st.markdown("**Contemporaries:**")
+        st.write(", ".join(
+            f"{contemporary['name']} ({contemporary['overlapYears']} yrs)" for contemporary in contemporaries
+        ))
+
+    # Nearest neighbours by genome and domain profile
+    similar = processor.get_similar(philosopher['id'], k=8)
+    if similar:
+        st.markdown("**Most Similar:**")
+        st.write(", ".join(
+            f"{other['name']} ({other['similarity']:.0%})" for other in similar
+        ))
+
+    # Switch points, with what each position commits to
     if 'switchPoints' in philosopher and philosopher['switchPoints']:
         st.markdown("**Key Ideas:**")
-        for i, switch_point in enumerate(philosopher['switchPoints'][:3]):  # Show first 3
-            with st.expander(f"💡 {switch_point['question'][:50]}..."):
+        for switch_point in philosopher['switchPoints']:
+            with st.expander(f"💡 {switch_point['question']}"):
                 st.write(f"**Position:** {switch_point['position']}")
-                st.write(f"**Argument:** {switch_point['argument'][:200]}...")
+                if switch_point.get('argument'):
+                    st.write(f"**Argument:** {switch_point['argument']}")
+                implied = processor.implied_by(switch_point['position'], switch_point['question'], limit=6)
+                if implied:
+                    st.markdown("**Commits to:**")
+                    st.markdown("\n".join(f"- {claim}" for claim in implied))
+
+    # Claims only link records whose wording matches; without any such
+    # link there is nothing to rank or compare
+    if not processor.has_cross_links():
+        return
+
+    # Philosophers whose commitments clash with or match this one's
+    tensions = processor.get_tensions(philosopher['id'], limit=8)
+    if tensions:
+        st.markdown("**In Tension With:**")
+        st.write(", ".join(f"{other['name']} ({other['conflicts']})" for other in tensions))
+    common = processor.get_common_ground(philosopher['id'], limit=8)
+    if common:
+        st.markdown("**Common Ground:**")
+        st.write(", ".join(f"{other['name']} ({other['shared']})" for other in common))
+
+    # Positions in common and in tension with the other selected philosophers
+    for other in processor.get_many(list(others)[:3]).values():
+        comparison = processor.compare_positions(philosopher['id'], other['id'])
+        if comparison is None or not any(comparison.values()):
+            continue
+        with st.expander(f"⚖️ Compared with {other['name']}"):
+            if comparison['common']:
+                st.markdown("**In common:**")
+                st.markdown("\n".join(f"- {claim}" for claim in comparison['common'][:10]))
+            if comparison['tension']:
+                st.markdown("**In tension:**")
+                st.markdown("\n".join(f"- {mine} ⟷ {theirs}" for mine, theirs in comparison['tension'][:10]))
+            for question, mine, theirs in comparison['different_answers']:
+                st.markdown(f"**{question}**")
+                st.write(f"{philosopher['name']}: {mine}")
+                st.write(f"{other['name']}: {theirs}")
+
+def display_diagnostics():
+    """Stage timings, payload sizes and counters for this process"""
+    st.markdown("## 🩺 Diagnostics")
+    snapshot = METRICS.snapshot()
+    
+    stages = [
+        {
+            'stage': name[len('span.'):-len('.seconds')],
+            'calls': summary['count'],
+            'mean ms': round(summary['mean'] * 1000, 2),
+            'p50 ms': round(summary['p50'] * 1000, 2),
+            'p95 ms': round(summary['p95'] * 1000, 2),
+            'max ms': round(summary['max'] * 1000, 2)
+        }
+        for name, summary in sorted(snapshot['histograms'].items())
+        if name.startswith('span.') and name.endswith('.seconds')
+    ]
+    st.markdown("#### Stages")
+    st.dataframe(pd.DataFrame(stages), hide_index=True, use_container_width=True)
+    
+    sizes = [
+        {'metric': name, 'samples': summary['count'], 'mean KB': round(summary['mean'] / 1024, 1),
+         'max KB': round(summary['max'] / 1024, 1)}
+        for name, summary in sorted(snapshot['histograms'].items())
+        if name.endswith('_bytes')
+    ]
+    if sizes:
+        st.markdown("#### Sizes")
+        st.dataframe(pd.DataFrame(sizes), hide_index=True, use_container_width=True)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("#### Counters")
+        st.json(snapshot['counters'], expanded=False)
+    with col2:
+        st.markdown(f"#### Sessions ({len(snapshot['sessions'])})")
+        st.json(snapshot['sessions'].get(current_session(), {}), expanded=False)
+    
+    st.markdown("#### Recent spans")
+    st.dataframe(pd.DataFrame(snapshot['recent_spans'][::-1]), hide_index=True, use_container_width=True)
+    
+    col1, col2, col3 = st.columns(3)
+    col1.download_button("JSON", METRICS.to_json(), file_name="nexus-metrics.json")
+    col2.download_button("Prometheus", METRICS.to_prometheus(), file_name="nexus-metrics.prom")
+    if col3.button("Reset metrics"):
+        METRICS.reset()
+        st.rerun()
 
 if __name__ == "__main__":
     main()
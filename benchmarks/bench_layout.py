@@ -0,0 +1,108 @@
+"""Benchmark the vectorized orb layout engine against the legacy per-row path.
+
+Run from the repository root:
+
+    python benchmarks/bench_layout.py
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from orb_layout import OrbLayoutEngine, LAYOUT_MODES  # noqa: E402
+from philosopher_store import PhilosopherStore  # noqa: E402
+from similarity import SimilarityBuilder, SimilarityIndex  # noqa: E402
+
+ERAS = ['Ancient', 'Medieval', 'EarlyModern', 'Modern', 'Contemporary']
+DOMAINS = ['Logic', 'Ethics', 'Metaphysics', 'Politics', 'Aesthetics', 'Epistemology']
+
+
+def legacy_orb_coordinates(index):
+    """The former PhilosopherDataProcessor.generate_orb_coordinates"""
+    golden_ratio = (1 + 5**0.5) / 2
+    i = index
+    theta = 2 * np.pi * i / golden_ratio
+    phi = np.arccos(1 - 2 * i / (index + 1)) if index > 0 else 0
+    radius = 5
+    x = radius * np.sin(phi) * np.cos(theta)
+    y = radius * np.sin(phi) * np.sin(theta)
+    z = radius * np.cos(phi)
+    return {'x': x, 'y': y, 'z': z}
+
+
+def legacy_layout(n):
+    """Per-row path used by process_data before the layout engine"""
+    rows = []
+    for _ in range(n):
+        row = {}
+        row.update(legacy_orb_coordinates(len(rows)))
+        rows.append(row)
+    return rows
+
+
+def synthetic_records(n, seed=0):
+    rng = np.random.default_rng(seed)
+    eras = rng.choice(ERAS, n)
+    primary = rng.choice(DOMAINS, n)
+    strengths = rng.integers(0, 101, size=(n, len(DOMAINS)))
+    return [
+        {
+            'id': f'p{i}',
+            'era': str(eras[i]),
+            'primaryDomain': str(primary[i]),
+            'domainStrengths': {d: int(v) for d, v in zip(DOMAINS, strengths[i]) if v > 40}
+        }
+        for i in range(n)
+    ]
+
+
+def synthetic_store(n, seed=0):
+    """(store, SimilarityIndex) of n synthetic records; the similarity
+    layout mode needs the index"""
+    records = synthetic_records(n, seed)
+    builder = SimilarityBuilder()
+    for record in records:
+        builder.add(record)
+    store = PhilosopherStore.from_records(records)
+    return store, SimilarityIndex(store, builder.genome())
+
+
+def best_of(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def spread(coords):
+    """Minimum nearest-neighbour distance on a sample; larger is more even"""
+    sample = coords[:min(len(coords), 2000)]
+    d = np.linalg.norm(sample[:, None, :] - sample[None, :, :], axis=-1)
+    np.fill_diagonal(d, np.inf)
+    return d.min()
+
+
+def main(sizes=(1_000, 10_000, 100_000)):
+    engine = OrbLayoutEngine(radius=5)
+    print(f"{'n':>8} {'legacy per-row':>16} " + " ".join(f"{mode:>17}" for mode in LAYOUT_MODES))
+    for n in sizes:
+        store, similarity = synthetic_store(n)
+        legacy = best_of(lambda: legacy_layout(n), repeat=1)
+        timings = [best_of(lambda: engine.compute(store, mode, similarity)) for mode in LAYOUT_MODES]
+        print(f"{n:>8} {legacy * 1000:>13.1f} ms " + " ".join(f"{t * 1000:>14.1f} ms" for t in timings))
+
+    # Distribution quality: the legacy formula collapses every point to the south pole
+    n = 1000
+    legacy_coords = np.array([[p['x'], p['y'], p['z']] for p in legacy_layout(n)])
+    new_coords = engine.compute(synthetic_store(n)[0], 'fibonacci')
+    print(f"\nmin neighbour distance at n={n}: legacy {spread(legacy_coords):.4f}, "
+          f"vectorized {spread(new_coords):.4f}")
+
+
+if __name__ == '__main__':
+    main()
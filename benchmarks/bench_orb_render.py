@@ -0,0 +1,66 @@
+"""Compare figure size and build time of the legacy, batched and level-of-detail
+orb renderers.
+
+Run from the repository root:
+
+    python benchmarks/bench_orb_render.py
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from data_processor import PhilosopherDataProcessor  # noqa: E402
+from visualization import PhilosophicalOrb  # noqa: E402
+
+ERAS = ['Ancient', 'Medieval', 'EarlyModern', 'Modern', 'Contemporary']
+DOMAINS = ['Logic', 'Ethics', 'Metaphysics', 'Politics', 'Aesthetics', 'Epistemology']
+
+
+def synthetic_processor(n, seed=0):
+    rng = np.random.default_rng(seed)
+    processor = PhilosopherDataProcessor()
+    df = processor.process_data(
+        {
+            'id': f'p{i}',
+            'name': f'Philosopher {i}',
+            'birthYear': int(rng.integers(-600, 1950)),
+            'era': str(rng.choice(ERAS)),
+            'primaryDomain': str(rng.choice(DOMAINS))
+        }
+        for i in range(n)
+    )
+    return processor, df
+
+
+def measure(orb, df, repeat=5):
+    build, encode = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fig = orb.create_3d_orb(df)
+        build.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        payload = fig.to_json()
+        encode.append(time.perf_counter() - start)
+    return len(fig.data), min(build), min(encode), len(payload)
+
+
+def main(sizes=(100, 1_000, 10_000, 100_000)):
+    print(f"{'nodes':>7} {'mode':>8} {'traces':>7} {'build':>10} {'to_json':>10} {'payload':>11}")
+    for n in sizes:
+        processor, df = synthetic_processor(n)
+        for mode in ('legacy', 'batched', 'lod'):
+            if mode == 'legacy' and n > 10_000:
+                continue
+            orb = (PhilosophicalOrb(processor, render_mode=mode, lod=False) if mode != 'lod'
+                   else PhilosophicalOrb(processor))
+            traces, build, encode, size = measure(orb, df)
+            print(f"{n:>7} {mode:>8} {traces:>7} {build * 1000:>7.1f} ms {encode * 1000:>7.1f} ms "
+                  f"{size / 1024:>8.1f} KB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Check cold-start import time and memory against a budget.
+
+Imports each entry module in a fresh interpreter, several times, and
+records the best import time, the resident memory after the import and
+any heavy modules that were loaded although the entry point should not
+need them. Exits with status 1 when a module goes over its budget, so it
+can gate a deploy:
+
+    python benchmarks/cold_start.py                   # check every budget
+    python benchmarks/cold_start.py app --profile 15  # slowest imports of app.py
+
+--profile prints the slowest imports (from python -X importtime) of each
+module, cumulative, to see where a regression comes from.
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_PATH = Path(__file__).resolve().parent / 'results' / 'cold_start.json'
+
+# Per entry module: best import seconds, resident MB after the import and
+# modules that must still be unloaded. app.py needs Streamlit and pandas;
+# the data and command line modules need neither Streamlit nor plotly.
+BUDGETS = {
+    'app': {'seconds': 2.5, 'rss_mb': 200, 'lazy': ['plotly.express', 'networkx', 'google.genai']},
+    'data_processor': {'seconds': 1.2, 'rss_mb': 140, 'lazy': ['streamlit', 'plotly', 'networkx']},
+    'ingest': {'seconds': 1.2, 'rss_mb': 140, 'lazy': ['streamlit', 'plotly', 'networkx']},
+    'enrich': {'seconds': 1.2, 'rss_mb': 140, 'lazy': ['streamlit', 'plotly', 'google.genai']},
+    'sql_backend': {'seconds': 1.2, 'rss_mb': 140, 'lazy': ['streamlit', 'plotly', 'networkx']}
+}
+
+CHILD = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+# Kilobytes on Linux, bytes on macOS
+rss_mb = rss / 2**20 if sys.platform == 'darwin' else rss / 2**10
+print(json.dumps({{'seconds': seconds, 'rss_mb': rss_mb, 'loaded': [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+def cold_import(module, lazy=()):
+    """Import a module in a fresh interpreter: seconds, resident MB and
+    which of the lazy modules it loaded"""
+    code = CHILD.format(root=str(ROOT), module=module, lazy=list(lazy))
+    # app.py talks to Streamlit at import time; without a server it only warns
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip()}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def import_profile(module, top=20):
+    """(cumulative microseconds, package) of the slowest imports of a module"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def check(module, budget, repeat):
+    runs = [cold_import(module, budget.get('lazy', ())) for _ in range(repeat)]
+    seconds = min(run['seconds'] for run in runs)
+    rss_mb = min(run['rss_mb'] for run in runs)
+    loaded = sorted(set().union(*(run['loaded'] for run in runs)))
+    failures = []
+    if seconds > budget['seconds']:
+        failures.append(f"import took {seconds:.2f} s (budget {budget['seconds']} s)")
+    if rss_mb > budget['rss_mb']:
+        failures.append(f"resident memory {rss_mb:.0f} MB (budget {budget['rss_mb']} MB)")
+    if loaded:
+        failures.append(f"loaded {', '.join(loaded)} at import")
+    return {'module': module, 'seconds': seconds, 'rss_mb': rss_mb, 'loaded': loaded,
+            'budget': budget, 'failures': failures}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check cold-start import time and memory")
+    parser.add_argument('modules', nargs='*', default=list(BUDGETS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--profile', type=int, default=0, metavar='N',
+                        help="print the N slowest imports of each module")
+    parser.add_argument('--output', type=Path, default=RESULTS_PATH)
+    args = parser.parse_args(argv)
+
+    print(f"{'module':<16} {'import':>9} {'rss':>9}  status")
+    results = []
+    for module in args.modules:
+        budget = BUDGETS.get(module)
+        if budget is None:
+            parser.error(f"no budget for {module}; add it to BUDGETS")
+        result = check(module, budget, args.repeat)
+        results.append(result)
+        status = 'ok' if not result['failures'] else 'OVER BUDGET: ' + '; '.join(result['failures'])
+        print(f"{module:<16} {result['seconds']:>7.2f} s {result['rss_mb']:>6.0f} MB  {status}", flush=True)
+        if args.profile:
+            for cumulative, name in import_profile(module, args.profile):
+                print(f"{'':<16} {cumulative / 1e6:>7.3f} s  {name}")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({'results': results}, indent=2))
+    return 1 if any(result['failures'] for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,382 @@
+"""Benchmark the data and render stages on synthetic corpora.
+
+Times every stage (best of several runs) and measures its allocation peak
+in a separate tracemalloc run, writes the results as JSON and compares
+them with a baseline file:
+
+    python benchmarks/run_benchmarks.py                      # 100 and 10k records
+    python benchmarks/run_benchmarks.py --sizes 100 10000 100000 1000000
+    python benchmarks/run_benchmarks.py --update-baseline    # accept current numbers
+
+Exits with status 1 when a stage is slower (or uses more memory) than the
+baseline by more than the thresholds stored in the baseline file, when
+a stage has no baseline entry at a size the baseline covers (a new stage
+that was never recorded would otherwise go unchecked), or when the SQLite
+backend gives different results from the JSON path on the smallest size.
+"""
+import argparse
+import gzip
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import pandas as pd  # noqa: E402
+
+from dataset_cache import DatasetCache  # noqa: E402
+from data_processor import PhilosopherDataProcessor  # noqa: E402
+from figure_payload import PayloadCache, figure_json  # noqa: E402
+from sql_backend import SQLiteBackend  # noqa: E402
+from visualization import PhilosophicalOrb  # noqa: E402
+from synthetic_corpus import generate_records, write_corpus  # noqa: E402
+
+DEFAULT_SIZES = (100, 10_000)
+RESULTS_PATH = Path(__file__).resolve().parent / 'results' / 'latest.json'
+BASELINE_PATH = Path(__file__).resolve().parent / 'baseline.json'
+
+# A stage regresses when it exceeds baseline * ratio and baseline + floor
+DEFAULT_THRESHOLDS = {
+    'seconds': {'ratio': 1.5, 'floor': 0.005},
+    'peak_bytes': {'ratio': 1.25, 'floor': 1 << 20}
+}
+
+FILTERS = {
+    'domain_any': dict(domain_filter=['Ethics', 'Logic'], era_filter=[], search_term=''),
+    'domain_all_era': dict(domain_filter=['Ethics', 'Logic'], era_filter=['Modern'], search_term='',
+                           domain_mode='all'),
+    'name_substring': dict(domain_filter=[], era_filter=[], search_term='sopher 12'),
+    'name_prefix': dict(domain_filter=[], era_filter=[], search_term='ph'),
+    'full_text': dict(domain_filter=[], era_filter=[], search_term='virtue harmony', search_mode='text')
+}
+
+# Extra filter combinations the SQLite backend must answer like the JSON path
+PARITY_FILTERS = {
+    **FILTERS,
+    'stage_era': dict(domain_filter=[], era_filter=['Ancient', 'Modern'], search_term='',
+                      stage_filter=['Blue', 'Green']),
+    'domain_text': dict(domain_filter=['Ethics'], era_filter=[], search_term='virtue', search_mode='text'),
+    'name_case': dict(domain_filter=[], era_filter=[], search_term='PHILOSOPHER 7'),
+    'name_wildcards': dict(domain_filter=[], era_filter=[], search_term='%_'),
+    'unknown_domain': dict(domain_filter=['Nowhere'], era_filter=[], search_term='')
+}
+
+
+def measure(func, repeat=3, memory=True):
+    """(best seconds, allocation peak bytes or None, last result)"""
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return min(times), peak, result
+
+
+def run_size(n, repeat, memory, text_words):
+    results = []
+
+    def record(stage, seconds, peak=None, **extra):
+        results.append({'size': n, 'stage': stage, 'seconds': seconds, 'peak_bytes': peak, **extra})
+        peak_text = f"{peak / 2**20:8.1f} MB" if peak is not None else ''
+        print(f"{n:>8} {stage:<28} {seconds * 1000:>10.2f} ms {peak_text}", flush=True)
+
+    # Large corpora are loaded once; repeats are only worth it for small ones
+    heavy_repeat = repeat if n <= 10_000 else 1
+    heavy_memory = memory and n <= 100_000
+
+    with tempfile.TemporaryDirectory() as workdir:
+        workdir = Path(workdir)
+        (workdir / 'data').mkdir()
+        write_corpus(workdir / 'data' / 'philosophers.json', n, text_words=text_words)
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            def cold_load():
+                return PhilosopherDataProcessor(cache=False).load_data()
+            seconds, peak, _ = measure(cold_load, heavy_repeat, heavy_memory)
+            record('load_data', seconds, peak)
+
+            cache = DatasetCache(workdir / 'cache')
+            PhilosopherDataProcessor(cache=cache).load_data()
+
+            def warm_load():
+                return PhilosopherDataProcessor(cache=cache).load_data()
+            seconds, peak, _ = measure(warm_load, repeat, heavy_memory)
+            record('load_data_cached', seconds, peak)
+        finally:
+            os.chdir(cwd)
+
+    def process():
+        processor = PhilosopherDataProcessor(cache=False)
+        return processor, processor.process_data(generate_records(n, text_words=text_words))
+    seconds, peak, (processor, df) = measure(process, heavy_repeat, heavy_memory)
+    record('process_data', seconds, peak)
+
+    for name, kwargs in FILTERS.items():
+        calls = 20
+
+        def run_filter(kwargs=kwargs):
+            for _ in range(calls):
+                filtered = processor.filter_philosophers(df, **kwargs)
+            return filtered
+        seconds, peak, filtered = measure(run_filter, repeat, memory)
+        record(f'filter_philosophers.{name}', seconds / calls, peak, matches=len(filtered))
+
+    ids = df['id'].to_numpy()[np.random.default_rng(0).integers(0, len(df), 1000)]
+
+    def lookups():
+        for philosopher_id in ids:
+            processor.get_philosopher_by_id(df, philosopher_id)
+    seconds, peak, _ = measure(lookups, repeat, memory)
+    record('get_philosopher_by_id', seconds / len(ids), peak)
+
+    def facet_counts(calls=20):
+        for _ in range(calls):
+            processor.facets._cache.clear()
+            counts = processor.facet_counts(**FILTERS['domain_all_era'])
+        return counts
+    seconds, peak, _ = measure(facet_counts, repeat, memory)
+    record('facet_counts', seconds / 20, peak)
+
+    # Scrub the timeline slider across the whole span, one query per decade
+    years = np.arange(-700, 2000, 10)
+
+    def scrub():
+        for year in years:
+            processor.alive_in(year)
+    seconds, peak, _ = measure(scrub, repeat, memory)
+    record('alive_in', seconds / len(years), peak)
+
+    def similar():
+        for philosopher_id in ids[:100]:
+            processor.get_similar(philosopher_id, k=10)
+    seconds, peak, _ = measure(similar, repeat, memory)
+    record('get_similar', seconds / 100, peak)
+    seconds, peak, _ = measure(lambda: processor.similar_pairs(10, np.arange(min(n, 1000))), repeat, memory)
+    record('similar_pairs.1k', seconds, peak)
+
+    def tensions():
+        processor.implications._cache.clear()
+        for philosopher_id in ids[:100]:
+            processor.get_tensions(philosopher_id)
+            processor.get_common_ground(philosopher_id)
+    seconds, peak, _ = measure(tensions, repeat, memory)
+    record('get_tensions', seconds / 100, peak)
+
+    def compare_positions():
+        processor.implications._cache.clear()
+        for id_a, id_b in zip(ids[:100], ids[100:200]):
+            processor.compare_positions(id_a, id_b)
+    seconds, peak, _ = measure(compare_positions, repeat, memory)
+    record('compare_positions', seconds / 100, peak)
+
+    orb = PhilosophicalOrb(processor)
+    seconds, peak, fig = measure(lambda: orb.create_3d_orb(df), repeat, memory)
+    record('create_3d_orb', seconds, peak, traces=len(fig.data))
+    seconds, peak, payload = measure(fig.to_json, repeat, memory)
+    record('figure_to_json', seconds, peak, payload_bytes=len(payload))
+
+    subset = processor.filter_philosophers(df, **FILTERS['domain_all_era'])
+    seconds, peak, fig = measure(lambda: orb.create_3d_orb(subset), repeat, memory)
+    record('create_3d_orb.filtered', seconds, peak, traces=len(fig.data))
+
+    # Every node drawn, in both payload encodings
+    if n <= 100_000:
+        for encoding in ('plain', 'compact'):
+            full = PhilosophicalOrb(processor, lod=False, encoding=encoding)
+            seconds, peak, fig = measure(lambda: full.create_3d_orb(df), heavy_repeat, heavy_memory)
+            record(f'create_3d_orb.full.{encoding}', seconds, peak, traces=len(fig.data))
+            seconds, peak, payload = measure(lambda: figure_json(fig), heavy_repeat, heavy_memory)
+            record(f'figure_to_json.full.{encoding}', seconds, peak, payload_bytes=len(payload),
+                   gzip_bytes=len(gzip.compress(payload.encode())))
+
+        cached = PhilosophicalOrb(processor, lod=False, payload_cache=PayloadCache())
+        cached.cached_3d_orb(df, version=processor.version)
+        seconds, peak, _ = measure(lambda: cached.cached_3d_orb(df, version=processor.version), repeat, memory)
+        record('cached_3d_orb.full.hit', seconds, peak, cached_bytes=cached.payload_cache.bytes)
+    return results
+
+
+def check_sql_parity(n, text_words):
+    """Differences between the JSON path and the SQLite backend.
+
+    Imports the same synthetic corpus into a temporary SQLite file and
+    compares the orb frame, influence graph, filter and facet results and
+    similar philosophers of both. Returns a list of mismatch descriptions.
+    """
+    records = list(generate_records(n, text_words=text_words))
+    # Shapes the synthetic corpus does not produce: fractional strengths, a
+    # philosopher outside the corpus, a missing era and a name with LIKE
+    # wildcards
+    records[0]['domainStrengths'] = {domain: value / 100 for domain, value in records[0]['domainStrengths'].items()}
+    records[1]['influences']['influencedBy'].append(
+        {'philosopherId': 'outside_corpus', 'name': 'Outside Corpus', 'strengthOfInfluence': 40})
+    del records[2]['era']
+    records[3]['name'] += ' 100%_Sure'
+    expected = PhilosopherDataProcessor(cache=False)
+    expected_df = expected.process_data(records)
+
+    mismatches = []
+    with tempfile.TemporaryDirectory() as workdir:
+        backend = SQLiteBackend(Path(workdir) / 'philosophers.db')
+        try:
+            backend.create_schema()
+            backend.import_records(records)
+            actual = PhilosopherDataProcessor(cache=False, backend=backend)
+            actual_df = actual.load_data()
+
+            columns = ['id', 'name', 'birthYear', 'deathYear', 'era', 'primaryDomain', 'spiralDynamicsStage',
+                       'x', 'y', 'z']
+            if not expected_df[columns].astype(object).equals(actual_df[columns].astype(object)):
+                mismatches.append('orb frame')
+
+            stores = expected.store, actual.store
+            if stores[0].domains != stores[1].domains or not all(
+                    np.array_equal(getattr(stores[0], name), getattr(stores[1], name))
+                    for name in ('domain_indptr', 'domain_indices', 'strength_indptr', 'strength_indices',
+                                 'strength_values')):
+                mismatches.append('domain membership or strengths')
+
+            graphs = expected.graph, actual.graph
+            if graphs[0].node_ids != graphs[1].node_ids:
+                mismatches.append(f'graph nodes: {len(graphs[0].node_ids)} vs {len(graphs[1].node_ids)}')
+            for name in ('src', 'dst', 'weight', 'kind'):
+                if not np.array_equal(getattr(graphs[0], name), getattr(graphs[1], name)):
+                    mismatches.append(f'graph {name}: {len(graphs[0].src)} vs {len(graphs[1].src)} edges')
+                    break
+
+            for name, kwargs in PARITY_FILTERS.items():
+                rows = expected.select(**kwargs), actual.select(**kwargs)
+                if (rows[0] is None) != (rows[1] is None) or \
+                        rows[0] is not None and not np.array_equal(rows[0], rows[1]):
+                    mismatches.append(f'filter {name}')
+                if expected.facet_counts(**kwargs) != actual.facet_counts(**kwargs):
+                    mismatches.append(f'facet counts {name}')
+
+            for philosopher_id in expected_df['id'].iloc[:50]:
+                if expected.get_similar(philosopher_id) != actual.get_similar(philosopher_id):
+                    mismatches.append(f'get_similar {philosopher_id}')
+                    break
+        finally:
+            backend.connection.close()
+    return mismatches
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'platform': platform.platform()
+    }
+
+
+def compare(results, baseline):
+    """(regressions, missing) of results against a baseline document.
+
+    missing lists the (size, stage) pairs that have no baseline entry.
+    """
+    thresholds = baseline.get('thresholds', DEFAULT_THRESHOLDS)
+    previous = {(r['size'], r['stage']): r for r in baseline.get('results', [])}
+    regressions, missing = [], []
+    for result in results:
+        old = previous.get((result['size'], result['stage']))
+        if old is None:
+            missing.append((result['size'], result['stage']))
+            continue
+        for metric, limit in thresholds.items():
+            new_value, old_value = result.get(metric), old.get(metric)
+            if new_value is None or old_value is None:
+                continue
+            if new_value > old_value * limit['ratio'] and new_value > old_value + limit['floor']:
+                regressions.append({
+                    'size': result['size'], 'stage': result['stage'], 'metric': metric,
+                    'baseline': old_value, 'current': new_value, 'ratio': new_value / old_value
+                })
+    return regressions, missing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark data and render stages")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--text-words', type=int, default=60)
+    parser.add_argument('--no-memory', action='store_true', help="skip tracemalloc runs")
+    parser.add_argument('--output', type=Path, default=RESULTS_PATH)
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args(argv)
+
+    print(f"{'size':>8} {'stage':<28} {'time':>13} {'peak':>11}")
+    results = []
+    for n in args.sizes:
+        results.extend(run_size(n, args.repeat, not args.no_memory, args.text_words))
+
+    mismatches = check_sql_parity(min(args.sizes), args.text_words)
+    for mismatch in mismatches:
+        print(f"SQL PARITY {min(args.sizes):>8} {mismatch}")
+
+    document = {'environment': environment(), 'results': results}
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(document, indent=2))
+    print(f"\nResults written to {args.output}")
+
+    if args.update_baseline:
+        document['thresholds'] = DEFAULT_THRESHOLDS
+        if args.baseline.exists():
+            # Keep sizes that were not re-run, and any tuned thresholds
+            old = json.loads(args.baseline.read_text())
+            document['thresholds'] = old.get('thresholds', DEFAULT_THRESHOLDS)
+            rerun = set(args.sizes)
+            document['results'] = [r for r in old.get('results', []) if r['size'] not in rerun] + results
+        args.baseline.write_text(json.dumps(document, indent=2))
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print("No baseline to compare against; run with --update-baseline to create one")
+        return 1 if mismatches else 0
+    baseline = json.loads(args.baseline.read_text())
+    regressions, missing = compare(results, baseline)
+    for r in regressions:
+        print(f"REGRESSION {r['size']:>8} {r['stage']:<28} {r['metric']}: "
+              f"{r['baseline']:.4g} -> {r['current']:.4g} ({r['ratio']:.2f}x)")
+    # A size the baseline never recorded is only reported; a stage missing
+    # at a recorded size means the baseline was not refreshed when it was added
+    covered = {r['size'] for r in baseline.get('results', [])}
+    unchecked = [(size, stage) for size, stage in missing if size in covered]
+    for size, stage in missing:
+        label = 'NO BASELINE' if size in covered else 'new size'
+        print(f"{label:<10} {size:>8} {stage:<28} run with --update-baseline to record it")
+    if not regressions and not unchecked:
+        print("No regressions against baseline")
+    return 1 if regressions or unchecked or mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
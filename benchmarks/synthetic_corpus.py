@@ -0,0 +1,134 @@
+"""Generate synthetic philosopher corpora with the shape of the real records.
+
+Records carry the fields the app reads (years, era, domains and strengths,
+spiral stage, genome, biography, switch points with domain cascades,
+implication chains, influences, key ideas with critiques and key works),
+with influences pointing at earlier-born philosophers. Output is one
+compact record per line inside a JSON array, so it streams at any size.
+
+    python benchmarks/synthetic_corpus.py 100000 /tmp/corpus_100k.json
+"""
+import argparse
+import json
+
+import numpy as np
+
+ERAS = [
+    ('Ancient', -700, 300), ('Medieval', 300, 1400), ('Renaissance', 1400, 1600),
+    ('EarlyModern', 1600, 1750), ('Modern', 1750, 1900), ('Contemporary', 1900, 2000)
+]
+DOMAINS = [
+    'Logic', 'Ethics', 'Metaphysics', 'Politics', 'Aesthetics', 'Epistemology',
+    'Philosophy of Religion', 'Philosophy of Science', 'Philosophy of Mind', 'Education'
+]
+STAGES = ['Purple', 'Red', 'Blue', 'Blue-Orange', 'Orange', 'Green', 'Yellow', 'Turquoise']
+GENOME = {
+    'beingVsBecoming': ['Being', 'Becoming', 'Both'],
+    'oneVsMany': ['One', 'Many', 'Both'],
+    'mindVsMatter': ['Mind', 'Matter', 'Dualist', 'Neutral'],
+    'freedomVsDeterminism': ['Freedom', 'Determinism', 'Compatibilist', 'Dualist'],
+    'transcendentVsImmanent': ['Transcendent', 'Immanent', 'Dualist'],
+    'realismVsAntiRealism': ['Realist', 'Anti-Realist', 'Dualist'],
+    'reasonVsExperience': ['Reason', 'Experience', 'Synthesis'],
+    'absoluteVsRelative': ['Absolute', 'Relative', 'Both']
+}
+WORDS = (
+    'reason experience virtue knowledge being becoming soul justice form substance '
+    'mind matter freedom necessity nature god law duty truth beauty language state '
+    'cause will idea sense reality logic number harmony good order power self'
+).split()
+QUESTIONS = [
+    'Is knowledge grounded in reason or experience?',
+    'Does the good depend on consequences?',
+    'Is the mind distinct from the body?',
+    'Is political authority natural or conventional?',
+    'Are universals real?'
+]
+
+
+def _text(rng, n_words):
+    return ' '.join(WORDS[i] for i in rng.integers(0, len(WORDS), n_words))
+
+
+def generate_records(n, seed=0, text_words=60):
+    """Yield n synthetic records, ordered by birth year"""
+    rng = np.random.default_rng(seed)
+    era_index = np.sort(rng.integers(0, len(ERAS), n))
+    births = np.array([rng.integers(ERAS[e][1], ERAS[e][2]) for e in era_index])
+    order = np.argsort(births, kind='stable')
+    births, era_index = births[order], era_index[order]
+
+    for i in range(n):
+        era, _, _ = ERAS[era_index[i]]
+        birth = int(births[i])
+        own_domains = [DOMAINS[j] for j in rng.choice(len(DOMAINS), int(rng.integers(2, 6)), replace=False)]
+        switch_points = [
+            {
+                'question': QUESTIONS[int(q)],
+                'position': _text(rng, 6),
+                'argument': _text(rng, text_words // 3),
+                'domainCascades': {d: _text(rng, 8) for d in own_domains[:2]}
+            }
+            for q in rng.choice(len(QUESTIONS), 2, replace=False)
+        ]
+        predecessors = rng.integers(0, i, min(i, 3)) if i else []
+        critics = rng.integers(0, n, 1)
+        yield {
+            'id': f'philosopher_{i}',
+            'name': f'Philosopher {i} {WORDS[i % len(WORDS)].title()}',
+            'birthYear': birth,
+            'deathYear': birth + int(rng.integers(30, 90)),
+            'era': era,
+            'primaryDomain': own_domains[0],
+            'allDomains': own_domains,
+            'domainStrengths': {d: int(rng.integers(20, 101)) for d in own_domains},
+            'spiralDynamicsStage': STAGES[int(rng.integers(0, len(STAGES)))],
+            'philosophicalGenome': {axis: values[int(rng.integers(0, len(values)))]
+                                    for axis, values in GENOME.items()},
+            'comprehensiveBiography': _text(rng, text_words),
+            'switchPoints': switch_points,
+            'implicationChains': [{
+                'ifAccept': switch_points[0]['position'],
+                'thenMustAccept': [_text(rng, 6), _text(rng, 6)],
+                'becauseReasoning': _text(rng, 12),
+                'potentialConflicts': [_text(rng, 4)]
+            }],
+            'influences': {
+                'influencedBy': [
+                    {'philosopherId': f'philosopher_{int(p)}', 'name': f'Philosopher {int(p)}',
+                     'strengthOfInfluence': int(rng.integers(10, 101))}
+                    for p in predecessors
+                ],
+                'influenced': []
+            },
+            'keyIdeas': [{
+                'ideaName': _text(rng, 3).title(),
+                'domain': own_domains[0],
+                'briefDescription': _text(rng, 15),
+                'critiques': [{'critic': f'Philosopher {int(c)}', 'critique': _text(rng, 10)}
+                              for c in critics]
+            }],
+            'keyWorks': [{'title': _text(rng, 4).title(), 'year': birth + 40}]
+        }
+
+
+def write_corpus(path, n, seed=0, text_words=60):
+    """Write a synthetic corpus file; returns the path"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[\n')
+        for i, record in enumerate(generate_records(n, seed, text_words)):
+            if i:
+                f.write(',\n')
+            f.write(json.dumps(record, separators=(',', ':')))
+        f.write('\n]\n')
+    return path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('size', type=int)
+    parser.add_argument('path')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--text-words', type=int, default=60)
+    args = parser.parse_args()
+    write_corpus(args.path, args.size, args.seed, args.text_words)
@@ -0,0 +1,323 @@
+import io
+import json
+import re
+from pathlib import Path
+
+# Structural tokens: complete strings (JSON strings never span lines), an
+# unterminated quote, brackets, and markdown code fences on their own line.
+_TOKEN_RE = re.compile(r'"(?:[^"\\\n]|\\.)*"|"|[{}\[\]]|^[ \t]*```[^\n]*$', re.MULTILINE)
+
+# The end of a chunk that may still grow into a code fence line
+_FENCE_TAIL_RE = re.compile(r'[ \t]*(?:```[^\n]*|`{0,2})\Z')
+
+# Trailing commas before a closing bracket, skipping over string literals
+_TRAILING_COMMA_RE = re.compile(r'("(?:[^"\\\n]|\\.)*")|,(\s*[}\]])')
+
+_CLOSERS = {'{': '}', '[': ']'}
+
+
+def _is_line_record(buf, offset, line_start=True):
+    """True if an object starts at column 0 in compact form, as in NDJSON.
+
+    line_start tells whether buf[0] begins a line.
+    """
+    return (buf[offset - 1] == '\n' if offset else line_start) and buf.startswith('{"', offset)
+
+
+class LoadReport:
+    """Summary of a corpus load: records read, repaired and skipped, and
+    genome values the similarity encoding does not know"""
+
+    def __init__(self, source=None):
+        self.source = source
+        self.documents = 0
+        self.records = 0
+        self.repaired = []
+        self.skipped = []
+        self.unmapped_genome = []
+
+    def add_repaired(self, line, reason):
+        self.repaired.append({'line': line, 'reason': reason})
+
+    def add_skipped(self, line, reason):
+        self.skipped.append({'line': line, 'reason': reason})
+
+    def add_unmapped_genome(self, axis, value, records):
+        self.unmapped_genome.append({'axis': axis, 'value': value, 'records': records})
+
+    @property
+    def ok(self):
+        return not self.skipped
+
+    def summary(self):
+        """One-line human readable summary"""
+        text = f"{self.records} records from {self.documents} documents"
+        if self.repaired:
+            text += f", {len(self.repaired)} repaired"
+        if self.skipped:
+            lines = ", ".join(str(entry['line']) for entry in self.skipped[:5])
+            more = "..." if len(self.skipped) > 5 else ""
+            text += f", {len(self.skipped)} skipped (lines {lines}{more})"
+        if self.unmapped_genome:
+            values = ", ".join(f"{entry['axis']}={entry['value']!r}" for entry in self.unmapped_genome[:5])
+            more = "..." if len(self.unmapped_genome) > 5 else ""
+            text += f", unknown genome values {values}{more}"
+        return text
+
+
+class CorpusReader:
+    """Incrementally reads philosopher records from a JSON corpus file.
+
+    Supports plain JSON arrays, a single record object, NDJSON, concatenated
+    documents and documents separated by markdown code fences. Only the
+    record currently being parsed is held as raw text, so memory use stays
+    flat regardless of file size or line length. Well-formed records are
+    decoded straight from the buffer; only broken records and records cut
+    by a chunk boundary are tokenized. Broken records are skipped and
+    reported instead of failing the whole load.
+
+    start is a byte offset at the beginning of a line to read from; line
+    numbers in the report then count from that line.
+    """
+
+    def __init__(self, path, chunk_size=1 << 20, report=None, start=0):
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.report = report if report is not None else LoadReport(str(self.path))
+        self.start = start
+
+    def __iter__(self):
+        return self.iter_records()
+
+    def iter_records(self):
+        """Yield each record (dict) in file order"""
+        decode = json.JSONDecoder().raw_decode
+        buf = ''
+        pos = 0
+        line_base = 1      # line number of buf[0]
+        line_start = True  # whether buf[0] begins a line
+        stack = []         # open containers of the current document
+        record_start = None
+        record_broken = None
+        skip_until = -1
+        eof = False
+        self._cursor = (0, line_base)
+
+        with open(self.path, 'rb') as raw:
+            raw.seek(self.start)
+            f = io.TextIOWrapper(raw, encoding='utf-8')
+            while not eof:
+                chunk = f.read(self.chunk_size)
+                eof = not chunk
+                buf += chunk
+
+                # Scan up to the last complete token. A last line that may
+                # still become a code fence waits for the next chunk, and so
+                # does a string cut off by the chunk end (see below).
+                limit = len(buf)
+                if not eof:
+                    tail = buf.rfind('\n') + 1
+                    if _FENCE_TAIL_RE.match(buf, tail):
+                        limit = tail
+                if limit <= pos:
+                    continue
+
+                resume = limit
+                scan = pos
+                while True:
+                    match = _TOKEN_RE.search(buf, scan, limit)
+                    if match is None:
+                        break
+                    token = match.group()
+                    start = match.start()
+                    scan = match.end()
+
+                    if not eof and (token == '"' and buf.find('\n', start) == -1
+                                    or token == '{' and scan == len(buf)):
+                        # The string may close in the next chunk, and an
+                        # object's first key decides if it is an NDJSON line
+                        resume = start
+                        break
+
+                    if token == '{' and record_start is None and start >= skip_until and stack in ([], ['[']):
+                        # Decode a whole record at once; anything that fails
+                        # (broken, or running past the chunk) is tokenized
+                        try:
+                            record, end = decode(buf, start)
+                        except json.JSONDecodeError:
+                            end = None
+                        if end is not None and end <= limit:
+                            if not stack:
+                                self.report.documents += 1
+                            self.report.records += 1
+                            yield record
+                            scan = end
+                            continue
+
+                    if token.lstrip().startswith('```'):
+                        if start == 0 and not line_start:
+                            # Backticks in the middle of a line, not a fence
+                            scan = 1
+                            continue
+                        # A fence always ends the current document
+                        if stack:
+                            record = self._close_truncated(buf, record_start, start, record_broken, stack, line_base)
+                            if record is not None:
+                                yield record
+                        stack = []
+                        record_start = None
+                        record_broken = None
+                        continue
+
+                    if token == '{' and record_start is not None and _is_line_record(buf, start, line_start) \
+                            and _is_line_record(buf, record_start, line_start):
+                        # NDJSON: a new line-record began before the previous one closed
+                        if record_broken is not None:
+                            self._skip(buf, record_start, line_base, record_broken)
+                        else:
+                            record = self._close_truncated(buf, record_start, start, None, stack, line_base)
+                            if record is not None:
+                                yield record
+                        stack = []
+                        record_start = None
+                        record_broken = None
+
+                    if record_broken is not None or start < skip_until:
+                        # Skip the rest of a broken record until the next fence
+                        continue
+
+                    broken = None
+                    if token == '"':
+                        broken = 'unterminated string'
+                    elif token[0] == '"':
+                        continue
+                    elif token in '}]' and (not stack or _CLOSERS[stack[-1]] != token):
+                        broken = f"unexpected '{token}'"
+
+                    if broken is not None:
+                        if record_start is None:
+                            stack = []
+                            continue
+                        line_end = buf.find('\n', start)
+                        single_line = buf.find('\n', record_start, start) == -1
+                        if single_line and line_end == -1 and not eof:
+                            # Whether the record is one NDJSON line is only
+                            # known once its line ends
+                            resume = start
+                            break
+                        if single_line and line_end != -1:
+                            # Single-line record (NDJSON): drop just this line
+                            self._skip(buf, record_start, line_base, broken)
+                            skip_until = line_end
+                            stack = []
+                            record_start = None
+                        else:
+                            record_broken = broken
+                        continue
+
+                    if token in '{[':
+                        if not stack:
+                            self.report.documents += 1
+                        if token == '{' and (not stack or stack == ['[']):
+                            record_start = start
+                        stack.append(token)
+                        continue
+
+                    stack.pop()
+                    if record_start is not None and (not stack or stack == ['[']):
+                        record = self._decode(buf[record_start:match.end()], self._line(buf, record_start, line_base))
+                        if record is not None:
+                            yield record
+                        record_start = None
+
+                pos = resume
+
+                # Drop everything before the record in progress
+                keep = record_start if record_start is not None else pos
+                if keep > 0:
+                    line_base = self._line(buf, keep, line_base)
+                    line_start = buf[keep - 1] == '\n'
+                    self._cursor = (0, line_base)
+                    buf = buf[keep:]
+                    pos -= keep
+                    skip_until -= keep
+                    if record_start is not None:
+                        record_start = 0
+
+        if record_start is not None:
+            if record_broken is not None:
+                self._skip(buf, record_start, line_base, record_broken)
+            else:
+                record = self._close_truncated(buf, record_start, len(buf), None, stack, line_base)
+                if record is not None:
+                    yield record
+
+    def _line(self, buf, offset, line_base):
+        """Line number of buf[offset].
+
+        Offsets mostly increase while a buffer is scanned, so newlines are
+        counted from the last position asked for rather than from the start
+        of the buffer, which would be quadratic on long single-line files.
+        """
+        counted, line = self._cursor
+        if offset < counted:
+            counted, line = 0, line_base
+        line += buf.count('\n', counted, offset)
+        self._cursor = (offset, line)
+        return line
+
+    def _skip(self, buf, record_start, line_base, reason):
+        if record_start is not None:
+            self.report.add_skipped(self._line(buf, record_start, line_base), reason)
+
+    def _close_truncated(self, buf, record_start, end, record_broken, stack, line_base):
+        """Try to recover a record whose document ended before it closed"""
+        if record_start is None:
+            return None
+        line = self._line(buf, record_start, line_base)
+        if record_broken is not None:
+            self.report.add_skipped(line, record_broken)
+            return None
+
+        # Close the record's own containers; an enclosing array is not part of it
+        open_containers = stack[1:] if stack[0] == '[' else stack
+        text = buf[record_start:end].rstrip().rstrip(',')
+        text += ''.join(_CLOSERS[c] for c in reversed(open_containers))
+        record = self._decode(text, line, report=False)
+        if record is None:
+            self.report.add_skipped(line, 'truncated record')
+        else:
+            self.report.add_repaired(line, 'closed truncated record')
+        return record
+
+    def _decode(self, text, line, report=True):
+        """Decode a single record, repairing trailing commas if needed"""
+        try:
+            record = json.loads(text)
+        except json.JSONDecodeError as e:
+            repaired = _TRAILING_COMMA_RE.sub(lambda m: m.group(1) or m.group(2), text)
+            try:
+                record = json.loads(repaired)
+            except json.JSONDecodeError:
+                if report:
+                    self.report.add_skipped(line + e.lineno - 1, e.msg)
+                return None
+            if report:
+                self.report.add_repaired(line, 'removed trailing commas')
+
+        if not isinstance(record, dict):
+            if report:
+                self.report.add_skipped(line, 'record is not an object')
+            return None
+
+        self.report.records += 1
+        return record
+
+
+def load_records(path, chunk_size=1 << 20):
+    """Read every record from a corpus file.
+
+    Returns a (records, report) tuple.
+    """
+    reader = CorpusReader(path, chunk_size=chunk_size)
+    return list(reader), reader.report
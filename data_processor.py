@@ -1,170 +1,820 @@
+import copy
 import pandas as pd
 import numpy as np
-import json
-import streamlit as st
 from pathlib import Path
+import threading
+import time
+from corpus_loader import CorpusReader
+from dataset_cache import DatasetCache, ProcessedArtifacts
+from dataset_view import DatasetView
+from facets import FacetIndex
+from orb_layout import OrbLayoutEngine
+from philosopher_store import DetailStore, PhilosopherStore, record_digest
+from philosopher_index import FilterIndex
+from similarity import SimilarityBuilder, SimilarityIndex
+from implications import ImplicationBuilder, ImplicationGraph
+from influence_graph import InfluenceGraphBuilder
+from instrumentation import instrumented
+from text_search import EmbeddingIndex, TextSearchIndex
+from timeline import LifespanIndex
+
+ERA_COLORS = {
+    'Ancient': '#FF6B6B',      # Red
+    'Classical': '#4ECDC4',    # Teal
+    'Medieval': '#45B7D1',     # Blue
+    'Renaissance': '#96CEB4',  # Green
+    'Modern': '#FFEAA7',       # Yellow
+    'Contemporary': '#DDA0DD', # Plum
+    'Postmodern': '#98D8C8'    # Mint
+}
+DEFAULT_COLOR = '#00FF00'      # Phosphor green
+
+# Corpus locations in priority order: working data first, then basic data
+DATA_PATHS = (
+    Path("data/working_philosophers.json"),
+    Path("data/philosophers.json"),
+    Path("nexus/data/philosophers.json")
+)
+
+
+def _as_selection(value):
+    """Normalize a filter value ("All", a name or a list of names) to a list"""
+    if value is None or value == "All":
+        return []
+    if isinstance(value, str):
+        return [value]
+    return [v for v in value if v != "All"]
 
 class PhilosopherDataProcessor:
     """Handles loading and processing of philosopher data"""
     
-    def __init__(self):
+    def __init__(self, cache=None, backend=None):
         self.philosophers_data = None
+        self.backend = backend
+        self.store = None
+        self.filter_index = None
+        self.facets = None
+        self.timeline = None
+        self.graph = None
+        self.text_index = None
+        self.embedding_index = None
+        self.similarity = None
+        self.implications = None
+        self._importance = {}
+        self.load_report = None
+        self.source_path = None
+        self.last_reload = None
+        # Bumped whenever the dataset is replaced, for render caches
+        self.version = 0
+        self._digests = None
+        self.layout_engine = OrbLayoutEngine(radius=5)
+        self.layout_mode = 'fibonacci'
+        self._layout_cache = {}
+        self._layout_frames = {}
+        # The processor is shared by every session; guards its lazy caches
+        self._lock = threading.Lock()
+        self.cache = DatasetCache() if cache is None else cache
+        self.cache_hit = False
     
+    @instrumented()
     def load_data(self):
         """Load philosopher data from JSON file"""
         try:
-            # Try working data first, then fallback to basic data
-            data_paths = [
-                Path("data/working_philosophers.json"),
-                Path("data/philosophers.json")
-            ]
+            # A SQL backend supplies only the narrow orb columns; details,
+            # biographies and filters stay in the database, and the full
+            # text is indexed as the summaries stream out
+            if self.backend is not None:
+                text_index = TextSearchIndex()
+                return self.process_data(self.backend.iter_summaries(text_index), text_index=text_index)
             
-            for data_path in data_paths:
+            # Try working data first, then fallback to basic data
+            for data_path in DATA_PATHS:
                 if data_path.exists():
-                    with open(data_path, 'r', encoding='utf-8') as f:
-                        self.philosophers_data = json.load(f)
-                    return self.process_data()
+                    self.source_path = data_path
+                    # Reuse processed artifacts from an earlier run when the
+                    # source file is unchanged
+                    key = self.cache.key(data_path) if self.cache else None
+                    artifacts = self.cache.load(key) if key else None
+                    if artifacts is not None:
+                        self.cache_hit = True
+                        return self.restore(artifacts)
+                    
+                    # Stream records straight into the columnar store so the
+                    # raw record list is never held in memory
+                    reader = CorpusReader(data_path)
+                    df = self.process_data(reader, reader.report)
+                    self.load_report = reader.report
+                    if key:
+                        try:
+                            self._save_cache(key)
+                        except OSError as e:
+                            import streamlit as st
+                            st.warning(f"Could not write processed data cache: {str(e)}")
+                    return df
             
             # If no data found, create empty structure
             return self.create_empty_dataframe()
             
         except Exception as e:
+            import streamlit as st
             st.error(f"Error loading data: {str(e)}")
             return self.create_empty_dataframe()
     
+    def _save_cache(self, key):
+        self.cache.save(key, ProcessedArtifacts(
+            self.store, self.filter_index, self.graph, self.load_report, self.layout_mode,
+            self.text_index, self.embedding_index, self.similarity, self.implications))
+    
     def create_empty_dataframe(self):
         """Create an empty DataFrame with expected columns"""
         return pd.DataFrame(columns=[
             'id', 'name', 'birthYear', 'deathYear', 'era', 'primaryDomain',
-            'allDomains', 'spiralDynamicsStage', 'x', 'y', 'z', 'color'
+            'spiralDynamicsStage', 'x', 'y', 'z', 'color'
         ])
     
-    def process_data(self):
-        """Process raw philosopher data into DataFrame"""
-        if not self.philosophers_data:
+    @instrumented()
+    def process_data(self, records=None, report=None, text_index=None):
+        """Process raw philosopher records into the columnar store.
+
+        Returns the store's DataFrame; full records stay in the store's
+        side store and are decoded on demand. Genome values the similarity
+        encoding does not recognise are added to ``report`` when given.
+        ``text_index`` is a TextSearchIndex the caller fills with the full
+        records while they stream past, for records that leave text out.
+        """
+        if records is None:
+            records = self.philosophers_data or []
+        
+        # Collect influence and critique edges, search text, genome
+        # positions, switch point implications and any precomputed
+        # embeddings while the records stream past
+        graph_builder = InfluenceGraphBuilder()
+        index_text = text_index is None
+        if index_text:
+            text_index = TextSearchIndex()
+        similarity_builder = SimilarityBuilder()
+        implication_builder = ImplicationBuilder()
+        embeddings = []
+        
+        def tap(records):
+            for row, philosopher in enumerate(records):
+                graph_builder.add(philosopher)
+                if index_text:
+                    text_index.add(row, philosopher)
+                similarity_builder.add(philosopher)
+                implication_builder.add(philosopher)
+                if isinstance(philosopher.get('embedding'), list):
+                    embeddings.append((row, philosopher['embedding']))
+                yield philosopher
+        
+        self.store = PhilosopherStore.from_records(tap(records))
+        self.filter_index = FilterIndex(self.store)
+        self.facets = FacetIndex(self.store)
+        self.timeline = LifespanIndex(self.store)
+        self.graph = graph_builder.build(self.store)
+        self.text_index = text_index.finalize()
+        self.similarity = SimilarityIndex(self.store, similarity_builder.genome())
+        if report is not None:
+            for (axis, value), count in similarity_builder.unmapped.items():
+                report.add_unmapped_genome(axis, value, count)
+        self.implications = ImplicationGraph.from_builder(implication_builder, len(self.store))
+        self.embedding_index = None
+        if embeddings:
+            rows, vectors = zip(*embeddings)
+            self.set_embeddings(rows, vectors)
+        self._layout_cache = {}
+        self.version += 1
+        self._layout_frames = {}
+        self._importance = {}
+        self._digests = None
+        if len(self.store) == 0:
             return self.create_empty_dataframe()
         
-        processed_data = []
-        
-        for philosopher in self.philosophers_data:
-            # Extract basic information
-            philosopher_data = {
-                'id': philosopher.get('id', ''),
-                'name': philosopher.get('name', ''),
-                'birthYear': philosopher.get('birthYear', 0),
-                'deathYear': philosopher.get('deathYear', 0),
-                'era': philosopher.get('era', 'Unknown'),
-                'primaryDomain': philosopher.get('primaryDomain', 'Unknown'),
-                'allDomains': philosopher.get('allDomains', []),
-                'spiralDynamicsStage': philosopher.get('spiralDynamicsStage', 'Unknown'),
-                'birthLocation': philosopher.get('birthLocation', {}),
-                'domainStrengths': philosopher.get('domainStrengths', {}),
-                'comprehensiveBiography': philosopher.get('comprehensiveBiography', ''),
-                'switchPoints': philosopher.get('switchPoints', [])
-            }
-            
-            # Generate 3D coordinates for orb positioning
-            coords = self.generate_orb_coordinates(len(processed_data))
-            philosopher_data.update(coords)
-            
-            # Assign color based on era or domain
-            philosopher_data['color'] = self.get_philosopher_color(philosopher_data)
-            
-            processed_data.append(philosopher_data)
+        # Generate 3D coordinates for orb positioning in one pass over all nodes
+        self.store.set_coordinates(self.layout_engine.compute(self.store, self.layout_mode, self.similarity))
         
-        return pd.DataFrame(processed_data)
+        return self._finish_frame()
     
-    def generate_orb_coordinates(self, index):
-        """Generate 3D coordinates on a sphere surface"""
-        # Use golden ratio for spiral distribution
-        golden_ratio = (1 + 5**0.5) / 2
+    def restore(self, artifacts):
+        """Adopt previously processed artifacts instead of reprocessing"""
+        self.store = artifacts.store
+        self.filter_index = artifacts.filter_index
+        self.facets = FacetIndex(self.store)
+        self.timeline = LifespanIndex(self.store)
+        self.graph = artifacts.graph
+        self.text_index = artifacts.text_index
+        self.embedding_index = artifacts.embedding_index
+        self.similarity = artifacts.similarity
+        self.implications = artifacts.implications
+        self.load_report = artifacts.report
+        self._layout_cache = {}
+        self.version += 1
+        self._layout_frames = {}
+        self._importance = {}
+        self._digests = None
+        if len(self.store) == 0:
+            return self.create_empty_dataframe()
         
-        # Generate coordinates using Fibonacci sphere
-        i = index
-        theta = 2 * np.pi * i / golden_ratio
-        phi = np.arccos(1 - 2 * i / (index + 1)) if index > 0 else 0
+        if artifacts.layout_mode != self.layout_mode:
+            self.store.set_coordinates(self.layout_engine.compute(self.store, self.layout_mode, self.similarity))
+        return self._finish_frame()
+    
+    def diff_records(self, records):
+        """Compare records with the loaded corpus by id and content hash.
+
+        Returns (upserts, deletes): the new or changed records and the ids
+        no longer present. Unchanged records are only hashed, never kept.
+        Returns None when ids repeat in either corpus, since rows can then
+        not be matched by id.
+        """
+        store = self.store
+        if len(store.id_index) != len(store):
+            return None
+        if self._digests is None:
+            self._digests = store.details.digests()
         
-        radius = 5  # Base radius for the orb
+        upserts, seen = [], set()
+        for philosopher in records:
+            philosopher_id = philosopher.get('id', '')
+            if philosopher_id in seen:
+                return None
+            seen.add(philosopher_id)
+            row = store.row_of(philosopher_id)
+            if row is None or record_digest(DetailStore.encode(philosopher)) != self._digests[row]:
+                upserts.append(philosopher)
+        deletes = [philosopher_id for philosopher_id in store.id_index if philosopher_id not in seen]
+        return upserts, deletes
+    
+    @instrumented()
+    def apply_changes(self, upserts=(), deletes=()):
+        """Insert, update and delete records without reprocessing the corpus.
+
+        upserts are full records matched to existing rows by id (new ids
+        are appended); deletes are philosopher ids. The store, filter and
+        text indexes, embeddings and influence graph are patched for the
+        changed rows only, the layout is recomputed in one vectorized pass,
+        and the new objects are swapped in together so sessions never see a
+        half-applied change. Returns counts of each kind of change.
+        """
+        store = self.store
+        updates, inserts = {}, []
+        for philosopher in upserts:
+            row = store.row_of(philosopher.get('id', ''))
+            if row is None:
+                inserts.append(philosopher)
+            else:
+                updates[row] = philosopher
+        delete_rows = [row for row in (store.row_of(i) for i in deletes) if row is not None]
+        changes = {'updated': len(updates), 'inserted': len(inserts), 'deleted': len(delete_rows)}
+        if not (updates or inserts or delete_rows):
+            return changes
+
+        new_store, remap = store.with_changes(updates, inserts, delete_rows)
+        rows = np.concatenate([remap[np.asarray(list(updates), dtype=np.int64)],
+                               len(new_store) - len(inserts) + np.arange(len(inserts))]).astype(np.int64)
+        changed = list(updates.values()) + inserts
+
+        filter_index = self.filter_index.rebased(new_store, remap, rows)
+        facets = FacetIndex(new_store)
+        timeline = LifespanIndex(new_store)
+        similarity = self.similarity.rebased(new_store, remap, rows, changed)
+        implications = self.implications.rebased(new_store, remap, rows, changed)
+        graph = self.graph.rebased(new_store, remap, rows)
+        # Indexes are patched on copies; sessions keep searching the originals
+        text_index = self.text_index.copy() if self.text_index is not None else None
+        if text_index is not None:
+            text_index.remap(remap, len(new_store))
+            for row, philosopher in zip(rows, changed):
+                text_index.update(int(row), philosopher)
+            text_index.compact()
+        embedding_index = copy.copy(self.embedding_index)
+        if embedding_index is not None:
+            embedding_index.remap(remap, len(new_store))
+        for row, philosopher in zip(rows, changed):
+            if isinstance(philosopher.get('embedding'), list):
+                if embedding_index is None:
+                    embedding_index = EmbeddingIndex(len(new_store), len(philosopher['embedding']))
+                embedding_index.set([row], [philosopher['embedding']])
+            elif embedding_index is not None:
+                embedding_index.remove(row)
+
+        digests = None
+        if self._digests is not None:
+            digests = np.empty(len(new_store), dtype=np.uint64)
+            kept = np.flatnonzero(remap >= 0)
+            digests[remap[kept]] = self._digests[kept]
+            digests[rows] = [record_digest(new_store.details.raw(int(row))) for row in rows]
+
+        if len(new_store):
+            new_store.set_coordinates(self.layout_engine.compute(new_store, self.layout_mode, similarity))
+
+        with self._lock:
+            self.store = new_store
+            self.filter_index = filter_index
+            self.facets = facets
+            self.timeline = timeline
+            self.graph = graph
+            self.text_index = text_index
+            self.embedding_index = embedding_index
+            self.similarity = similarity
+            self.implications = implications
+            self._digests = digests
+            self._layout_cache = {}
+            self.version += 1
+            self._layout_frames = {}
+            self._importance = {}
+            self._finish_frame()
+        return changes
+    
+    @instrumented()
+    def reload_changes(self, path=None, max_changed=0.25):
+        """Bring the loaded corpus up to date with its source file.
+
+        Applies only the records that changed since the last load; falls
+        back to a full reprocess when ids repeat or more than max_changed
+        of the rows changed. The result is recorded in last_reload.
+        """
+        path = Path(path or self.source_path)
+        started = time.perf_counter()
+        # The watcher passes a different file when a higher-priority corpus appears
+        self.source_path = path
+        reader = CorpusReader(path)
+        diff = self.diff_records(reader) if self.store is not None and self.backend is None else None
         
-        x = radius * np.sin(phi) * np.cos(theta)
-        y = radius * np.sin(phi) * np.sin(theta)
-        z = radius * np.cos(phi)
+        if diff is None or len(diff[0]) + len(diff[1]) > max_changed * max(len(self.store), 1):
+            # Reprocess on a separate processor, then swap everything in at
+            # once so sessions never pair the new store with an old index
+            fresh = PhilosopherDataProcessor(cache=False, backend=self.backend)
+            fresh.layout_engine, fresh.layout_mode = self.layout_engine, self.layout_mode
+            reader = CorpusReader(path)
+            fresh.process_data(reader, reader.report)
+            self._adopt(fresh)
+            changes = {'full_reload': True, 'records': len(fresh.store)}
+        else:
+            changes = dict(self.apply_changes(*diff), full_reload=False)
+        self.load_report = reader.report
         
-        return {'x': x, 'y': y, 'z': z}
+        # Later processes start from the updated dataset
+        if self.cache:
+            try:
+                self._save_cache(self.cache.key(path))
+            except OSError:
+                pass
+        changes['seconds'] = time.perf_counter() - started
+        changes['at'] = time.time()
+        self.last_reload = changes
+        return changes
     
-    def get_philosopher_color(self, philosopher_data):
-        """Assign color based on era or domain"""
-        era_colors = {
-            'Ancient': '#FF6B6B',      # Red
-            'Classical': '#4ECDC4',    # Teal
-            'Medieval': '#45B7D1',     # Blue
-            'Renaissance': '#96CEB4',  # Green
-            'Modern': '#FFEAA7',       # Yellow
-            'Contemporary': '#DDA0DD', # Plum
-            'Postmodern': '#98D8C8'    # Mint
-        }
+    def _adopt(self, other):
+        """Swap in another processor's dataset and indexes in one step"""
+        with self._lock:
+            self.store = other.store
+            self.filter_index = other.filter_index
+            self.facets = other.facets
+            self.timeline = other.timeline
+            self.graph = other.graph
+            self.text_index = other.text_index
+            self.embedding_index = other.embedding_index
+            self.similarity = other.similarity
+            self.implications = other.implications
+            self._digests = None
+            self._layout_cache = {}
+            self.version += 1
+            self._layout_frames = {}
+            self._importance = {}
+    
+    def _finish_frame(self):
+        # Assign color based on era or domain
+        df = self.store.frame
+        df['color'] = df['era'].map(ERA_COLORS).astype(object).fillna(DEFAULT_COLOR).astype('category')
         
-        era = philosopher_data.get('era', 'Unknown')
-        return era_colors.get(era, '#00FF00')  # Default to phosphor green
+        return df
     
-    def filter_philosophers(self, df, domain_filter, era_filter, search_term):
-        """Filter philosophers based on criteria"""
-        filtered_df = df.copy()
+    def apply_layout(self, df, mode):
+        """Return the full df with coordinates for another layout mode"""
+        if mode == self.layout_mode or df.empty:
+            return df
         
-        # Apply domain filter
-        if domain_filter != "All":
-            filtered_df = filtered_df[
-                (filtered_df['primaryDomain'] == domain_filter) |
-                (filtered_df['allDomains'].apply(lambda x: domain_filter in x if isinstance(x, list) else False))
-            ]
+        if self.store is not None and df is self.store.frame:
+            return self.layout_frame(mode)
+        coords = self._layout_coordinates(mode)
+        return df.assign(x=coords[:, 0], y=coords[:, 1], z=coords[:, 2])
+    
+    def _layout_coordinates(self, mode):
+        with self._lock:
+            if mode not in self._layout_cache:
+                self._layout_cache[mode] = self.layout_engine.compute(
+                    self.store, mode, self.similarity).astype(np.float32)
+            return self._layout_cache[mode]
+    
+    def layout_frame(self, mode=None):
+        """The shared full frame with coordinates for a layout mode.
+
+        Built once per mode and shared by every session; callers must
+        treat it as read-only.
+        """
+        if mode is None or mode == self.layout_mode or self.store is None or len(self.store) == 0:
+            return self.store.frame if self.store is not None else self.create_empty_dataframe()
         
-        # Apply era filter
-        if era_filter != "All":
-            filtered_df = filtered_df[filtered_df['era'] == era_filter]
+        with self._lock:
+            frame = self._layout_frames.get(mode)
+        if frame is None:
+            coords = self._layout_coordinates(mode)
+            frame = self.store.frame.assign(x=coords[:, 0], y=coords[:, 1], z=coords[:, 2])
+            with self._lock:
+                frame = self._layout_frames.setdefault(mode, frame)
+        return frame
+    
+    def get_philosopher_color(self, philosopher_data):
+        """Assign color based on era or domain"""
+        era = philosopher_data.get('era', 'Unknown')
+        return ERA_COLORS.get(era, DEFAULT_COLOR)
+    
+    def filter_philosophers(self, df, domain_filter, era_filter, search_term, domain_mode='any',
+                            search_mode='name', stage_filter=None):
+        """Filter philosophers based on criteria.
+
+        domain_filter, era_filter and stage_filter take a single name, a
+        list of names, or "All". Multiple domains match any or all of them
+        according to domain_mode. search_mode 'name' matches the search
+        term against names; 'text' runs a full-text search and orders the
+        result by relevance. Rows of df must be aligned with the store by
+        index.
+        """
+        rows = self.select(domain_filter, era_filter, search_term, domain_mode, search_mode, stage_filter)
         
-        # Apply search filter
-        if search_term:
-            search_mask = filtered_df['name'].str.contains(search_term, case=False, na=False)
-            filtered_df = filtered_df[search_mask]
+        # Unfiltered requests return the frame itself, without a copy
+        if rows is None:
+            return df
+        return df.take(rows)
+    
+    def _dataset(self):
+        """The store and query indexes of one dataset version, read together
+        so a concurrent reload can never pair a new store with an old index"""
+        with self._lock:
+            return self.store, self.filter_index, self.text_index
+    
+    def select(self, domain_filter=None, era_filter=None, search_term=None, domain_mode='any',
+               search_mode='name', stage_filter=None):
+        """Row ids matching the filters, or None when every row matches.
+
+        Takes the same arguments as filter_philosophers but returns a
+        read-only index array instead of a frame.
+        """
+        return self._select(self._dataset(), domain_filter, era_filter, search_term, domain_mode,
+                            search_mode, stage_filter)
+    
+    @instrumented('filter_philosophers')
+    def _select(self, dataset, domain_filter, era_filter, search_term, domain_mode, search_mode, stage_filter):
+        store, filter_index, text_index = dataset
+        full_text = search_mode == 'text' and search_term and search_term.strip()
+        if self.backend is not None:
+            ids = self.backend.select_ids(
+                domains=_as_selection(domain_filter),
+                eras=_as_selection(era_filter),
+                search_term=None if full_text else search_term,
+                domain_mode=domain_mode,
+                stages=_as_selection(stage_filter)
+            )
+            rows = store.rows_of(ids)
+        else:
+            rows = filter_index.select(
+                domains=_as_selection(domain_filter),
+                eras=_as_selection(era_filter),
+                search_term=None if full_text else search_term,
+                domain_mode=domain_mode,
+                stages=_as_selection(stage_filter)
+            )
+        if full_text:
+            mask = np.zeros(len(store), dtype=bool)
+            mask[rows] = True
+            rows, _ = text_index.search(search_term, k=None, mask=mask)
+            rows.flags.writeable = False
+            return rows
         
-        return filtered_df
+        if len(rows) == len(store):
+            return None
+        rows = np.asarray(rows)
+        rows.flags.writeable = False
+        return rows
+    
+    def view(self, domain_filter=None, era_filter=None, search_term=None, domain_mode='any',
+             search_mode='name', layout=None, stage_filter=None):
+        """A session's DatasetView: the matching row ids and layout mode"""
+        dataset = self._dataset()
+        rows = self._select(dataset, domain_filter, era_filter, search_term, domain_mode, search_mode, stage_filter)
+        return DatasetView(self, rows, layout, dataset[0])
+    
+    def search_rows(self, search_term, search_mode='name'):
+        """Row ids matching a search term alone, or None without a term"""
+        if not search_term or not search_term.strip():
+            return None
+        if search_mode == 'text':
+            return np.flatnonzero(self.text_index.scores(search_term) > 0)
+        if self.backend is not None:
+            return self.store.rows_of(self.backend.select_ids(search_term=search_term))
+        return self.filter_index.name_matches(search_term)
+    
+    def facet_counts(self, domain_filter=None, era_filter=None, search_term=None, domain_mode='any',
+                     search_mode='name', stage_filter=None):
+        """Live counts for every domain, era and stage filter option.
+
+        Takes the same arguments as select. Without a search term the
+        counts come straight from the precomputed facet cubes; with one,
+        only the search matches are counted.
+        """
+        if self.facets is None:
+            return {'total': 0, 'domain': {}, 'era': {}, 'stage': {}}
+        return self.facets.counts(
+            domains=_as_selection(domain_filter),
+            eras=_as_selection(era_filter),
+            stages=_as_selection(stage_filter),
+            domain_mode=domain_mode,
+            rows=self.search_rows(search_term, search_mode)
+        )
     
     def get_all_domains(self):
         """Get all unique domains from the data"""
-        if self.philosophers_data is None:
+        if self.facets is None:
             return []
         
-        domains = set()
-        for philosopher in self.philosophers_data:
-            # Add primary domain
-            if 'primaryDomain' in philosopher:
-                domains.add(philosopher['primaryDomain'])
-            
-            # Add all domains
-            if 'allDomains' in philosopher:
-                domains.update(philosopher['allDomains'])
-        
-        return list(domains)
+        return list(self.facets.present_domains)
     
     def get_all_eras(self):
         """Get all unique eras from the data"""
-        if self.philosophers_data is None:
+        if self.facets is None:
             return []
         
-        eras = set()
-        for philosopher in self.philosophers_data:
-            if 'era' in philosopher:
-                eras.add(philosopher['era'])
+        return list(self.facets.eras)
+    
+    def get_all_stages(self):
+        """Get all spiral dynamics stages from the data"""
+        if self.facets is None:
+            return []
         
-        return list(eras)
+        return list(self.facets.stages)
     
     def get_philosopher_by_id(self, df, philosopher_id):
         """Get philosopher details by ID"""
-        if self.philosophers_data is None:
+        if self.store is None:
+            return None
+        
+        row = self.store.row_of(philosopher_id)
+        if row is None:
             return None
         
-        for philosopher in self.philosophers_data:
-            if philosopher.get('id') == philosopher_id:
-                return philosopher
+        if self.backend is not None:
+            return self.backend.record(philosopher_id)
+        return self.store.record(row)
+    
+    def get_many(self, philosopher_ids):
+        """Get details for several philosophers in one call.
+
+        Returns a dict of id -> record for the ids that exist.
+        """
+        if self.store is None:
+            return {}
+        
+        records = {}
+        for philosopher_id in philosopher_ids:
+            row = self.store.row_of(philosopher_id)
+            if row is not None and philosopher_id not in records:
+                records[philosopher_id] = (self.backend.record(philosopher_id) if self.backend is not None
+                                           else self.store.record(row))
+        return records
+    
+    def get_influence_neighbors(self, philosopher_id, hops=1):
+        """Philosophers linked to philosopher_id by influence or critique.
+
+        Returns a list of dicts with id, name, distance and whether the
+        philosopher is part of the loaded corpus, nearest first.
+        """
+        if self.graph is None:
+            return []
+        
+        node = self.graph.node_of(philosopher_id)
+        if node is None:
+            return []
+        
+        nodes, distances = self.graph.k_hop(node, hops)
+        return [
+            {
+                'id': self.graph.node_ids[n],
+                'name': self.graph.node_names[n],
+                'distance': int(d),
+                'inCorpus': bool(n < self.graph.n_corpus)
+            }
+            for n, d in zip(nodes, distances) if d > 0
+        ]
+    
+    def alive_in(self, year, rows=None):
+        """Sorted rows of the philosophers alive in a year.
+
+        rows optionally restricts the answer to a selection, such as a
+        DatasetView's rows.
+        """
+        if self.timeline is None:
+            return np.array([], dtype=np.int64)
+        
+        alive = self.timeline.alive(year)
+        if rows is None:
+            return alive
+        return alive[np.isin(alive, rows, assume_unique=True)]
+    
+    def get_contemporaries(self, philosopher_id, limit=None):
+        """Philosophers whose lifespans overlap philosopher_id's.
+
+        Returns a list of dicts with id, name and overlapping years,
+        longest overlap first.
+        """
+        if self.timeline is None:
+            return []
+        
+        row = self.store.row_of(philosopher_id)
+        if row is None:
+            return []
+        
+        rows, overlap = self.timeline.contemporaries(row)
+        if limit is not None:
+            rows, overlap = rows[:limit], overlap[:limit]
+        ids, names = self.store.frame['id'].to_numpy(), self.store.frame['name'].to_numpy()
+        return [
+            {'id': ids[r], 'name': names[r], 'overlapYears': int(years)}
+            for r, years in zip(rows, overlap)
+        ]
+    
+    def get_similar(self, philosopher_id, k=10, rows=None):
+        """Philosophers closest to philosopher_id in genome and domain profile.
+
+        rows optionally restricts the candidates to a selection. Returns a
+        list of dicts with id, name and cosine similarity, most similar
+        first.
+        """
+        if self.similarity is None:
+            return []
+        
+        row = self.store.row_of(philosopher_id)
+        if row is None:
+            return []
+        
+        mask = None
+        if rows is not None:
+            mask = np.zeros(len(self.store), dtype=bool)
+            mask[rows] = True
+        neighbors, scores = self.similarity.neighbors(row, k, mask)
+        ids, names = self.store.frame['id'].to_numpy(), self.store.frame['name'].to_numpy()
+        return [
+            {'id': ids[r], 'name': names[r], 'similarity': float(score)}
+            for r, score in zip(neighbors, scores)
+        ]
+    
+    def similar_pairs(self, k=10, rows=None):
+        """Top-k most similar rows for every row (or the given rows) at once.
+
+        Returns (rows, neighbors, similarities) arrays; see
+        SimilarityIndex.all_pairs.
+        """
+        if self.similarity is None:
+            return np.array([], dtype=np.int64), np.zeros((0, k), dtype=np.int64), np.zeros((0, k), dtype=np.float32)
+        
+        rows = np.flatnonzero(self.similarity.present) if rows is None else np.asarray(rows, dtype=np.int64)
+        neighbors, similarities = self.similarity.all_pairs(k, rows)
+        return rows, neighbors, similarities
+    
+    def implied_by(self, claim, question=None, limit=None):
+        """Claims that follow from a claim, directly or through a chain of
+        switch point cascades and implication chains. Pass a switch point's
+        question with its position."""
+        if self.implications is None:
+            return []
+        concept = self.implications.concept(claim, question)
+        if concept is None:
+            return []
+        implied = self.implications.implied(concept)[:limit]
+        return [self.implications.labels[c] for c in implied]
+    
+    def _ranked_by(self, philosopher_id, counts_of, key, limit, rows):
+        """Rows with the highest nonzero count against philosopher_id"""
+        if self.implications is None:
+            return []
+        row = self.store.row_of(philosopher_id)
+        if row is None:
+            return []
+    
+        counts = counts_of(row)
+        candidates = np.flatnonzero(counts) if rows is None else np.asarray(rows, dtype=np.int64)
+        candidates = candidates[counts[candidates] > 0]
+        # Highest count first, ties in row order
+        candidates = candidates[np.argsort(-counts[candidates], kind='stable')][:limit]
+        ids, names = self.store.frame['id'].to_numpy(), self.store.frame['name'].to_numpy()
+        return [{'id': ids[r], 'name': names[r], key: int(counts[r])} for r in candidates]
+    
+    def has_cross_links(self):
+        """Whether get_tensions, get_common_ground or compare_positions can
+        find anything for any philosopher"""
+        return self.implications is not None and self.implications.cross_links
+    
+    def get_tensions(self, philosopher_id, limit=5, rows=None):
+        """Philosophers whose commitments conflict most with philosopher_id's.
+    
+        Returns a list of dicts with id, name and the number of conflicting
+        commitment pairs, most conflicts first.
+        """
+        return self._ranked_by(philosopher_id, lambda row: self.implications.tension_counts(row),
+                               'conflicts', limit, rows)
+    
+    def get_common_ground(self, philosopher_id, limit=5, rows=None):
+        """Philosophers sharing the most commitments with philosopher_id.
+    
+        Returns a list of dicts with id, name and the number of shared
+        commitments, most first.
+        """
+        return self._ranked_by(philosopher_id, lambda row: self.implications.common_counts(row),
+                               'shared', limit, rows)
+    
+    def compare_positions(self, id_a, id_b):
+        """Positions two philosophers hold in common and in tension.
+    
+        Returns a dict with ``common`` (claims both are committed to),
+        ``tension`` ((a's claim, b's claim) pairs declared to conflict) and
+        ``different_answers`` ((question, a's position, b's position) for
+        switch point questions they answer differently), or None when
+        either id is unknown.
+        """
+        if self.implications is None:
+            return None
+        row_a, row_b = self.store.row_of(id_a), self.store.row_of(id_b)
+        if row_a is None or row_b is None:
+            return None
+    
+        result = self.implications.compare(row_a, row_b)
+        labels = self.implications.labels
+        return {
+            'common': [labels[c] for c in result['common']],
+            'tension': [(labels[a], labels[b]) for a, b in result['tension']],
+            'different_answers': [(labels[q], labels[a], labels[b]) for q, a, b in result['different_answers']]
+        }
+    
+    def get_importance(self, rows, by='centrality'):
+        """Importance score of each row, for choosing which nodes to label.
+
+        'centrality' ranks by influence PageRank, with domain strength as a
+        tie-breaker; 'strength' ranks by total domainStrengths.
+        """
+        with self._lock:
+            if by not in self._importance:
+                self._importance[by] = self._importance_scores(by)
+            return self._importance[by][rows]
+    
+    def _importance_scores(self, by):
+        n = len(self.store)
+        strength = np.bincount(
+            np.repeat(np.arange(n), np.diff(self.store.strength_indptr)),
+            weights=self.store.strength_values, minlength=n
+        )
+        strength = strength / strength.max() if n and strength.max() > 0 else strength
+        if by == 'centrality' and self.graph is not None:
+            rank = self.graph.pagerank[:n].astype(np.float64)
+            rank = rank / rank.max() if n and rank.max() > 0 else rank
+            scores = rank + 1e-3 * strength
+        else:
+            scores = strength
+        return scores.astype(np.float32)
+    
+    def search_text(self, query, k=20):
+        """Full-text search over names, biographies, switch points, quotes
+        and works.
+
+        Returns a list of dicts with id, name and BM25 score, best first.
+        """
+        if self.text_index is None or not query or not query.strip():
+            return []
+        
+        rows, scores = self.text_index.search(query, k)
+        frame = self.store.frame
+        return [
+            {'id': frame['id'].iat[row], 'name': frame['name'].iat[row], 'score': float(score)}
+            for row, score in zip(rows, scores)
+        ]
+    
+    def set_embeddings(self, rows, vectors):
+        """Attach embedding vectors (one per row) for semantic search"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.embedding_index is None:
+            self.embedding_index = EmbeddingIndex(len(self.store), vectors.shape[1])
+        self.embedding_index.set(rows, vectors)
+    
+    def search_semantic(self, vector, k=20):
+        """Philosophers whose embedding is closest to vector by cosine.
+
+        Returns a list of dicts with id, name and similarity, best first.
+        """
+        if self.embedding_index is None:
+            return []
         
-        return None
+        rows, similarity = self.embedding_index.search(vector, k)
+        frame = self.store.frame
+        return [
+            {'id': frame['id'].iat[row], 'name': frame['name'].iat[row], 'similarity': float(value)}
+            for row, value in zip(rows, similarity)
+        ]
@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+from instrumentation import METRICS
+
+# Seconds between polls of the watched data file
+WATCH_INTERVAL = float(os.environ.get('NEXUS_WATCH_INTERVAL', '2'))
+
+
+class FileWatcher:
+    """Polls the size and modification time of candidate files on a daemon thread.
+
+    paths is one file or a list of candidates in priority order, such as
+    every location load_data reads a corpus from. on_change(path) is called
+    with the first candidate that exists once any of them has been added,
+    removed or changed and then stayed the same for one more poll, so a
+    file still being written is never read half way and adding a
+    higher-priority file switches to it. Polling needs no platform
+    file-event support and costs one stat per candidate per interval.
+    """
+
+    def __init__(self, paths, on_change, interval=WATCH_INTERVAL):
+        if isinstance(paths, (str, os.PathLike)):
+            paths = [paths]
+        self.paths = [Path(path) for path in paths]
+        self.on_change = on_change
+        self.interval = interval
+        self.last_error = None
+        self._seen = self._stat()
+        self._pending = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def path(self):
+        """The highest-priority candidate that exists, or None"""
+        return next((path for path in self.paths if path.exists()), None)
+
+    def _stat(self):
+        """(mtime, size) of every candidate, None for missing ones; None
+        when no candidate exists"""
+        stats = []
+        for path in self.paths:
+            try:
+                stat = path.stat()
+            except OSError:
+                stats.append(None)
+            else:
+                stats.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(stats) if any(stats) else None
+
+    def check(self):
+        """Poll once; returns True if on_change was called"""
+        current = self._stat()
+        if current is None or current == self._seen:
+            self._pending = None
+            return False
+        if current != self._pending:
+            # Changed since the last poll: wait until it settles
+            self._pending = current
+            return False
+        self._seen, self._pending = current, None
+        path = self.path
+        if path is None:
+            return False
+        try:
+            self.on_change(path)
+            self.last_error = None
+        except Exception as e:
+            # Keep watching; the next edit gets another chance
+            self.last_error = str(e)
+            METRICS.count('data_watch.errors')
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f'watch-{self.paths[0].name}', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
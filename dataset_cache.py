@@ -0,0 +1,308 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from corpus_loader import LoadReport
+from implications import ImplicationGraph
+from influence_graph import InfluenceGraph
+from philosopher_index import FilterIndex
+from philosopher_store import DetailStore, PhilosopherStore
+from similarity import SimilarityIndex
+from text_search import EmbeddingIndex, TextSearchIndex
+
+# Bump when the artifact layout or any of the processing steps change
+CACHE_FORMAT = 8
+DEFAULT_CACHE_DIR = Path(os.environ.get('NEXUS_CACHE_DIR', '.cache/processed'))
+
+_CATEGORICAL = ('era', 'primaryDomain', 'spiralDynamicsStage')
+_NUMERIC = ('birthYear', 'deathYear', 'x', 'y', 'z')
+
+
+def source_hash(path, chunk_size=1 << 20):
+    """SHA-256 of a source file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ProcessedArtifacts:
+    """Everything load_data derives from the corpus file"""
+
+    def __init__(self, store, filter_index, graph, report, layout_mode,
+                 text_index=None, embedding_index=None, similarity=None, implications=None):
+        self.store = store
+        self.filter_index = filter_index
+        self.graph = graph
+        self.report = report
+        self.layout_mode = layout_mode
+        self.text_index = text_index
+        self.embedding_index = embedding_index
+        self.similarity = similarity
+        self.implications = implications
+
+
+class DatasetCache:
+    """On-disk cache of the processed dataset, keyed by source content hash.
+
+    Each entry is a directory of .npy arrays (opened memory-mapped), the
+    detail store as one raw byte file, and a JSON manifest holding strings
+    and metadata. Entries are written to a temporary directory and renamed
+    into place, so several processes can share one cache directory safely.
+    Stored as plain numpy files because pyarrow is not a dependency.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, keep=3):
+        self.directory = Path(directory)
+        self.keep = keep
+
+    def key(self, path):
+        return f"{source_hash(path)[:32]}-v{CACHE_FORMAT}"
+
+    def entry(self, key):
+        return self.directory / key
+
+    def load(self, key):
+        """ProcessedArtifacts for a key, or None on a miss or unreadable entry"""
+        entry = self.entry(key)
+        manifest_path = entry / 'manifest.json'
+        if not manifest_path.exists():
+            return None
+        try:
+            return _read_entry(entry, json.loads(manifest_path.read_text(encoding='utf-8')))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, key, artifacts):
+        """Write an entry atomically; losing a race to another writer is fine"""
+        entry = self.entry(key)
+        if entry.exists():
+            return entry
+        self.directory.mkdir(parents=True, exist_ok=True)
+        staging = self.directory / f".{key}.{os.getpid()}.tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir()
+        try:
+            _write_entry(staging, artifacts)
+            os.replace(staging, entry)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            if not entry.exists():
+                raise
+        self.prune()
+        return entry
+
+    def prune(self):
+        """Drop all but the most recently written entries"""
+        entries = sorted(
+            (p for p in self.directory.iterdir() if p.is_dir() and not p.name.startswith('.')),
+            key=lambda p: p.stat().st_mtime, reverse=True
+        )
+        for stale in entries[self.keep:]:
+            shutil.rmtree(stale, ignore_errors=True)
+
+
+def _save_arrays(entry, arrays):
+    for name, array in arrays.items():
+        np.save(entry / f"{name}.npy", np.asarray(array), allow_pickle=False)
+
+
+def write_store(entry, store):
+    """Write a store's columns, CSR arrays and detail blob into a directory.
+
+    Returns the manifest fields read_store needs; the caller writes them.
+    """
+    frame = store.frame
+    arrays = {name: frame[name].to_numpy() for name in _NUMERIC}
+    arrays.update({f"{name}_codes": frame[name].cat.codes.to_numpy() for name in _CATEGORICAL})
+    arrays.update({
+        'domain_indptr': store.domain_indptr,
+        'domain_indices': store.domain_indices,
+        'strength_indptr': store.strength_indptr,
+        'strength_indices': store.strength_indices,
+        'strength_values': store.strength_values,
+        'detail_offsets': store.details.offsets
+    })
+    _save_arrays(entry, arrays)
+    (entry / 'details.bin').write_bytes(bytes(store.details.blob))
+    return {
+        'rows': len(store),
+        'ids': list(frame['id']),
+        'names': list(frame['name']),
+        'categories': {name: list(frame[name].cat.categories) for name in _CATEGORICAL},
+        'domains': store.domains
+    }
+
+
+def _mapped(path):
+    """Read-only array backed by a memory map of a .npy file.
+
+    Returned as a plain ndarray view: slicing an np.memmap runs Python
+    code per slice, which dominates loads that cut thousands of postings
+    lists out of one array. The view keeps the map open.
+    """
+    return np.load(path, mmap_mode='r', allow_pickle=False).view(np.ndarray)
+
+
+def read_store(entry, manifest):
+    """PhilosopherStore written by write_store, arrays memory-mapped"""
+    def array(name):
+        return _mapped(entry / f"{name}.npy")
+
+    columns = {
+        'id': pd.Series(manifest['ids'], dtype=object),
+        'name': pd.Series(manifest['names'], dtype=object)
+    }
+    for name in ('birthYear', 'deathYear'):
+        columns[name] = np.array(array(name))
+    for name in _CATEGORICAL:
+        columns[name] = pd.Categorical.from_codes(
+            np.array(array(f"{name}_codes")), manifest['categories'][name])
+    for name in ('x', 'y', 'z'):
+        columns[name] = np.array(array(name))
+    frame = pd.DataFrame(columns)[[
+        'id', 'name', 'birthYear', 'deathYear', 'era', 'primaryDomain',
+        'spiralDynamicsStage', 'x', 'y', 'z'
+    ]]
+
+    blob_path = entry / 'details.bin'
+    blob = np.memmap(blob_path, dtype=np.uint8, mode='r') if blob_path.stat().st_size else b''
+    return PhilosopherStore(
+        frame=frame,
+        domains=manifest['domains'],
+        domain_indptr=array('domain_indptr'),
+        domain_indices=array('domain_indices'),
+        strength_indptr=array('strength_indptr'),
+        strength_indices=array('strength_indices'),
+        strength_values=array('strength_values'),
+        details=DetailStore(blob, array('detail_offsets'))
+    )
+
+
+def _write_entry(entry, artifacts):
+    store, index, graph, report = artifacts.store, artifacts.filter_index, artifacts.graph, artifacts.report
+    manifest = write_store(entry, store)
+    arrays = {
+        'graph_src': graph.src,
+        'graph_dst': graph.dst,
+        'graph_weight': graph.weight,
+        'graph_kind': graph.kind,
+        'graph_pagerank': graph.pagerank
+    }
+
+    # Trigram postings flattened into one CSR array
+    name_ngrams = index.name_index
+    grams = list(name_ngrams)
+    lengths = [len(name_ngrams[gram]) for gram in grams]
+    arrays['ngram_indptr'] = np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)])
+    arrays['ngram_rows'] = (np.concatenate([name_ngrams[gram] for gram in grams])
+                            if grams else np.array([], dtype=np.int32))
+
+    text_index = artifacts.text_index
+    if text_index is not None:
+        if text_index._dirty:
+            # Never compact the shared index in place; sessions may be searching it
+            text_index = text_index.copy()
+            text_index.compact()
+        arrays.update({
+            'text_indptr': text_index.indptr,
+            'text_rows': text_index.rows,
+            'text_tfs': text_index.tfs,
+            'text_doc_len': text_index.doc_len,
+            'text_live': text_index.live
+        })
+    embedding_index = artifacts.embedding_index
+    if embedding_index is not None:
+        arrays['embedding_vectors'] = embedding_index.vectors
+        arrays['embedding_present'] = embedding_index.present
+    if artifacts.similarity is not None:
+        arrays['similarity_genome'] = artifacts.similarity.genome
+        arrays['similarity_features'] = artifacts.similarity.features
+        arrays['similarity_present'] = artifacts.similarity.present
+    implications = artifacts.implications
+    if implications is not None:
+        # Claim labels are a byte array too, so they stay out of the
+        # manifest that every load parses
+        arrays.update({f'implication_{name}': value for name, value in implications.arrays().items()})
+
+    _save_arrays(entry, arrays)
+
+    manifest.update({
+        'format': CACHE_FORMAT,
+        'created': time.time(),
+        'layout_mode': artifacts.layout_mode,
+        'grams': grams,
+        'graph_node_ids': graph.node_ids,
+        'graph_node_names': graph.node_names,
+        'graph_n_corpus': graph.n_corpus,
+        'text_terms': text_index.terms if text_index is not None else None,
+        'report': {
+            'source': str(report.source) if report and report.source else None,
+            'documents': report.documents if report else 0,
+            'records': report.records if report else len(store),
+            'repaired': report.repaired if report else [],
+            'skipped': report.skipped if report else [],
+            'unmapped_genome': report.unmapped_genome if report else []
+        }
+    })
+    # The manifest goes last: an entry without one is never read
+    (entry / 'manifest.json').write_text(json.dumps(manifest, ensure_ascii=False), encoding='utf-8')
+
+
+def _read_entry(entry, manifest):
+    if manifest.get('format') != CACHE_FORMAT:
+        return None
+
+    def array(name):
+        return _mapped(entry / f"{name}.npy")
+
+    store = read_store(entry, manifest)
+
+    indptr, rows = array('ngram_indptr'), array('ngram_rows')
+    name_ngrams = {gram: rows[indptr[i]:indptr[i + 1]] for i, gram in enumerate(manifest['grams'])}
+    filter_index = FilterIndex(store, name_index=name_ngrams)
+
+    graph = InfluenceGraph(
+        manifest['graph_node_ids'], manifest['graph_node_names'], manifest['graph_n_corpus'],
+        array('graph_src'), array('graph_dst'), array('graph_weight'), array('graph_kind'),
+        pagerank=array('graph_pagerank')
+    )
+
+    text_index = None
+    if manifest['text_terms'] is not None:
+        text_index = TextSearchIndex.from_arrays(
+            manifest['text_terms'], array('text_indptr'), array('text_rows'),
+            array('text_tfs'), array('text_doc_len'), array('text_live'))
+    embedding_index = None
+    if (entry / 'embedding_vectors.npy').exists():
+        vectors = np.array(array('embedding_vectors'))
+        embedding_index = EmbeddingIndex(len(vectors), vectors.shape[1])
+        embedding_index.vectors = vectors
+        embedding_index.present = np.array(array('embedding_present'))
+    similarity = None
+    if (entry / 'similarity_genome.npy').exists():
+        # Memory-mapped like the store columns; nothing is recomputed
+        similarity = SimilarityIndex(store, array('similarity_genome'), features=array('similarity_features'),
+                                     present=array('similarity_present'))
+    implications = None
+    if (entry / 'implication_label_blob.npy').exists():
+        implications = ImplicationGraph.from_arrays(
+            len(store), {name: array(f'implication_{name}') for name in ImplicationGraph.ARRAYS})
+
+    saved = manifest['report']
+    report = LoadReport(saved['source'])
+    report.documents = saved['documents']
+    report.records = saved['records']
+    report.repaired = saved['repaired']
+    report.skipped = saved['skipped']
+    report.unmapped_genome = saved.get('unmapped_genome', [])
+
+    return ProcessedArtifacts(store, filter_index, graph, report, manifest['layout_mode'],
+                              text_index, embedding_index, similarity, implications)
@@ -0,0 +1,55 @@
+import numpy as np
+
+
+class DatasetView:
+    """One session's window onto the shared, read-only dataset.
+
+    Holds only the selected row ids (None for every row), a layout mode
+    and the store the rows were selected on, so its size depends on the
+    selection, not on the corpus, and no frame is copied until a renderer
+    asks for one. A view made before a reload keeps reading its own store.
+    """
+
+    __slots__ = ('processor', 'rows', 'layout', 'store')
+
+    def __init__(self, processor, rows=None, layout=None, store=None):
+        self.processor = processor
+        self.rows = rows
+        self.layout = layout
+        self.store = processor.store if store is None else store
+
+    def __len__(self):
+        if self.rows is None:
+            return len(self.store) if self.store is not None else 0
+        return len(self.rows)
+
+    @property
+    def is_everything(self):
+        return self.rows is None
+
+    def mask(self):
+        """Boolean row mask of the selection"""
+        size = len(self.store)
+        if self.rows is None:
+            return np.ones(size, dtype=bool)
+        mask = np.zeros(size, dtype=bool)
+        mask[self.rows] = True
+        return mask
+
+    def ids(self):
+        """Philosopher ids in the selection"""
+        ids = self.store.frame['id'].to_numpy()
+        return ids if self.rows is None else ids[self.rows]
+
+    def frame(self):
+        """Frame of the selected rows in the view's layout.
+
+        The full selection is the shared frame itself; smaller selections
+        are gathered from it for the current render only. A view outliving
+        its dataset renders its own store's frame, in that store's layout.
+        """
+        if self.store is not self.processor.store:
+            base = self.store.frame if self.store is not None else self.processor.create_empty_dataframe()
+            return base if self.rows is None else base.take(self.rows)
+        base = self.processor.layout_frame(self.layout)
+        return base if self.rows is None else base.take(self.rows)
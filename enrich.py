@@ -0,0 +1,428 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import time
+from collections import Counter
+from pathlib import Path
+
+from corpus_loader import CorpusReader
+from ingest import DOMAINS, normalize, validate
+from orb_layout import ERA_ORDER
+
+DEFAULT_CACHE_DIR = Path('.cache') / 'enrich'
+DEFAULT_TEMPLATE = Path(__file__).resolve().parent / 'philosopher-research-prompt.md'
+DEFAULT_MODEL = 'gemini-2.5-flash'
+
+# The prompt ends with this line followed by the target as JSON
+TARGET_HEADER = "Philosopher to research (existing data, may be partial):"
+
+# HTTP status codes worth retrying
+TRANSIENT_CODES = (408, 429, 500, 502, 503, 504)
+
+_FENCE_RE = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$')
+
+
+class TransientModelError(Exception):
+    """A model call that may succeed when retried (rate limit, overload, timeout).
+
+    retry_after, when known, is the delay in seconds the service asked for.
+    """
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class GeminiModel:
+    """Gemini through the google-genai async client.
+
+    The key is read by the client from GEMINI_API_KEY or GOOGLE_API_KEY.
+    Rate limits and server errors are raised as TransientModelError.
+    """
+
+    def __init__(self, model=DEFAULT_MODEL, temperature=0.4, api_key=None):
+        from google import genai
+        from google.genai import errors, types
+
+        self.name = model
+        self._client = genai.Client(api_key=api_key) if api_key else genai.Client()
+        self._errors = errors
+        self._config = types.GenerateContentConfig(
+            temperature=temperature,
+            response_mime_type='application/json'
+        )
+
+    async def generate(self, prompt):
+        try:
+            response = await self._client.aio.models.generate_content(
+                model=self.name, contents=prompt, config=self._config)
+        except self._errors.APIError as e:
+            if e.code in TRANSIENT_CODES:
+                raise TransientModelError(f"{e.code} {e.status or ''}".strip()) from e
+            raise
+        return response.text or ''
+
+
+class FakeModel:
+    """Offline stand-in that answers with a plausible record after a delay.
+
+    Answers are derived from a hash of the target, so runs are repeatable.
+    failure_rate of calls raise TransientModelError and invalid_rate of
+    answers are not JSON, to exercise retries and rejections.
+    """
+
+    def __init__(self, latency=0.05, failure_rate=0.0, invalid_rate=0.0, seed=0):
+        self.name = 'fake'
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.invalid_rate = invalid_rate
+        self._random = random.Random(seed)
+        self.calls = 0
+
+    async def generate(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(self.latency * self._random.uniform(0.5, 1.5))
+        if self._random.random() < self.failure_rate:
+            raise TransientModelError('fake rate limit', retry_after=self.latency)
+        if self._random.random() < self.invalid_rate:
+            return 'I could not find enough information about this philosopher.'
+        target = json.loads(prompt.rsplit(TARGET_HEADER, 1)[1])
+        return json.dumps(fake_record(target))
+
+
+def fake_record(target):
+    """A complete synthetic record keeping every field the target already has"""
+    rng = random.Random(hashlib.blake2b(json.dumps(target, sort_keys=True).encode('utf-8')).digest())
+    name = target.get('name') or f"Philosopher {rng.randrange(10 ** 6)}"
+    era = target.get('era') or rng.choice(ERA_ORDER)
+    birth = target.get('birthYear')
+    if not isinstance(birth, int):
+        birth = rng.randrange(-600, 1950)
+    domains = rng.sample(DOMAINS, rng.randint(2, 4))
+    record = {
+        'id': target.get('id') or philosopher_id(name),
+        'name': name,
+        'birthYear': birth,
+        'deathYear': birth + rng.randint(30, 90),
+        'era': era,
+        'primaryDomain': domains[0],
+        'allDomains': domains,
+        'domainStrengths': {d: rng.randint(20, 100) for d in domains},
+        'spiralDynamicsStage': rng.choice(['Purple', 'Red', 'Blue', 'Orange', 'Green', 'Yellow']),
+        'comprehensiveBiography': f"{name} wrote on {', '.join(domains).lower()}.",
+        'switchPoints': [{
+            'question': f"Is {domains[0].lower()} grounded in reason?",
+            'position': rng.choice(['Yes', 'No', 'Partly']),
+            'argument': f"{name} argued from first principles.",
+            'domainCascades': {domains[1]: 'Shapes the rest of the system.'}
+        }]
+    }
+    record.update(target)
+    return record
+
+
+def philosopher_id(name):
+    """Corpus id for a name, e.g. philosopher_rene_descartes"""
+    slug = re.sub(r'[^0-9a-z]+', '_', name.lower()).strip('_')
+    return f"philosopher_{slug}"
+
+
+def build_prompt(template, target):
+    """Prompt asking for one complete record for a target (a partial record)"""
+    return (
+        f"{template.rstrip()}\n\n"
+        "## Task\n"
+        "Research only the philosopher below. Answer with a single JSON object in the "
+        "exact format above and nothing else.\n\n"
+        f"{TARGET_HEADER}\n"
+        f"{json.dumps(target, ensure_ascii=False, indent=2)}"
+    )
+
+
+def parse_response(text):
+    """Decode a model answer into a record; raises ValueError when it is unusable"""
+    text = _FENCE_RE.sub('', text.strip())
+    try:
+        record = json.loads(text)
+    except json.JSONDecodeError:
+        raise ValueError('response is not JSON') from None
+    if isinstance(record, list) and len(record) == 1:
+        record = record[0]
+    reason = validate(record)
+    if reason is not None:
+        raise ValueError(reason)
+    return normalize(record)
+
+
+class ResponseCache:
+    """Model answers on disk, one file per prompt keyed by its SHA-256.
+
+    Files are written to a temporary name and renamed into place, so
+    concurrent runs can share a directory. Only answers that produced a
+    valid record are stored.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        self.directory = Path(directory)
+
+    @staticmethod
+    def key(model_name, prompt):
+        return hashlib.sha256(f"{model_name}\0{prompt}".encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key):
+        try:
+            return json.loads(self._path(key).read_text(encoding='utf-8'))['response']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, key, response):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staging = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        staging.write_text(json.dumps({'response': response}, ensure_ascii=False), encoding='utf-8')
+        os.replace(staging, path)
+
+
+class EnrichReport:
+    """Counts, retries, throughput and rejections of one enrichment run"""
+
+    def __init__(self, samples=20):
+        self.samples = samples
+        self.requested = 0
+        self.written = 0
+        self.cached = 0
+        self.calls = 0
+        self.retries = 0
+        self.kept = 0
+        self.seconds = 0.0
+        self.rejected = Counter()
+        self.examples = []
+
+    def reject(self, reason, target):
+        self.rejected[reason] += 1
+        if len(self.examples) < self.samples:
+            self.examples.append({'reason': reason, 'id': target.get('id'), 'name': target.get('name')})
+
+    @property
+    def throughput(self):
+        """Records requested per second of wall time"""
+        return self.requested / self.seconds if self.seconds else 0.0
+
+    def to_dict(self):
+        return {
+            'requested': self.requested,
+            'written': self.written,
+            'cached': self.cached,
+            'calls': self.calls,
+            'retries': self.retries,
+            'kept': self.kept,
+            'seconds': self.seconds,
+            'records_per_second': self.throughput,
+            'rejected': dict(self.rejected),
+            'examples': self.examples
+        }
+
+    def summary(self):
+        """Human readable multi-line summary"""
+        lines = [
+            f"{self.written} of {self.requested} records written in {self.seconds:.1f}s "
+            f"({self.throughput:,.1f} records/s)",
+            f"  {self.calls} model calls, {self.retries} retries, {self.cached} answered from cache"
+        ]
+        if self.kept:
+            lines.append(f"  {self.kept} unchanged records kept from the existing corpus")
+        if self.rejected:
+            lines.append('  rejected: ' + ', '.join(
+                f"{reason} ({count})" for reason, count in self.rejected.most_common(5)))
+        return '\n'.join(lines)
+
+
+async def call_with_retry(model, prompt, report, attempts=5, base_delay=1.0, max_delay=30.0, timeout=120.0):
+    """Model answer for a prompt, retrying transient failures with jittered backoff"""
+    for attempt in range(attempts):
+        report.calls += 1
+        try:
+            return await asyncio.wait_for(model.generate(prompt), timeout)
+        except (TransientModelError, asyncio.TimeoutError, ConnectionError) as e:
+            if attempt == attempts - 1:
+                raise
+            report.retries += 1
+            delay = min(max_delay, base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+            await asyncio.sleep(max(delay, getattr(e, 'retry_after', None) or 0))
+
+
+class _CorpusWriter:
+    """Appends records to a JSON array one compact line at a time.
+
+    Writes go to a staging file that replaces the target on close, so a
+    watching app only ever sees a complete corpus.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.staging = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        self._file = open(self.staging, 'w', encoding='utf-8')
+        self._file.write('[')
+        self.count = 0
+
+    def write(self, record):
+        self._file.write(',\n' if self.count else '\n')
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+        self._file.flush()
+        self.count += 1
+
+    def close(self):
+        self._file.write('\n]\n')
+        self._file.close()
+        os.replace(self.staging, self.path)
+
+    def abort(self):
+        self._file.close()
+        self.staging.unlink(missing_ok=True)
+
+
+async def enrich(targets, model, output, cache=None, template=None, concurrency=8, attempts=5,
+                 base_delay=1.0, max_delay=30.0, timeout=120.0, merge=None):
+    """Generate a complete record for every target and stream them into a corpus.
+
+    targets is an iterable of partial records (at least a name, or an
+    id); each becomes one prompt. concurrency workers call the model at
+    once, transient failures are retried with exponential backoff, and
+    answers are validated and normalized as in ingest.py before being
+    written to output as they arrive (in completion order). Valid answers
+    are cached by prompt hash, so a rerun only pays for what failed.
+
+    merge names an existing corpus whose records not regenerated are
+    appended afterwards; it may be output itself. Returns the EnrichReport.
+    """
+    template = Path(template or DEFAULT_TEMPLATE).read_text(encoding='utf-8')
+    report = EnrichReport()
+    started = time.perf_counter()
+    queue = asyncio.Queue(maxsize=2 * concurrency)
+    writer = _CorpusWriter(output)
+    written_ids = set()
+
+    async def produce():
+        for target in targets:
+            if isinstance(target, str):
+                target = {'name': target}
+            report.requested += 1
+            await queue.put(target)
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def work():
+        while (target := await queue.get()) is not None:
+            await enrich_one(target)
+
+    async def enrich_one(target):
+        prompt = build_prompt(template, target)
+        key = ResponseCache.key(model.name, prompt)
+        response = cache.get(key) if cache else None
+        from_cache = response is not None
+        if from_cache:
+            report.cached += 1
+        else:
+            try:
+                response = await call_with_retry(model, prompt, report, attempts, base_delay, max_delay, timeout)
+            except (TransientModelError, asyncio.TimeoutError, ConnectionError) as e:
+                report.reject(f"gave up after {attempts} attempts ({type(e).__name__})", target)
+                return
+            except Exception as e:
+                report.reject(f"model error ({type(e).__name__})", target)
+                return
+        try:
+            record = parse_response(response)
+        except ValueError as e:
+            report.reject(str(e), target)
+            return
+        if cache and not from_cache:
+            cache.put(key, response)
+        if record['id'] in written_ids:
+            report.reject('duplicate id', target)
+            return
+        written_ids.add(record['id'])
+        writer.write(record)
+        report.written += 1
+
+    try:
+        # A failing task (say, a full disk) cancels the rest and is raised here
+        async with asyncio.TaskGroup() as group:
+            group.create_task(produce())
+            for _ in range(concurrency):
+                group.create_task(work())
+
+        if merge is not None and Path(merge).exists():
+            for record in CorpusReader(merge):
+                if record.get('id') not in written_ids:
+                    writer.write(record)
+                    report.kept += 1
+        writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def read_targets(path):
+    """Targets from a text file (one name per line) or a JSON corpus of records or names"""
+    path = Path(path)
+    if path.suffix == '.txt':
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield {'name': line.strip()}
+        return
+    for item in CorpusReader(path):
+        yield item
+
+
+def main(argv=None):
+    """Generate or regenerate philosopher records with a model:
+
+        python enrich.py names.txt data/philosophers.json --merge --concurrency 16
+        python enrich.py data/philosophers.json /tmp/out.json --model fake
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate philosopher records with a language model")
+    parser.add_argument('targets', help="names (.txt, one per line) or a JSON corpus of partial records")
+    parser.add_argument('output', help="corpus file to write (replaced when done)")
+    parser.add_argument('--model', default=DEFAULT_MODEL, help="Gemini model name, or 'fake' to run offline")
+    parser.add_argument('--template', type=Path, default=DEFAULT_TEMPLATE, help="prompt describing the format")
+    parser.add_argument('--concurrency', type=int, default=8, help="model calls in flight")
+    parser.add_argument('--attempts', type=int, default=5, help="tries per record for transient failures")
+    parser.add_argument('--timeout', type=float, default=120.0, help="seconds per model call")
+    parser.add_argument('--cache', type=Path, default=DEFAULT_CACHE_DIR, help="response cache directory")
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--merge', action='store_true',
+                        help="keep records of the existing output that were not regenerated")
+    parser.add_argument('--report', help="also write the report as JSON here")
+    args = parser.parse_args(argv)
+
+    model = FakeModel() if args.model == 'fake' else GeminiModel(args.model)
+    report = asyncio.run(enrich(
+        read_targets(args.targets), model, args.output,
+        cache=None if args.no_cache else ResponseCache(args.cache),
+        template=args.template,
+        concurrency=args.concurrency,
+        attempts=args.attempts,
+        timeout=args.timeout,
+        merge=args.output if args.merge else None
+    ))
+    print(report.summary())
+    if args.report:
+        Path(args.report).write_text(json.dumps(report.to_dict(), indent=2), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+import threading
+
+import numpy as np
+
+
+class FacetIndex:
+    """Precomputed facet counts over domain × era × spiral stage.
+
+    Rows are grouped by their exact set of domains (a corpus has far fewer
+    distinct domain sets than philosophers), and ``cube[k, e, s]`` counts
+    the rows with domain set k, era e and stage s. ``domain_cube`` is the
+    same count per single domain. Any combination of domain, era and stage
+    filters resolves to sums over these small arrays, so facet counts cost
+    the same for a hundred philosophers as for a million.
+
+    Era and stage values missing from a record are counted in a trailing
+    slot that no filter option selects.
+    """
+
+    def __init__(self, store, max_cached=256):
+        frame = store.frame
+        self.size = len(store)
+        self.domains = list(store.domains)
+        self.eras = [str(e) for e in frame['era'].cat.categories]
+        self.stages = [str(s) for s in frame['spiralDynamicsStage'].cat.categories]
+        n_eras, n_stages = len(self.eras) + 1, len(self.stages) + 1
+
+        era = frame['era'].cat.codes.to_numpy().astype(np.int64)
+        stage = frame['spiralDynamicsStage'].cat.codes.to_numpy().astype(np.int64)
+        era[era < 0] = n_eras - 1
+        stage[stage < 0] = n_stages - 1
+
+        # Group rows by domain set through their packed membership bits
+        membership = store.domain_matrix()
+        packed = np.packbits(membership, axis=1)
+        if self.size and packed.shape[1]:
+            sets, self.domain_set = np.unique(packed, axis=0, return_inverse=True)
+            self.domain_set = self.domain_set.reshape(-1)
+        else:
+            sets = np.zeros((1, packed.shape[1]), dtype=np.uint8)
+            self.domain_set = np.zeros(self.size, dtype=np.int64)
+        self.set_domains = np.unpackbits(sets, axis=1, count=len(self.domains)).astype(bool)
+
+        # Flat cell of every row, kept so search results can be counted too
+        self.cell = (self.domain_set * n_eras + era) * n_stages + stage
+        self.cube = self._cube(self.cell)
+        self.domain_cube = np.tensordot(self.set_domains.T.astype(np.int64), self.cube, axes=1)
+        self.present_domains = [d for d, total in zip(self.domains, self.domain_cube.sum(axis=(1, 2))) if total]
+
+        self.max_cached = max_cached
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _cube(self, cells):
+        shape = (len(self.set_domains), len(self.eras) + 1, len(self.stages) + 1)
+        return np.bincount(cells, minlength=int(np.prod(shape))).reshape(shape)
+
+    @staticmethod
+    def _select(names, vocabulary):
+        """Boolean slot mask for a filter (empty means every slot)"""
+        if not names:
+            return np.ones(len(vocabulary) + 1, dtype=bool)
+        mask = np.zeros(len(vocabulary) + 1, dtype=bool)
+        lookup = {name: j for j, name in enumerate(vocabulary)}
+        mask[[lookup[name] for name in names if name in lookup]] = True
+        return mask
+
+    def counts(self, domains=(), eras=(), stages=(), domain_mode='any', rows=None):
+        """Facet counts for a filter combination.
+
+        Returns {'total': matches, 'domain': {...}, 'era': {...},
+        'stage': {...}}. Each option's count applies every other active
+        filter: era counts honour the domain and stage filters, and so on.
+        Domain counts are the matches for that domain alone in 'any' mode,
+        and the matches with that domain added to the selection in 'all'
+        mode. rows restricts the counts to a subset, such as the matches
+        of a search; results without rows are cached.
+        """
+        key = None
+        if rows is None:
+            key = (tuple(domains or ()), tuple(eras or ()), tuple(stages or ()), domain_mode)
+            cached = self._cache.get(key)
+            if cached is not None:
+                return cached
+            cube = self.cube
+        else:
+            cube = self._cube(self.cell[rows])
+
+        era_mask = self._select(eras, self.eras)
+        stage_mask = self._select(stages, self.stages)
+        if domains:
+            codes = [self.domains.index(d) for d in domains if d in self.domains]
+            member = self.set_domains[:, codes]
+            if domain_mode == 'all':
+                sets = member.all(axis=1) if len(codes) == len(domains) else np.zeros(len(member), dtype=bool)
+            else:
+                sets = member.any(axis=1)
+        else:
+            sets = np.ones(len(self.set_domains), dtype=bool)
+
+        # Matches per domain set under the era and stage filters
+        per_set = cube[:, era_mask][:, :, stage_mask].sum(axis=(1, 2))
+        weights = per_set * sets if domains and domain_mode == 'all' else per_set
+        domain_counts = self.set_domains.T.astype(np.int64) @ weights
+        matching = cube[sets]
+        era_counts = matching[:, :, stage_mask].sum(axis=(0, 2))
+        stage_counts = matching[:, era_mask].sum(axis=(0, 1))
+
+        present = set(self.present_domains)
+        result = {
+            'total': int(per_set[sets].sum()),
+            'domain': {d: int(c) for d, c in zip(self.domains, domain_counts) if d in present},
+            'era': {e: int(c) for e, c in zip(self.eras, era_counts)},
+            'stage': {s: int(c) for s, c in zip(self.stages, stage_counts)}
+        }
+        if key is not None:
+            with self._lock:
+                if len(self._cache) >= self.max_cached:
+                    self._cache.clear()
+                self._cache[key] = result
+        return result
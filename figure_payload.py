@@ -0,0 +1,90 @@
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import plotly.graph_objects as go
+
+from instrumentation import METRICS, SIZE_BUCKETS
+
+
+def rows_digest(rows):
+    """Short digest of a row selection, for cache keys"""
+    rows = np.ascontiguousarray(rows, dtype=np.int64)
+    return hashlib.blake2b(rows.tobytes(), digest_size=12).hexdigest()
+
+
+def figure_json(fig):
+    """Plotly JSON of a figure; numeric numpy arrays go out as base64 typed arrays"""
+    return fig.to_json(validate=False)
+
+
+def figure_from_json(payload):
+    """Figure from its plotly JSON without re-running plotly's validators.
+
+    The payload was produced from a validated figure, and typed arrays
+    stay base64 encoded all the way to the browser.
+    """
+    return go.Figure(json.loads(payload), _validate=False)
+
+
+class PayloadCache:
+    """Rendered figures kept as gzip-compressed plotly JSON, keyed by render state.
+
+    Shared by every session of a process: a rerun whose filter state was
+    rendered before (by any session) rebuilds the figure from the stored
+    JSON instead of running create_3d_orb again. Only figure construction
+    and server memory are saved; Streamlit still serializes the figure it
+    is given, so the browser receives the same bytes as on a miss. Entries
+    are evicted least recently used first once the compressed total
+    exceeds max_bytes.
+    """
+
+    def __init__(self, max_bytes=64 << 20, level=6):
+        self.max_bytes = max_bytes
+        self.level = level
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Stored figure for key, or None"""
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is None:
+                self.misses += 1
+                METRICS.count('payload_cache.misses')
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        METRICS.count('payload_cache.hits')
+        return figure_from_json(gzip.decompress(compressed))
+
+    def put(self, key, fig):
+        """Encode, compress and store a figure; returns (json bytes, gzip bytes)"""
+        payload = figure_json(fig).encode()
+        compressed = gzip.compress(payload, self.level)
+        METRICS.observe('payload_cache.json_bytes', len(payload), SIZE_BUCKETS)
+        METRICS.observe('payload_cache.gzip_bytes', len(compressed), SIZE_BUCKETS)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old)
+            self._entries[key] = compressed
+            self.bytes += len(compressed)
+            while self.bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= len(evicted)
+        return len(payload), len(compressed)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
@@ -0,0 +1,556 @@
+import re
+import string
+import threading
+from array import array
+
+import numpy as np
+
+# Fact kinds collected from the records
+IMPLIES, CONFLICTS, RESOLVES, HOLDS, ANSWERS = range(5)
+
+# Cascade and chain keys naming claims that follow from, clash with or are
+# reconciled with a position
+IMPLIES_KEYS = ('thenMustAccept', 'leadsTo')
+CONFLICT_KEYS = ('potentialConflicts', 'conflictsCreated')
+RESOLVES_KEYS = ('conflictsResolved',)
+_CONSEQUENCE_KEYS = tuple(
+    (key, kind) for keys, kind in ((IMPLIES_KEYS, IMPLIES), (CONFLICT_KEYS, CONFLICTS), (RESOLVES_KEYS, RESOLVES))
+    for key in keys
+)
+
+_PARENTHETICAL_RE = re.compile(r'\([^)]*\)')
+_WORD_RE = re.compile(r'\w+')
+# Byte table lowercasing ASCII word characters and turning every other
+# byte into a space: for ASCII text, splitting the translated bytes finds
+# the same words as _WORD_RE at a fraction of the cost
+_WORD_CHARS = frozenset((string.ascii_letters + string.digits + '_').encode())
+_ASCII_WORDS = bytes(ord(chr(c).lower()) if c in _WORD_CHARS else 32 for c in range(256))
+
+
+def claim_key(text, question=None):
+    """Normalized form of a claim used to match it across records.
+
+    Case, punctuation and parenthetical qualifications are ignored, so
+    "Determinism (if understood as...)." and "determinism" are one claim.
+    A switch point position only means something as the answer to its
+    question, so positions are keyed by question too: "Unity" as the
+    nature of reality and "Unity" of mind and body are different claims.
+    """
+    key = _normalize(text)
+    if key and question is not None:
+        scope = _normalize(question)
+        if scope:
+            key = f'{scope} => {key}'
+    return key
+
+
+def _normalize(text):
+    text = str(text)
+    if '(' in text:
+        text = _PARENTHETICAL_RE.sub(' ', text)
+    if text.isascii():
+        return b' '.join(text.encode('ascii').translate(_ASCII_WORDS).split()).decode('ascii')
+    return ' '.join(_WORD_RE.findall(text.lower()))
+
+
+def _claims(value):
+    """Claim strings of a field holding one string or a list of them"""
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        return (value,)
+    if isinstance(value, list):
+        return [item for item in value if isinstance(item, str)]
+    return ()
+
+
+def _expand(indptr, indices, keys):
+    """Concatenated CSR slices of keys as (position in keys, value)"""
+    keys = np.asarray(keys, dtype=np.int64)
+    starts = indptr[keys]
+    lengths = indptr[keys + 1] - starts
+    owner = np.repeat(np.arange(len(keys)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return owner, indices[np.repeat(starts, lengths) + offsets]
+
+
+def _csr(keys, values, size):
+    """CSR arrays of values grouped by key, values sorted within a key"""
+    order = np.lexsort((values, keys))
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=size), out=indptr[1:])
+    return indptr, np.asarray(values, dtype=np.int32)[order]
+
+
+def _unique_pairs(a, b):
+    """Distinct (a, b) pairs, sorted by a then b"""
+    a = np.asarray(a, dtype=np.int64)
+    b = np.asarray(b, dtype=np.int64)
+    order = np.lexsort((b, a))
+    a, b = a[order], b[order]
+    distinct = np.ones(len(a), dtype=bool)
+    distinct[1:] = (a[1:] != a[:-1]) | (b[1:] != b[:-1])
+    return a[distinct], b[distinct]
+
+
+class ImplicationBuilder:
+    """Collects each record's positions and the claims they imply or
+    conflict with, while records stream past.
+
+    Every distinct claim (by claim_key) becomes a concept id, labelled with
+    its first spelling. Facts are kept as flat arrays: (row, kind, a, b) where kind is one of IMPLIES
+    (a implies b), CONFLICTS, RESOLVES (a reconciles b), HOLDS (the row
+    holds a) or ANSWERS (the row answers question a with position b).
+
+    Nothing is kept as one Python object per claim or fact: facts go into
+    a machine-int array, labels into one UTF-8 buffer with offsets (and
+    the question scoping each position), and concepts are found by the
+    hash of their key rather than the key itself, which can always be
+    derived again from a label and its scope.
+    """
+
+    def __init__(self, label_blob=b'', label_offsets=(0,), label_scopes=(), concepts=None):
+        self._label_blob = bytearray(label_blob)
+        self._label_offsets = array('q', np.asarray(label_offsets, dtype=np.int64).tobytes())
+        self._label_scopes = array('i', np.asarray(label_scopes, dtype=np.int32).tobytes())
+        # hash(claim_key) -> concept id; two claims are only merged by a
+        # 64-bit collision, as unlikely as one between record digests
+        self.concepts = {} if concepts is None else dict(concepts)
+        # Questions repeat across records: their concept id and key prefix
+        self._questions = {}
+        # Flat (row, kind, a, b) ints
+        self._facts = array('i')
+        self._next_row = 0
+
+    def concept(self, text, question=None):
+        """Concept id of a claim, or None for an empty one"""
+        key = claim_key(text, question)
+        if not key:
+            return None
+        scope = self.concept(question) if question is not None and _normalize(question) else -1
+        return self._concept(hash(key), text, scope)
+
+    def _concept(self, key_hash, text, scope=-1):
+        concept = self.concepts.get(key_hash)
+        if concept is None:
+            concept = self.concepts[key_hash] = len(self._label_scopes)
+            self._label_blob += str(text).strip().rstrip('.').encode('utf-8')
+            self._label_offsets.append(len(self._label_blob))
+            self._label_scopes.append(scope)
+        return concept
+
+    def _claim(self, text):
+        """concept() of an unscoped claim string, inlined for the hot path"""
+        key = _normalize(text)
+        if not key:
+            return None
+        key = hash(key)
+        concept = self.concepts.get(key)
+        if concept is None:
+            concept = self.concepts[key] = len(self._label_scopes)
+            self._label_blob += text.strip().rstrip('.').encode('utf-8')
+            self._label_offsets.append(len(self._label_blob))
+            self._label_scopes.append(-1)
+        return concept
+
+    def label_arrays(self):
+        """(label_blob, label_offsets, label_scopes) arrays"""
+        return (np.frombuffer(bytes(self._label_blob), dtype=np.uint8),
+                np.frombuffer(self._label_offsets, dtype=np.int64).copy(),
+                np.frombuffer(self._label_scopes, dtype=np.int32).copy())
+
+    def _consequences(self, row, premise, source):
+        """Implication, conflict and resolution facts of a chain or cascade"""
+        claim, facts = self._claim, self._facts
+        for key, kind in _CONSEQUENCE_KEYS:
+            for text in _claims(source.get(key)):
+                concept = claim(text)
+                if concept is not None and concept != premise:
+                    facts.extend((row, kind, premise, concept))
+
+    def add(self, philosopher, row=None):
+        if row is None:
+            row = self._next_row
+        self._next_row = row + 1
+        facts = self._facts
+
+        for switch_point in philosopher.get('switchPoints') or []:
+            if not isinstance(switch_point, dict):
+                continue
+            question_text = switch_point.get('question') or ''
+            question = self._questions.get(question_text)
+            if question is None:
+                scope = _normalize(question_text)
+                question = self._questions[question_text] = (
+                    self._concept(hash(scope), question_text) if scope else None, f'{scope} => ' if scope else '')
+            position_text = switch_point.get('position') or ''
+            position = _normalize(position_text)
+            if not position:
+                continue
+            position = self._concept(hash(question[1] + position), position_text,
+                                     -1 if question[0] is None else question[0])
+            if question[0] is None:
+                facts.extend((row, HOLDS, position, -1))
+            else:
+                facts.extend((row, HOLDS, position, -1, row, ANSWERS, question[0], position))
+            cascades = switch_point.get('domainCascades')
+            for cascade in (cascades.values() if isinstance(cascades, dict) else ()):
+                if isinstance(cascade, dict):
+                    self._consequences(row, position, cascade)
+                else:
+                    # Plain cascades describe what the position leads to in a domain
+                    for text in _claims(cascade):
+                        concept = self._claim(text)
+                        if concept is not None and concept != position:
+                            facts.extend((row, IMPLIES, position, concept))
+
+        for chain in philosopher.get('implicationChains') or []:
+            if not isinstance(chain, dict):
+                continue
+            premise = chain.get('ifAccept')
+            premise = self.concept(premise) if premise else None
+            if premise is None:
+                continue
+            facts.extend((row, HOLDS, premise, -1))
+            self._consequences(row, premise, chain)
+
+    def facts(self):
+        """(rows, kinds, a, b) arrays"""
+        facts = np.frombuffer(self._facts, dtype=np.int32).reshape(-1, 4)
+        return facts[:, 0].copy(), facts[:, 1].astype(np.int8), facts[:, 2].copy(), facts[:, 3].copy()
+
+
+def _closure_pairs(indptr, indices, size):
+    """(concept, reachable concept) pairs of the transitive closure.
+
+    Each concept reaches itself and its direct consequences. Only concepts
+    with a path of two or more steps need more: they are found as the
+    strongly connected components (iterative Tarjan) of the edges between
+    concepts that have consequences of their own, and each component's
+    reach is built from its successors', which Tarjan emits first.
+    """
+    src = np.repeat(np.arange(size), np.diff(indptr))
+    direct_a = np.concatenate([np.arange(size), src])
+    direct_b = np.concatenate([np.arange(size), indices])
+
+    has_out = np.diff(indptr) > 0
+    internal = has_out[indices] & (src != indices)
+    if not internal.any():
+        return _unique_pairs(direct_a, direct_b)
+
+    # Subgraph of edges between concepts with consequences
+    nodes = np.unique(np.concatenate([src[internal], indices[internal]]))
+    local = np.full(size, -1, dtype=np.int64)
+    local[nodes] = np.arange(len(nodes))
+    sub_indptr, sub_indices = _csr(local[src[internal]], local[indices[internal]], len(nodes))
+
+    index = np.full(len(nodes), -1, dtype=np.int64)
+    low = np.zeros(len(nodes), dtype=np.int64)
+    on_stack = np.zeros(len(nodes), dtype=bool)
+    component = np.full(len(nodes), -1, dtype=np.int64)
+    stack, reach, counter = [], [], 0
+    for root in range(len(nodes)):
+        if index[root] >= 0:
+            continue
+        work = [(root, sub_indptr[root])]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        while work:
+            node, edge = work[-1]
+            if edge < sub_indptr[node + 1]:
+                work[-1] = (node, edge + 1)
+                child = sub_indices[edge]
+                if index[child] < 0:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack[child] = True
+                    work.append((child, sub_indptr[child]))
+                elif on_stack[child]:
+                    low[node] = min(low[node], index[child])
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                members = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component[member] = len(reach)
+                    members.append(member)
+                    if member == node:
+                        break
+                members = np.asarray(members)
+                concepts = nodes[members]
+                _, direct = _expand(indptr, indices, concepts)
+                _, children = _expand(sub_indptr, sub_indices, members)
+                successors = np.unique(component[children])
+                successors = successors[(successors >= 0) & (successors != len(reach))]
+                reach.append(np.unique(np.concatenate(
+                    [concepts, direct] + [reach[c] for c in successors])))
+
+    deep_a = np.concatenate([np.full(len(reach[component[i]]), nodes[i]) for i in range(len(nodes))])
+    deep_b = np.concatenate([reach[component[i]] for i in range(len(nodes))])
+    shallow = local[direct_a] < 0
+    return _unique_pairs(np.concatenate([direct_a[shallow], deep_a]),
+                         np.concatenate([direct_b[shallow], deep_b]))
+
+
+class ImplicationGraph:
+    """Implication and conflict reasoning over switch points and chains.
+
+    Built once per dataset from ImplicationBuilder facts:
+
+    - ``closure``: CSR of every concept's transitive consequences
+      (reachability index, the concept itself included).
+    - ``entailed``: CSR of every row's commitments, i.e. the closure of
+      the positions it holds.
+    - ``holders``: the inverse, concept -> rows committed to it.
+    - ``conflicts``: symmetric CSR of declared conflicts, minus pairs some
+      record declares resolved.
+
+    Conflict counts of one row against every other row are one gather
+    through conflicts and holders plus a bincount; pair lookups and
+    comparisons are cached until the dataset changes. Concept labels stay
+    packed in ``label_blob``/``label_offsets`` (memory-mapped for a cached
+    graph) until a claim is printed, and the key lookup is rebuilt from
+    them and ``label_scopes`` on the first lookup.
+    """
+
+    ARRAYS = ('label_blob', 'label_offsets', 'label_scopes',
+              'fact_rows', 'fact_kinds', 'fact_a', 'fact_b', 'closure_indptr', 'closure_indices',
+              'conflict_indptr', 'conflict_indices', 'entailed_indptr', 'entailed_indices',
+              'holders_indptr', 'holders_rows', 'answer_indptr', 'answer_questions', 'answer_positions')
+
+    def __init__(self, labels, n_rows, facts, concepts=None, max_cached=256):
+        self.label_blob, self.label_offsets, self.label_scopes = labels
+        self.size = len(self.label_scopes)
+        self.n_rows = n_rows
+        self.fact_rows, self.fact_kinds, self.fact_a, self.fact_b = facts
+        self.max_cached = max_cached
+        self._labels = None
+        self._concepts = concepts
+        self._cross_links = None
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._build()
+
+    @classmethod
+    def from_builder(cls, builder, n_rows):
+        return cls(builder.label_arrays(), n_rows, builder.facts(), builder.concepts)
+
+    @classmethod
+    def from_arrays(cls, n_rows, arrays):
+        """Graph from the arrays of a cached entry, without rebuilding"""
+        graph = cls.__new__(cls)
+        graph.n_rows = n_rows
+        for name in cls.ARRAYS:
+            setattr(graph, name, arrays[name])
+        graph.size = len(graph.label_scopes)
+        graph.max_cached = 256
+        graph._labels = None
+        graph._concepts = None
+        graph._cross_links = None
+        graph._cache = {}
+        graph._lock = threading.Lock()
+        return graph
+
+    def arrays(self):
+        return {name: getattr(self, name) for name in self.ARRAYS}
+
+    @property
+    def labels(self):
+        """Label of every concept, decoded on first use"""
+        with self._lock:
+            if self._labels is None:
+                blob, offsets = bytes(self.label_blob), self.label_offsets.tolist()
+                self._labels = [blob[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])]
+            return self._labels
+
+    def _lookup(self):
+        """hash(claim_key) -> concept id, derived again from the labels for
+        a graph read from the cache"""
+        if self._concepts is None:
+            labels = self.labels
+            concepts = {}
+            for concept, (label, scope) in enumerate(zip(labels, self.label_scopes.tolist())):
+                key = _normalize(label)
+                if scope >= 0:
+                    key = f'{_normalize(labels[scope])} => {key}'
+                concepts[hash(key)] = concept
+            self._concepts = concepts
+        return self._concepts
+
+    def _build(self):
+        rows, kinds, a, b = self.fact_rows, self.fact_kinds, self.fact_a, self.fact_b
+        size = self.size
+
+        implies = kinds == IMPLIES
+        src, dst = _unique_pairs(a[implies], b[implies])
+        implies_indptr, implies_indices = _csr(src, dst, size)
+        closure_a, closure_b = _closure_pairs(implies_indptr, implies_indices, size)
+        self.closure_indptr, self.closure_indices = _csr(closure_a, closure_b, size)
+
+        conflict, resolved = kinds == CONFLICTS, kinds == RESOLVES
+        pairs = np.concatenate([a[conflict], b[conflict]]), np.concatenate([b[conflict], a[conflict]])
+        codes = np.unique(pairs[0].astype(np.int64) * size + pairs[1])
+        settled = np.concatenate([a[resolved].astype(np.int64) * size + b[resolved],
+                                  b[resolved].astype(np.int64) * size + a[resolved]])
+        codes = codes[~np.isin(codes, settled)]
+        self.conflict_indptr, self.conflict_indices = _csr(codes // size, codes % size, size)
+
+        holds = kinds == HOLDS
+        owner, reached = _expand(self.closure_indptr, self.closure_indices, a[holds])
+        entailed_rows, entailed = _unique_pairs(rows[holds][owner], reached)
+        self.entailed_indptr, self.entailed_indices = _csr(entailed_rows, entailed, self.n_rows)
+        self.holders_indptr, self.holders_rows = _csr(entailed, entailed_rows, size)
+
+        answers = kinds == ANSWERS
+        # (question, position) pairs per row, sorted by row then question
+        answer_rows, answer_codes = _unique_pairs(rows[answers], a[answers].astype(np.int64) * size + b[answers])
+        self.answer_indptr = np.zeros(self.n_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(answer_rows, minlength=self.n_rows), out=self.answer_indptr[1:])
+        self.answer_questions = (answer_codes // size).astype(np.int32)
+        self.answer_positions = (answer_codes % size).astype(np.int32)
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def cross_links(self):
+        """Whether any two rows share a commitment, answer the same
+        question or hold conflicting commitments.
+
+        Claims only match across records when their normalized text
+        matches, so a corpus can have none; tension_counts, common_counts
+        and compare then find nothing for any row.
+        """
+        if self._cross_links is None:
+            holders = np.diff(self.holders_indptr)
+            answer_rows = np.repeat(np.arange(self.n_rows), np.diff(self.answer_indptr))
+            _, questions = _unique_pairs(answer_rows, self.answer_questions)
+            linked = bool((holders >= 2).any()) or len(np.unique(questions)) < len(questions)
+            if not linked:
+                # Every concept now has at most one holder; a conflict links
+                # two rows when its concepts are held by different ones
+                holder = np.full(self.size, -1, dtype=np.int64)
+                held = holders > 0
+                holder[held] = self.holders_rows[self.holders_indptr[:-1][held]]
+                sources = np.repeat(np.arange(self.size), np.diff(self.conflict_indptr))
+                a, b = holder[sources], holder[self.conflict_indices]
+                linked = bool(((a >= 0) & (b >= 0) & (a != b)).any())
+            self._cross_links = linked
+        return self._cross_links
+
+    def concept(self, text, question=None):
+        """Concept id of a claim (a position when question is given), or
+        None when no record mentions it"""
+        key = claim_key(text, question)
+        return self._lookup().get(hash(key)) if key else None
+
+    def implied(self, concept):
+        """Concepts reachable from a concept, itself excluded"""
+        reach = self.closure_indices[self.closure_indptr[concept]:self.closure_indptr[concept + 1]]
+        return reach[reach != concept]
+
+    def commitments(self, row):
+        """Sorted concepts a row is committed to"""
+        return self.entailed_indices[self.entailed_indptr[row]:self.entailed_indptr[row + 1]]
+
+    def answers(self, row):
+        """(questions, positions) a row answers"""
+        start, end = self.answer_indptr[row], self.answer_indptr[row + 1]
+        return self.answer_questions[start:end], self.answer_positions[start:end]
+
+    def _cached(self, key, compute):
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        result = compute()
+        with self._lock:
+            if len(self._cache) >= self.max_cached:
+                self._cache.clear()
+            self._cache[key] = result
+        return result
+
+    def tension_counts(self, row):
+        """Conflicting commitment pairs between a row and every row"""
+        def compute():
+            _, partners = _expand(self.conflict_indptr, self.conflict_indices, self.commitments(row))
+            _, holders = _expand(self.holders_indptr, self.holders_rows, partners)
+            counts = np.bincount(holders, minlength=self.n_rows).astype(np.int32)
+            counts[row] = 0
+            counts.flags.writeable = False
+            return counts
+        return self._cached(('tension', int(row)), compute)
+
+    def common_counts(self, row):
+        """Shared commitments between a row and every row"""
+        def compute():
+            _, holders = _expand(self.holders_indptr, self.holders_rows, self.commitments(row))
+            counts = np.bincount(holders, minlength=self.n_rows).astype(np.int32)
+            counts[row] = 0
+            counts.flags.writeable = False
+            return counts
+        return self._cached(('common', int(row)), compute)
+
+    def conflict_counts(self, rows_a, rows_b):
+        """Conflict counts of many (a, b) row pairs at once"""
+        rows_a = np.asarray(rows_a, dtype=np.int64)
+        rows_b = np.asarray(rows_b, dtype=np.int64)
+        counts = np.zeros(len(rows_a), dtype=np.int32)
+        for row in np.unique(rows_a):
+            selected = rows_a == row
+            counts[selected] = self.tension_counts(row)[rows_b[selected]]
+        return counts
+
+    def compare(self, row_a, row_b):
+        """Positions in common and in tension between two rows.
+
+        Returns a dict of concept id arrays: ``common`` commitments,
+        ``tension`` as (n, 2) pairs (a's commitment, b's commitment), and
+        ``different_answers`` as (n, 3) rows of (question, a's position,
+        b's position) for switch point questions they answer differently.
+        """
+        def compute():
+            mine, theirs = self.commitments(row_a), self.commitments(row_b)
+            owner, partners = _expand(self.conflict_indptr, self.conflict_indices, mine)
+            clash = np.isin(partners, theirs)
+            questions_a, positions_a = self.answers(row_a)
+            questions_b, positions_b = self.answers(row_b)
+            shared, in_a, in_b = np.intersect1d(questions_a, questions_b, return_indices=True)
+            differ = positions_a[in_a] != positions_b[in_b]
+            return {
+                'common': np.intersect1d(mine, theirs),
+                'tension': np.column_stack([mine[owner[clash]], partners[clash]]),
+                'different_answers': np.column_stack(
+                    [shared[differ], positions_a[in_a][differ], positions_b[in_b][differ]])
+            }
+        return self._cached(('compare', int(row_a), int(row_b)), compute)
+
+    def rebased(self, store, remap, rows, records):
+        """Graph for a store returned by PhilosopherStore.with_changes.
+
+        Facts of unchanged rows are carried over (renumbered through
+        remap), the changed records are extracted again at their new rows
+        and the indexes are rebuilt.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        new_rows = remap[self.fact_rows]
+        keep = (new_rows >= 0) & ~np.isin(new_rows, rows)
+        builder = ImplicationBuilder(self.label_blob, self.label_offsets, self.label_scopes, self._lookup())
+        for row, philosopher in zip(rows, records):
+            builder.add(philosopher, int(row))
+        added = builder.facts()
+        facts = (
+            np.concatenate([new_rows[keep].astype(np.int32), added[0]]),
+            np.concatenate([self.fact_kinds[keep], added[1]]),
+            np.concatenate([self.fact_a[keep], added[2]]),
+            np.concatenate([self.fact_b[keep], added[3]])
+        )
+        return ImplicationGraph(builder.label_arrays(), len(store), facts, builder.concepts, self.max_cached)
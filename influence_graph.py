@@ -0,0 +1,387 @@
+import re
+import numpy as np
+
+EDGE_KINDS = ('influence', 'critique')
+INFLUENCE, CRITIQUE = 0, 1
+
+# Strength used when a record gives none (strengths are on a 0-100 scale)
+DEFAULT_STRENGTH = 50
+
+
+def slugify(name):
+    """Stable node key for a philosopher referenced only by name"""
+    return re.sub(r'[^a-z0-9]+', '_', str(name).lower()).strip('_')
+
+
+def _strength(entry):
+    value = entry.get('strengthOfInfluence', entry.get('strength', DEFAULT_STRENGTH))
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return DEFAULT_STRENGTH
+    return float(value)
+
+
+def _reference(entry, key='philosopherId'):
+    """(id, name) a relation entry points at; either may be None"""
+    if isinstance(entry, str):
+        return None, entry
+    if not isinstance(entry, dict):
+        return None, None
+    ref_id = entry.get(key) or entry.get('philosopherId')
+    name = entry.get('name') or entry.get('critic')
+    return (ref_id if isinstance(ref_id, str) else None), (name if isinstance(name, str) else None)
+
+
+def relations(philosopher):
+    """Influence and critique references of a raw record.
+
+    Returns (source_ref, target_ref, strength, kind) tuples where refs are
+    (id, name) pairs and kind is INFLUENCE or CRITIQUE.
+    """
+    own = (philosopher.get('id'), philosopher.get('name'))
+    edges = []
+
+    influences = philosopher.get('influences')
+    if isinstance(influences, dict):
+        for entry in influences.get('influencedBy') or []:
+            edges.append((_reference(entry), own, _strength(entry), INFLUENCE))
+        for entry in influences.get('influenced') or []:
+            edges.append((own, _reference(entry), _strength(entry), INFLUENCE))
+
+    # Critiques this philosopher makes of others
+    for entry in philosopher.get('critiques') or []:
+        edges.append((own, _reference(entry, 'targetPhilosopherId'), _strength(entry), CRITIQUE))
+
+    # Critiques of this philosopher's key ideas
+    for idea in philosopher.get('keyIdeas') or []:
+        if isinstance(idea, dict):
+            for entry in idea.get('critiques') or []:
+                if isinstance(entry, dict) and entry.get('critic'):
+                    edges.append((_reference(entry), own, _strength(entry), CRITIQUE))
+    return edges
+
+
+class InfluenceGraphBuilder:
+    """Collects raw relation references while records stream past.
+
+    Feed every record to ``add`` during loading, then call ``build`` once
+    the PhilosopherStore exists to resolve references to node positions.
+    """
+
+    def __init__(self):
+        # (source_ref, target_ref, strength, kind); refs are (id, name) pairs
+        self._edges = []
+
+    def add(self, philosopher):
+        self._edges.extend(relations(philosopher))
+
+    def build(self, store):
+        """Resolve references against the store and return an InfluenceGraph"""
+        node_ids = list(store.frame['id'])
+        node_names = list(store.frame['name'])
+        src, dst, weight, kind = _resolve_edges(self._edges, dict(store.id_index), node_ids, node_names, len(store))
+        return InfluenceGraph(node_ids, node_names, len(store), src, dst, weight, kind)
+
+
+def _resolve_edges(raw_edges, by_id, node_ids, node_names, n_corpus):
+    """Resolve (source_ref, target_ref, strength, kind) references to edge arrays.
+
+    by_id maps known node ids to positions; node_ids and node_names list
+    the nodes, corpus rows first, and are extended with an external node for
+    every philosopher referenced but not found. References match corpus
+    rows by id, then by name. Repeated edges keep their strongest weight.
+    """
+    by_name = {}
+    for row, name in enumerate(node_names[:n_corpus]):
+        by_name.setdefault(str(name).lower(), row)
+
+    def resolve(ref):
+        ref_id, name = ref
+        if ref_id is not None and ref_id in by_id:
+            return by_id[ref_id]
+        if name is not None and name.lower() in by_name:
+            return by_name[name.lower()]
+        key = ref_id or (slugify(name) if name else None)
+        if not key:
+            return None
+        # Philosophers outside the corpus become external nodes
+        if key not in by_id:
+            by_id[key] = len(node_ids)
+            node_ids.append(key)
+            node_names.append(name or key)
+        return by_id[key]
+
+    edges = {}
+    for source_ref, target_ref, strength, kind in raw_edges:
+        source, target = resolve(source_ref), resolve(target_ref)
+        if source is None or target is None or source == target:
+            continue
+        key = (source, target, kind)
+        edges[key] = max(edges.get(key, 0.0), strength)
+
+    if edges:
+        keys = np.array(list(edges), dtype=np.int64)
+        return keys[:, 0], keys[:, 1], np.array(list(edges.values()), dtype=np.float32) / 100, keys[:, 2]
+    empty = np.array([], dtype=np.int64)
+    return empty, empty, np.array([], dtype=np.float32), empty
+
+
+def _csr(rows, cols, n, *payload):
+    """Sort edges by row and return (indptr, cols, *payload)"""
+    order = np.argsort(rows, kind='stable')
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    return (indptr, cols[order].astype(np.int32)) + tuple(p[order] for p in payload)
+
+
+def _gather(indptr, indices, frontier):
+    """All CSR neighbours of the frontier rows, in one vectorized step"""
+    starts, ends = indptr[frontier], indptr[frontier + 1]
+    counts = ends - starts
+    if counts.sum() == 0:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    owners = np.repeat(frontier, counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owners, indices[np.repeat(starts, counts) + offsets]
+
+
+class InfluenceGraph:
+    """Directed influence/critique graph over the corpus in CSR form.
+
+    Nodes 0..n_corpus-1 are the store's rows; philosophers referenced but
+    missing from the corpus follow as external nodes. Edges point from the
+    influencer (or critic) to the influenced (or criticised) philosopher,
+    weighted by strengthOfInfluence / 100. Degree centrality and PageRank
+    are computed once when the graph is built.
+    """
+
+    def __init__(self, node_ids, node_names, n_corpus, src, dst, weight, kind, pagerank=None,
+                 initial_rank=None):
+        self.node_ids = node_ids
+        self.node_names = node_names
+        self.n_corpus = n_corpus
+        self.node_index = {node_id: i for i, node_id in enumerate(node_ids)}
+        n = len(node_ids)
+
+        self.src = np.asarray(src, dtype=np.int32)
+        self.dst = np.asarray(dst, dtype=np.int32)
+        self.weight = np.asarray(weight, dtype=np.float32)
+        self.kind = np.asarray(kind, dtype=np.int8)
+
+        self.out_indptr, self.out_indices, self.out_weight, self.out_kind = _csr(
+            self.src, self.dst, n, self.weight, self.kind)
+        self.in_indptr, self.in_indices, self.in_weight, self.in_kind = _csr(
+            self.dst, self.src, n, self.weight, self.kind)
+
+        self.in_degree = np.bincount(self.dst, weights=self.weight, minlength=n).astype(np.float32)
+        self.out_degree = np.bincount(self.src, weights=self.weight, minlength=n).astype(np.float32)
+        # A precomputed PageRank (e.g. from the processed-data cache) is reused
+        self.pagerank = (self._pagerank(initial=initial_rank) if pagerank is None
+                         else np.asarray(pagerank, dtype=np.float32))
+        self._adjacency_cache = {}
+
+    @property
+    def node_count(self):
+        return len(self.node_ids)
+
+    @property
+    def edge_count(self):
+        return len(self.src)
+
+    def _pagerank(self, damping=0.85, tol=1e-8, max_iter=100, initial=None):
+        """Weighted PageRank over influence edges by power iteration.
+
+        initial optionally warm-starts the iteration, e.g. from the ranks
+        before an incremental change.
+        """
+        n = self.node_count
+        if n == 0:
+            return np.array([], dtype=np.float32)
+        influence = self.kind == INFLUENCE
+        src, dst, weight = self.src[influence], self.dst[influence], self.weight[influence].astype(np.float64)
+        out_weight = np.bincount(src, weights=weight, minlength=n)
+        share = weight / np.where(out_weight[src] > 0, out_weight[src], 1)
+        dangling = out_weight == 0
+
+        rank = np.full(n, 1.0 / n) if initial is None else np.asarray(initial, dtype=np.float64) / np.sum(initial)
+        for _ in range(max_iter):
+            spread = np.bincount(dst, weights=rank[src] * share, minlength=n)
+            updated = (1 - damping) / n + damping * (spread + rank[dangling].sum() / n)
+            converged = np.abs(updated - rank).sum() < tol
+            rank = updated
+            if converged:
+                break
+        return rank.astype(np.float32)
+
+    def _kind_codes(self, kinds):
+        return [EDGE_KINDS.index(k) for k in kinds]
+
+    def neighbors(self, node, direction='out', kinds=EDGE_KINDS):
+        """Direct neighbours of a node as (nodes, weights, kinds) arrays"""
+        indptr, indices, weights, edge_kinds = (
+            (self.out_indptr, self.out_indices, self.out_weight, self.out_kind) if direction == 'out'
+            else (self.in_indptr, self.in_indices, self.in_weight, self.in_kind)
+        )
+        span = slice(indptr[node], indptr[node + 1])
+        keep = np.isin(edge_kinds[span], self._kind_codes(kinds))
+        return indices[span][keep], weights[span][keep], edge_kinds[span][keep]
+
+    def k_hop(self, node, k=2, direction='both', kinds=EDGE_KINDS):
+        """Nodes within k hops of node, with their hop distance.
+
+        Returns (nodes, distances) sorted by distance; the start node is
+        included at distance 0.
+        """
+        adjacency = self._adjacency(direction, kinds)
+        distance = np.full(self.node_count, -1, dtype=np.int32)
+        distance[node] = 0
+        frontier = np.array([node], dtype=np.int64)
+        for hop in range(1, k + 1):
+            reached = np.concatenate([_gather(indptr, indices, frontier)[1] for indptr, indices in adjacency])
+            reached = np.unique(reached)
+            frontier = reached[distance[reached] < 0]
+            if len(frontier) == 0:
+                break
+            distance[frontier] = hop
+        nodes = np.flatnonzero(distance >= 0)
+        order = np.argsort(distance[nodes], kind='stable')
+        return nodes[order], distance[nodes][order]
+
+    def shortest_path(self, source, target, direction='out', kinds=('influence',)):
+        """Fewest-hop path from source to target as a list of nodes, or None"""
+        adjacency = self._adjacency(direction, kinds)
+        parent = np.full(self.node_count, -1, dtype=np.int64)
+        parent[source] = source
+        frontier = np.array([source], dtype=np.int64)
+        while len(frontier) and parent[target] < 0:
+            owners, reached = [], []
+            for indptr, indices in adjacency:
+                o, r = _gather(indptr, indices, frontier)
+                owners.append(o)
+                reached.append(r)
+            owners, reached = np.concatenate(owners), np.concatenate(reached)
+            fresh = parent[reached] < 0
+            owners, reached = owners[fresh], reached[fresh]
+            reached, first = np.unique(reached, return_index=True)
+            parent[reached] = owners[first]
+            frontier = reached
+
+        if parent[target] < 0:
+            return None
+        path = [target]
+        while path[-1] != source:
+            path.append(int(parent[path[-1]]))
+        return path[::-1]
+
+    def _adjacency(self, direction, kinds):
+        """CSR (indptr, indices) pairs filtered to the requested edge kinds"""
+        key = (direction, tuple(kinds))
+        cache = self._adjacency_cache
+        if key not in cache:
+            wanted = self._kind_codes(kinds)
+            pairs = []
+            if direction in ('out', 'both'):
+                pairs.append(self._filtered(self.out_indptr, self.out_indices, self.out_kind, wanted))
+            if direction in ('in', 'both'):
+                pairs.append(self._filtered(self.in_indptr, self.in_indices, self.in_kind, wanted))
+            cache[key] = pairs
+        return cache[key]
+
+    def _filtered(self, indptr, indices, kinds, wanted):
+        keep = np.isin(kinds, wanted)
+        if keep.all():
+            return indptr, indices
+        rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))[keep]
+        filtered_indptr = np.zeros_like(indptr)
+        np.cumsum(np.bincount(rows, minlength=len(indptr) - 1), out=filtered_indptr[1:])
+        return filtered_indptr, indices[keep]
+
+    def rebased(self, store, remap, rows):
+        """Graph for a store returned by PhilosopherStore.with_changes.
+
+        remap maps old rows to new ones (-1 when deleted) and rows are the
+        new positions of updated and inserted records. Every edge comes from
+        a record naming one of its endpoints, so only edges touching changed
+        or deleted rows are dropped and re-derived, from the changed records
+        and from the records of their former neighbours. External nodes a
+        changed record now stands for are merged into it, and PageRank is
+        warm-started from the previous ranks.
+        """
+        n_old, n_new = self.n_corpus, len(store)
+        rows = np.asarray(rows, dtype=np.int64)
+        changed = np.zeros(n_new, dtype=bool)
+        changed[rows] = True
+        touched = np.zeros(self.node_count, dtype=bool)
+        touched[:n_old] = (remap < 0) | changed[np.maximum(remap, 0)]
+
+        # Corpus neighbours whose records may name a touched philosopher
+        ends = np.concatenate([self.dst[touched[self.src]], self.src[touched[self.dst]]])
+        neighbours = np.unique(ends[(ends < n_old)])
+        neighbours = remap[neighbours[~touched[neighbours]]]
+
+        # Old node -> new node; external nodes keep their order after the corpus
+        external_ids = self.node_ids[n_old:]
+        node_map = np.concatenate([remap, n_new + np.arange(len(external_ids))])
+        frame = store.frame
+        external_by_id = {node_id: n_old + i for i, node_id in enumerate(external_ids)}
+        external_by_name = {}
+        for i, name in enumerate(self.node_names[n_old:]):
+            external_by_name.setdefault(str(name).lower(), []).append(n_old + i)
+        for row in rows:
+            merged = external_by_name.get(str(frame['name'].iat[row]).lower(), [])
+            merged = merged + ([external_by_id[frame['id'].iat[row]]] if frame['id'].iat[row] in external_by_id else [])
+            node_map[merged] = row
+
+        keep = ~touched[self.src] & ~touched[self.dst]
+        src, dst = node_map[self.src[keep]], node_map[self.dst[keep]]
+        weight, kind = self.weight[keep], self.kind[keep].astype(np.int64)
+
+        node_ids = list(frame['id']) + list(external_ids)
+        node_names = list(frame['name']) + list(self.node_names[n_old:])
+        by_id = dict(store.id_index)
+        for node_id, node in external_by_id.items():
+            if node_map[node] >= n_new:
+                by_id.setdefault(node_id, int(node_map[node]))
+        raw_edges = []
+        for row in np.concatenate([rows, neighbours]):
+            raw_edges.extend(relations(store.record(int(row))))
+        new_src, new_dst, new_weight, new_kind = _resolve_edges(raw_edges, by_id, node_ids, node_names, n_new)
+
+        src, dst = np.concatenate([src, new_src]), np.concatenate([dst, new_dst])
+        weight, kind = np.concatenate([weight, new_weight]), np.concatenate([kind, new_kind])
+        valid = src != dst
+        src, dst, weight, kind = src[valid], dst[valid], weight[valid], kind[valid]
+
+        # Repeated edges keep their strongest weight
+        n_nodes = len(node_ids)
+        key = (src * n_nodes + dst) * len(EDGE_KINDS) + kind
+        order = np.lexsort((-weight, key))
+        first = np.r_[True, key[order][1:] != key[order][:-1]] if len(key) else np.array([], dtype=bool)
+        order = order[first]
+        src, dst, weight, kind = src[order], dst[order], weight[order], kind[order]
+
+        # Drop external nodes nothing links to any more
+        used = np.zeros(n_nodes, dtype=bool)
+        used[:n_new] = True
+        used[src] = True
+        used[dst] = True
+        position = np.cumsum(used) - 1
+        node_ids = [node_id for node_id, u in zip(node_ids, used) if u]
+        node_names = [name for name, u in zip(node_names, used) if u]
+
+        initial = np.full(len(node_ids), 1.0 / max(len(node_ids), 1))
+        old_nodes = np.flatnonzero((node_map >= 0) & (node_map < n_nodes))
+        old_nodes = old_nodes[used[node_map[old_nodes]]]
+        initial[position[node_map[old_nodes]]] = self.pagerank[old_nodes]
+        return InfluenceGraph(node_ids, node_names, n_new, position[src], position[dst], weight, kind,
+                              initial_rank=initial if len(node_ids) else None)
+
+    def node_of(self, philosopher_id):
+        """Node index of a philosopher id, or None"""
+        return self.node_index.get(philosopher_id)
+
+    def edges_within(self, nodes):
+        """Edges whose endpoints are both in the given node set"""
+        member = np.zeros(self.node_count, dtype=bool)
+        member[nodes] = True
+        keep = member[self.src] & member[self.dst]
+        return self.src[keep], self.dst[keep], self.weight[keep], self.kind[keep]
@@ -0,0 +1,562 @@
+import json
+import math
+import os
+import re
+import shutil
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from corpus_loader import CorpusReader
+from dataset_cache import read_store, write_store
+from orb_layout import ERA_ORDER
+from philosopher_store import PhilosopherStore
+
+# Format of the ingest output directory; bump when the shard layout changes
+INGEST_FORMAT = 1
+
+STAGES = ('read', 'validate', 'normalize', 'dedupe')
+
+# Spellings seen in research dumps, keyed by lowercase letters only
+ERA_ALIASES = {
+    'antiquity': 'Ancient',
+    'ancientgreek': 'Ancient',
+    'classicalantiquity': 'Classical',
+    'middleages': 'Medieval',
+    'earlymodernperiod': 'EarlyModern',
+    'enlightenment': 'EarlyModern',
+    'latemodern': 'Modern',
+    'twentiethcentury': 'Contemporary',
+    'postmodernism': 'Postmodern'
+}
+ERA_ALIASES.update({era.lower(): era for era in ERA_ORDER})
+
+DOMAINS = [
+    'Logic', 'Ethics', 'Metaphysics', 'Politics', 'Aesthetics', 'Epistemology',
+    'Philosophy of Religion', 'Philosophy of Science', 'Philosophy of Mind',
+    'Natural Philosophy', 'Cosmology', 'Education'
+]
+DOMAIN_ALIASES = {
+    'moralphilosophy': 'Ethics',
+    'morality': 'Ethics',
+    'politicalphilosophy': 'Politics',
+    'political': 'Politics',
+    'aesthetic': 'Aesthetics',
+    'ontology': 'Metaphysics',
+    'theoryofknowledge': 'Epistemology',
+    'religion': 'Philosophy of Religion',
+    'theology': 'Philosophy of Religion',
+    'science': 'Philosophy of Science',
+    'mind': 'Philosophy of Mind'
+}
+DOMAIN_ALIASES.update({domain.lower().replace(' ', ''): domain for domain in DOMAINS})
+
+# A JSON array opening on its own line, then its first record's brace
+_PRETTY_ARRAY_RE = re.compile(rb'\A(?:\xef\xbb\xbf)?\s*\[[ \t]*\r?\n(?:[ \t]*\r?\n)*(?P<indent>[ \t]*)\{[ \t]*\r?\n')
+
+# The rest of a record's closing line
+_LINE_END_RE = re.compile(rb',?[ \t]*\r?\n')
+
+_YEAR_RE = re.compile(
+    r'^(?:c(?:irca|a)?\.?\s*)?(?P<pre>ad|ce)?\s*(?P<sign>-)?(?P<number>\d{1,4})'
+    r'(?P<suffix>st|nd|rd|th)?(?:\s*century)?\s*(?P<era>bce|bc|ce|ad)?\.?\??$'
+)
+
+
+def _key(text):
+    return ''.join(c for c in text.lower() if c.isalpha())
+
+
+def canonical_era(era):
+    """Canonical era name (see orb_layout.ERA_ORDER), or the trimmed input"""
+    key = _key(era)
+    for suffix in ('era', 'period', 'philosophy'):
+        if key.endswith(suffix) and key[:-len(suffix)] in ERA_ALIASES:
+            key = key[:-len(suffix)]
+    return ERA_ALIASES.get(key, era.strip())
+
+
+def canonical_domain(domain):
+    """Canonical domain name; unknown domains are title-cased"""
+    canonical = DOMAIN_ALIASES.get(_key(domain))
+    if canonical is not None:
+        return canonical
+    words = domain.strip().split()
+    return ' '.join(w if i and w.lower() in ('of', 'and', 'the') else w[:1].upper() + w[1:]
+                    for i, w in enumerate(words))
+
+
+def parse_year(value):
+    """Year as an int (BC negative), or None when it cannot be read.
+
+    Accepts numbers and strings like "1724", "-470", "c. 570 BC",
+    "AD 872" and "5th century BCE" (the middle of the century).
+    """
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value) if math.isfinite(value) else None
+    if not isinstance(value, str):
+        return None
+    match = _YEAR_RE.match(value.strip().lower())
+    if match is None:
+        return None
+    year = int(match['number'])
+    if match['suffix']:
+        year = (year - 1) * 100 + 50
+    if match['sign'] or match['era'] in ('bc', 'bce'):
+        year = -year
+    return year
+
+
+def validate(record):
+    """Reason a record breaks the corpus schema, or None when it is usable"""
+    if not isinstance(record, dict):
+        return 'record is not an object'
+    if not isinstance(record.get('id'), str) or not record['id'].strip():
+        return 'missing id'
+    if not isinstance(record.get('name'), str) or not record['name'].strip():
+        return 'missing name'
+    for field, kind, label in (('allDomains', list, 'a list'), ('domainStrengths', dict, 'an object'),
+                               ('switchPoints', list, 'a list'), ('influences', (dict, list), 'an object or list')):
+        if field in record and record[field] is not None and not isinstance(record[field], kind):
+            return f'{field} is not {label}'
+    for field in ('era', 'primaryDomain', 'spiralDynamicsStage'):
+        if field in record and record[field] is not None and not isinstance(record[field], str):
+            return f'{field} is not a string'
+    return None
+
+
+def normalize(record):
+    """Copy of a validated record with canonical era, domains and years.
+
+    Raises ValueError when a field cannot be normalized.
+    """
+    record = dict(record)
+    record['id'] = record['id'].strip()
+    record['name'] = record['name'].strip()
+
+    for field in ('birthYear', 'deathYear'):
+        if record.get(field) is not None:
+            year = parse_year(record[field])
+            if year is None:
+                raise ValueError(f'unparseable {field}')
+            record[field] = year
+    if record.get('birthYear') is not None and record.get('deathYear') is not None \
+            and record['deathYear'] < record['birthYear']:
+        raise ValueError('deathYear before birthYear')
+
+    if record.get('era'):
+        record['era'] = canonical_era(record['era'])
+    if record.get('primaryDomain'):
+        record['primaryDomain'] = canonical_domain(record['primaryDomain'])
+    if record.get('allDomains'):
+        record['allDomains'] = list(dict.fromkeys(
+            canonical_domain(d) for d in record['allDomains'] if isinstance(d, str) and d.strip()))
+    if record.get('domainStrengths'):
+        strengths = {}
+        for domain, value in record['domainStrengths'].items():
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f'non-numeric strength for {domain}') from None
+            if not math.isfinite(value):
+                raise ValueError(f'non-numeric strength for {domain}')
+            domain = canonical_domain(domain)
+            value = int(value) if value.is_integer() else value
+            # Aliases of one domain keep the strongest value
+            strengths[domain] = max(value, strengths.get(domain, value))
+        record['domainStrengths'] = strengths
+    if record.get('switchPoints'):
+        record['switchPoints'] = [
+            dict(sp, domainCascades={canonical_domain(d): v for d, v in sp['domainCascades'].items()})
+            if isinstance(sp, dict) and isinstance(sp.get('domainCascades'), dict) else sp
+            for sp in record['switchPoints']
+        ]
+    return record
+
+
+def _decode_line(text):
+    """Record from one line of a line-per-record file, or None for array brackets"""
+    text = text.strip().rstrip(',')
+    if not text or text in ('[', ']'):
+        return None
+    return json.loads(text)
+
+
+def _process_chunk(chunk):
+    """Worker: decode, validate and normalize one chunk.
+
+    Returns (records, rejections, seconds per stage, stopped); rejections
+    are (stage, reason, line, id) tuples. Items that are bytes are record
+    texts cut out by _split_records: the first one that does not decode
+    ends the chunk and its position is returned as stopped (otherwise
+    None), so the parent can read on from there with CorpusReader.
+    """
+    lines, items = chunk
+    records, rejections = [], []
+    seconds = dict.fromkeys(('read', 'validate', 'normalize'), 0.0)
+    for offset, item in enumerate(items):
+        line = lines[offset] if lines is not None else None
+        start = time.perf_counter()
+        if isinstance(item, bytes):
+            try:
+                item = json.loads(item)
+            except ValueError:
+                return records, rejections, seconds, offset
+            finally:
+                seconds['read'] += time.perf_counter() - start
+        elif isinstance(item, str):
+            try:
+                item = _decode_line(item)
+            except json.JSONDecodeError as e:
+                rejections.append(('read', e.msg, line, None))
+                continue
+            finally:
+                seconds['read'] += time.perf_counter() - start
+            if item is None:
+                continue
+        start = time.perf_counter()
+        reason = validate(item)
+        seconds['validate'] += time.perf_counter() - start
+        if reason is not None:
+            rejections.append(('validate', reason, line, item.get('id') if isinstance(item, dict) else None))
+            continue
+        start = time.perf_counter()
+        try:
+            records.append(normalize(item))
+        except ValueError as e:
+            rejections.append(('normalize', str(e), line, item['id']))
+        seconds['normalize'] += time.perf_counter() - start
+    return records, rejections, seconds, None
+
+
+def _write_shard(directory, records):
+    """Worker: build one shard's columnar store and write it; returns seconds taken"""
+    start = time.perf_counter()
+    directory = Path(directory)
+    directory.mkdir(parents=True)
+    manifest = write_store(directory, PhilosopherStore.from_records(records))
+    (directory / 'manifest.json').write_text(json.dumps(manifest, ensure_ascii=False), encoding='utf-8')
+    return time.perf_counter() - start
+
+
+def _is_line_per_record(path, probe=1 << 16):
+    """True when the first records sit one per line, as in NDJSON or compact arrays"""
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = [line.strip().rstrip(',') for line in f.read(probe).splitlines()]
+    lines = [line for line in lines[:-1] if line and line != '[']
+    if len(lines) < 2:
+        return False
+    try:
+        return all(isinstance(json.loads(line), dict) for line in lines[:2])
+    except json.JSONDecodeError:
+        return False
+
+
+def _record_indent(path, probe=1 << 16):
+    """Indentation (bytes) of the records of a pretty-printed JSON array, or None.
+
+    Matches the layout json.dump(records, indent=...) writes: the array
+    opens on its own line and so does the first record's brace.
+    """
+    with open(path, 'rb') as f:
+        match = _PRETTY_ARRAY_RE.match(f.read(probe))
+    return match['indent'] if match else None
+
+
+def _split_records(path, indent, block_size=1 << 20):
+    """Yield (line, byte offset of that line, text) of each record of a
+    pretty-printed JSON array, text as UTF-8 bytes.
+
+    A record ends at a closing brace alone on its line at the records'
+    indentation; strings cannot span lines, so such a line is always
+    structural. Only newlines are counted, no JSON is decoded here. In a
+    file that does not keep to the layout a text may not be a whole
+    record; it then fails to decode in the worker.
+    """
+    closing = b'\n' + indent + b'}'
+    buf, base, line, scan = b'', 0, 1, 0  # base: file offset of buf[0]
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            buf += block if block else b'\n'
+            pos = 0  # buf[pos] is on line `line`
+            end = buf.find(closing, scan)
+            # Where to search from once the next block arrives
+            resume = len(buf) - len(closing) + 1
+            while end != -1:
+                match = _LINE_END_RE.match(buf, end + len(closing))
+                if match is None:
+                    if block and buf.find(b'\n', end + 1) == -1:
+                        resume = end  # the line continues in the next block
+                        break
+                    end = buf.find(closing, end + 1)
+                    continue
+                start = buf.find(b'{', pos, end)
+                if start != -1:
+                    line += buf.count(b'\n', pos, start)
+                    yield line, base + buf.rfind(b'\n', 0, start) + 1, buf[start:end + len(closing)]
+                    pos = start
+                line += buf.count(b'\n', pos, match.end())
+                pos = match.end()
+                end = buf.find(closing, pos - 1)
+            if not block:
+                break
+            buf = buf[pos:]
+            base += pos
+            scan = max(resume - pos, 0)
+    # A last record that never closed fails to decode in its worker
+    start = buf.find(b'{', pos)
+    if start != -1:
+        line += buf.count(b'\n', pos, start)
+        yield line, base + buf.rfind(b'\n', 0, start) + 1, buf[start:]
+
+
+def read_chunks(path, chunk_size, report, start=0, first_line=1):
+    """Yield (line numbers, items, byte offsets) chunks of a corpus file.
+
+    Line-per-record files are split into raw lines, and pretty-printed
+    JSON arrays into raw record texts at record boundaries, so the workers
+    do the JSON decoding. Any other layout (concatenated or fenced
+    documents, a single object, irregular indentation) goes through
+    CorpusReader in this process, which decodes serially and yields
+    decoded records without line numbers. start and first_line resume a
+    file at a line start with CorpusReader; byte offsets are only given
+    for record texts, for that purpose.
+    """
+    if not start and _is_line_per_record(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            first, lines = 1, []
+            for number, line in enumerate(f, 1):
+                lines.append(line)
+                if len(lines) >= chunk_size:
+                    yield range(first, number + 1), lines, None
+                    first, lines = number + 1, []
+            if lines:
+                yield range(first, first + len(lines)), lines, None
+        return
+
+    indent = _record_indent(path) if not start else None
+    if indent is not None:
+        numbers, offsets, texts = [], [], []
+        for line, offset, text in _split_records(path, indent):
+            numbers.append(line)
+            offsets.append(offset)
+            texts.append(text)
+            if len(texts) >= chunk_size:
+                yield numbers, texts, offsets
+                numbers, offsets, texts = [], [], []
+        if texts:
+            yield numbers, texts, offsets
+        return
+
+    reader = CorpusReader(path, start=start)
+    records = []
+    for record in reader:
+        records.append(record)
+        if len(records) >= chunk_size:
+            yield None, records, None
+            records = []
+    if records:
+        yield None, records, None
+    # Records the reader had to skip never reach a chunk
+    for entry in reader.report.skipped:
+        report.input += 1
+        report.reject('read', entry['reason'], entry['line'] + first_line - 1)
+
+
+class IngestReport:
+    """Counts, throughput and rejections of one ingest run"""
+
+    def __init__(self, source=None, samples=20):
+        self.source = source
+        self.samples = samples
+        self.input = 0
+        self.accepted = 0
+        self.shards = 0
+        self.workers = 0
+        self.seconds = 0.0
+        self.stage_seconds = dict.fromkeys(STAGES + ('write',), 0.0)
+        self.rejected = {stage: Counter() for stage in STAGES}
+        self.examples = []
+
+    def reject(self, stage, reason, line=None, philosopher_id=None):
+        self.rejected[stage][reason] += 1
+        if len(self.examples) < self.samples:
+            self.examples.append({'stage': stage, 'reason': reason, 'line': line, 'id': philosopher_id})
+
+    def rejected_count(self, stage=None):
+        stages = STAGES if stage is None else (stage,)
+        return sum(sum(self.rejected[s].values()) for s in stages)
+
+    @property
+    def throughput(self):
+        """Input records per second of wall time"""
+        return self.input / self.seconds if self.seconds else 0.0
+
+    def to_dict(self):
+        return {
+            'source': self.source,
+            'input': self.input,
+            'accepted': self.accepted,
+            'shards': self.shards,
+            'workers': self.workers,
+            'seconds': self.seconds,
+            'records_per_second': self.throughput,
+            'stage_seconds': self.stage_seconds,
+            'rejected': {stage: dict(reasons) for stage, reasons in self.rejected.items()},
+            'examples': self.examples
+        }
+
+    def summary(self):
+        """Human readable multi-line summary"""
+        lines = [
+            f"{self.accepted} of {self.input} records accepted into {self.shards} shards "
+            f"in {self.seconds:.1f}s ({self.throughput:,.0f} records/s, {self.workers} workers)"
+        ]
+        for stage in STAGES:
+            reasons = self.rejected[stage]
+            text = f"  {stage:<10} {self.stage_seconds[stage]:8.2f}s cpu, {self.rejected_count(stage)} rejected"
+            if reasons:
+                text += ': ' + ', '.join(f"{reason} ({count})" for reason, count in reasons.most_common(3))
+            lines.append(text)
+        lines.append(f"  {'write':<10} {self.stage_seconds['write']:8.2f}s cpu")
+        return '\n'.join(lines)
+
+
+def ingest(source, output, workers=None, chunk_size=2000, shard_size=50_000):
+    """Validate, normalize and deduplicate a corpus into sharded columnar files.
+
+    Chunks of the source are processed on a pool of worker processes;
+    duplicates are dropped by id (first occurrence wins, as in the store)
+    and every shard_size accepted records are written by a worker as a
+    shard directory in the processed-cache layout. output/manifest.json
+    lists the shards and the report. Returns the IngestReport.
+    """
+    source, output = Path(source), Path(output)
+    workers = workers or os.cpu_count() or 1
+    report = IngestReport(str(source))
+    report.workers = workers
+    started = time.perf_counter()
+
+    # Build into a staging directory and swap it in once complete
+    staging = output.with_name(f".{output.name}.{os.getpid()}.tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+
+    seen = set()
+    pending_records = []
+    shard_futures = []
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        def flush(final=False):
+            while len(pending_records) >= shard_size or (final and pending_records):
+                batch = pending_records[:shard_size]
+                del pending_records[:shard_size]
+                directory = staging / f"shard-{len(shard_futures):05d}"
+                shard_futures.append((directory.name, len(batch), pool.submit(_write_shard, directory, batch)))
+
+        def collect(future):
+            records, rejections, seconds, stopped = future.result()
+            for stage, value in seconds.items():
+                report.stage_seconds[stage] += value
+            for stage, reason, line, philosopher_id in rejections:
+                report.reject(stage, reason, line, philosopher_id)
+            report.input += len(records) + len(rejections)
+            start = time.perf_counter()
+            for record in records:
+                if record['id'] in seen:
+                    report.reject('dedupe', 'duplicate id', None, record['id'])
+                    continue
+                seen.add(record['id'])
+                pending_records.append(record)
+            report.stage_seconds['dedupe'] += time.perf_counter() - start
+            flush()
+            return stopped
+
+        # Keep a bounded number of chunks in flight so memory stays flat.
+        # Time spent reading and splitting in this process counts as read.
+        in_flight = deque()
+        chunks = read_chunks(source, chunk_size, report)
+        while True:
+            start = time.perf_counter()
+            chunk = next(chunks, None)
+            report.stage_seconds['read'] += time.perf_counter() - start
+            if chunk is not None:
+                lines, items, offsets = chunk
+                in_flight.append((pool.submit(_process_chunk, (lines, items)), lines, offsets))
+            if in_flight and (chunk is None or len(in_flight) >= 2 * workers):
+                future, lines, offsets = in_flight.popleft()
+                stopped = collect(future)
+                if stopped is not None:
+                    # A record text that does not decode means the file
+                    # leaves the pretty-printed layout (or the record is
+                    # broken): CorpusReader reads on from that record
+                    for future, _, _ in in_flight:
+                        future.cancel()
+                    in_flight.clear()
+                    chunks.close()
+                    chunks = read_chunks(source, chunk_size, report, offsets[stopped], lines[stopped])
+            elif chunk is None:
+                break
+        flush(final=True)
+
+        shards = []
+        for name, rows, future in shard_futures:
+            report.stage_seconds['write'] += future.result()
+            shards.append({'name': name, 'rows': rows})
+
+    report.accepted = sum(shard['rows'] for shard in shards)
+    report.shards = len(shards)
+    report.seconds = time.perf_counter() - started
+
+    manifest = {'format': INGEST_FORMAT, 'created': time.time(), 'shards': shards, 'report': report.to_dict()}
+    (staging / 'manifest.json').write_text(json.dumps(manifest, ensure_ascii=False), encoding='utf-8')
+    shutil.rmtree(output, ignore_errors=True)
+    os.replace(staging, output)
+    return report
+
+
+def iter_ingested(output):
+    """Yield the records of an ingest output directory in order.
+
+    Feed the result to PhilosopherDataProcessor.process_data to load an
+    ingested corpus.
+    """
+    output = Path(output)
+    manifest = json.loads((output / 'manifest.json').read_text(encoding='utf-8'))
+    if manifest.get('format') != INGEST_FORMAT:
+        raise ValueError(f"Unsupported ingest format in {output}")
+    for shard in manifest['shards']:
+        entry = output / shard['name']
+        store = read_store(entry, json.loads((entry / 'manifest.json').read_text(encoding='utf-8')))
+        for row in range(len(store)):
+            yield store.record(row)
+
+
+def main(argv=None):
+    """Ingest a research dump:
+
+        python ingest.py dump.json data/ingested --workers 8
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Validate, normalize and shard a philosopher corpus")
+    parser.add_argument('source', help="JSON corpus file")
+    parser.add_argument('output', help="directory to write shards to (replaced)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    parser.add_argument('--shard-size', type=int, default=50_000)
+    parser.add_argument('--report', help="also write the report as JSON here")
+    args = parser.parse_args(argv)
+
+    report = ingest(args.source, args.output, args.workers, args.chunk_size, args.shard_size)
+    print(report.summary())
+    if args.report:
+        Path(args.report).write_text(json.dumps(report.to_dict(), indent=2), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
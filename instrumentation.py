@@ -0,0 +1,272 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds of the size histogram buckets, in bytes
+SIZE_BUCKETS = tuple(1024 * 4 ** i for i in range(10))
+
+# Set NEXUS_PAYLOAD_SAMPLE=N to serialize every Nth rendered figure and
+# record its payload size; off by default, as serializing costs about as
+# much as the render itself
+PAYLOAD_SAMPLE_EVERY = int(os.environ.get('NEXUS_PAYLOAD_SAMPLE', '0'))
+
+# Set NEXUS_TRACE_MEMORY=1 to record allocation peaks of top-level spans (slower)
+TRACE_MEMORY = os.environ.get('NEXUS_TRACE_MEMORY') == '1'
+
+# tracemalloc is process-wide, so top-level traced spans take turns: each
+# holds this lock while tracing, and other threads' spans wait for it
+_TRACE_LOCK = threading.Lock()
+
+
+class Histogram:
+    """Cumulative bucket counts plus a window of recent samples for quantiles"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS, window=512):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def quantile(self, q):
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'max': self.max
+        }
+
+
+def current_session():
+    """Streamlit session id of the running script, or None outside Streamlit"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else None
+
+
+class Metrics:
+    """Process-wide registry of spans, histograms and counters.
+
+    Spans time a stage (and, for top-level spans, the allocation peak when
+    TRACE_MEMORY is on) and nest, so ``create_3d_orb/add_philosopher_nodes``
+    is recorded under its own name. Traced spans run one thread at a time;
+    a peak still includes what other threads allocate outside spans. Counters are kept globally and for the
+    most recent max_sessions Streamlit sessions.
+    """
+
+    def __init__(self, recent_spans=200, max_sessions=1000):
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.histograms = {}
+        self.counters = {}
+        self.session_counters = {}
+        self.recent = deque(maxlen=recent_spans)
+        self.started = time.time()
+
+    def _histogram(self, name, buckets):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram(buckets)
+        return histogram
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS):
+        """Add a sample to a named histogram"""
+        with self._lock:
+            self._histogram(name, buckets).observe(value)
+
+    def count(self, name, amount=1, session=None):
+        """Increment a counter globally and for the session (default: current)"""
+        session = current_session() if session is None else session
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+            if session is not None:
+                if session not in self.session_counters and len(self.session_counters) >= self.max_sessions:
+                    # Forget the oldest session
+                    del self.session_counters[next(iter(self.session_counters))]
+                counters = self.session_counters.setdefault(session, {})
+                counters[name] = counters.get(name, 0) + amount
+
+    def span(self, name):
+        """Context manager timing one stage"""
+        return _Span(self, name)
+
+    def _finish(self, path, elapsed, memory_peak):
+        self.observe(f"span.{path}.seconds", elapsed)
+        if memory_peak is not None:
+            self.observe(f"span.{path}.peak_bytes", memory_peak, SIZE_BUCKETS)
+        self.count(f"span.{path}.calls")
+        with self._lock:
+            self.recent.append({
+                'span': path,
+                'seconds': elapsed,
+                'peak_bytes': memory_peak,
+                'at': time.time(),
+                'thread': threading.current_thread().name
+            })
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+            self.session_counters.clear()
+            self.recent.clear()
+            self.started = time.time()
+
+    def snapshot(self):
+        """Plain-data copy of every metric"""
+        with self._lock:
+            return {
+                'started': self.started,
+                'histograms': {name: h.summary() for name, h in self.histograms.items()},
+                'counters': dict(self.counters),
+                'sessions': {session: dict(c) for session, c in self.session_counters.items()},
+                'recent_spans': list(self.recent)
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix='nexus'):
+        """Metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, histogram in sorted(self.histograms.items()):
+                metric = _metric_name(prefix, name)
+                lines.append(f"# TYPE {metric} histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram.count}')
+                lines.append(f"{metric}_sum {histogram.total}")
+                lines.append(f"{metric}_count {histogram.count}")
+            for name, value in sorted(self.counters.items()):
+                metric = _metric_name(prefix, name)
+                lines.append(f"# TYPE {metric}_total counter")
+                lines.append(f"{metric}_total {value}")
+            lines.append(f"# TYPE {prefix}_sessions gauge")
+            lines.append(f"{prefix}_sessions {len(self.session_counters)}")
+        return '\n'.join(lines) + '\n'
+
+
+def _metric_name(prefix, name):
+    return f"{prefix}_" + ''.join(c if c.isalnum() else '_' for c in name)
+
+
+class _Span:
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        stack = getattr(self.metrics._local, 'stack', None)
+        if stack is None:
+            stack = self.metrics._local.stack = []
+        stack.append(self.name)
+        self.path = '/'.join(stack)
+        # Only the thread's outermost span owns tracemalloc, so nested spans
+        # never reset their parent's peak; tracing started by someone else
+        # (a benchmark, say) is left alone
+        self.tracing = TRACE_MEMORY and not getattr(self.metrics._local, 'tracing', False)
+        if self.tracing:
+            _TRACE_LOCK.acquire()
+            if tracemalloc.is_tracing():
+                _TRACE_LOCK.release()
+                self.tracing = False
+            else:
+                self.metrics._local.tracing = True
+                tracemalloc.start()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        peak = None
+        if self.tracing:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            self.metrics._local.tracing = False
+            _TRACE_LOCK.release()
+        self.metrics._local.stack.pop()
+        self.metrics._finish(self.path, elapsed, peak)
+        return False
+
+
+# The registry the app and its modules report to
+METRICS = Metrics()
+
+
+def instrumented(name=None):
+    """Decorator recording every call of a function as a span"""
+    def decorate(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with METRICS.span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def start_exporter(port, metrics=METRICS, host='127.0.0.1'):
+    """Serve /metrics (Prometheus text) and /metrics.json on a daemon thread.
+
+    Listens on localhost only unless another host is given (e.g. '0.0.0.0'
+    for a scraper on another machine); session ids are part of the data.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith('/metrics.json'):
+                body, content_type = metrics.to_json(), 'application/json'
+            elif self.path.startswith('/metrics'):
+                body, content_type = metrics.to_prometheus(), 'text/plain; version=0.0.4'
+            else:
+                self.send_error(404)
+                return
+            payload = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name='metrics-exporter', daemon=True).start()
+    return server
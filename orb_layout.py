@@ -0,0 +1,223 @@
+import zlib
+import numpy as np
+
+GOLDEN_RATIO = (1 + 5**0.5) / 2
+
+# Chronological order used for era latitude bands (north to south)
+ERA_ORDER = [
+    'Ancient', 'Classical', 'Medieval', 'Renaissance', 'EarlyModern',
+    'Modern', 'Contemporary', 'Postmodern'
+]
+
+# The five domain wedges drawn around the orb equator (name, start angle in degrees)
+WEDGE_DOMAINS = [
+    ('Logic', 0),
+    ('Ethics', 72),
+    ('Metaphysics', 144),
+    ('Politics', 216),
+    ('Aesthetics', 288)
+]
+
+LAYOUT_MODES = {
+    'fibonacci': 'Fibonacci Sphere',
+    'era_bands': 'Era Bands',
+    'domain_wedges': 'Domain Wedges',
+    'domain_strengths': 'Domain Strengths',
+    'similarity': 'Philosophical Similarity'
+}
+
+
+def fibonacci_sphere(n, radius=5.0):
+    """Evenly distribute n points over a sphere surface.
+
+    Returns an (n, 3) float array of x, y, z coordinates.
+    """
+    i = np.arange(n, dtype=np.float64) + 0.5
+    theta = 2 * np.pi * i / GOLDEN_RATIO
+    z = 1 - 2 * i / max(n, 1)
+    return _to_cartesian(theta, z, radius)
+
+
+def _to_cartesian(theta, z, radius):
+    """Convert azimuth and unit height to points on the sphere"""
+    r_xy = np.sqrt(np.clip(1 - z * z, 0, 1))
+    coords = np.empty((len(theta), 3), dtype=np.float64)
+    coords[:, 0] = radius * r_xy * np.cos(theta)
+    coords[:, 1] = radius * r_xy * np.sin(theta)
+    coords[:, 2] = radius * z
+    return coords
+
+
+def _rank_within_groups(groups):
+    """Position of each element within its group, and its group's size"""
+    order = np.argsort(groups, kind='stable')
+    sorted_groups = groups[order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    sizes = np.diff(np.r_[starts, len(groups)])
+
+    rank = np.empty(len(groups), dtype=np.int64)
+    rank[order] = np.arange(len(groups)) - np.repeat(starts, sizes)
+    size = np.empty(len(groups), dtype=np.int64)
+    size[order] = np.repeat(sizes, sizes)
+    return rank, size
+
+
+def era_bands(era_codes, n_eras, radius=5.0):
+    """Place each era in its own latitude band, earliest era at the north pole.
+
+    era_codes are integer band indices in [0, n_eras).
+    """
+    era_codes = np.asarray(era_codes, dtype=np.int64)
+    rank, size = _rank_within_groups(era_codes)
+
+    # Each band spans an equal slice of height; points spiral within it
+    band_height = 2.0 / max(n_eras, 1)
+    top = 1 - era_codes * band_height
+    z = top - band_height * (rank + 0.5) / size
+    theta = 2 * np.pi * rank / GOLDEN_RATIO
+    return _to_cartesian(theta, z, radius)
+
+
+def domain_wedges(wedge_codes, n_wedges=len(WEDGE_DOMAINS), radius=5.0):
+    """Place each node inside the longitude wedge of its domain.
+
+    wedge_codes are integer wedge indices in [0, n_wedges).
+    """
+    wedge_codes = np.asarray(wedge_codes, dtype=np.int64)
+    rank, size = _rank_within_groups(wedge_codes)
+
+    wedge_width = 2 * np.pi / max(n_wedges, 1)
+    # Golden-ratio offsets keep neighbours within a wedge from lining up
+    fraction = np.mod(rank / GOLDEN_RATIO, 1.0)
+    theta = wedge_codes * wedge_width + wedge_width * (0.1 + 0.8 * fraction)
+    z = 1 - 2 * (rank + 0.5) / size
+    return _to_cartesian(theta, z, radius)
+
+
+def strength_weighted(strengths, radius=5.0, pull=0.6):
+    """Pull nodes toward anchors of the domains they are strongest in.
+
+    strengths is an (n, d) matrix of domainStrengths; each domain gets an
+    anchor on the sphere and nodes are blended between their Fibonacci
+    position and the strength-weighted mean of the anchors.
+    """
+    strengths = np.asarray(strengths, dtype=np.float64)
+    n, d = strengths.shape
+    base = fibonacci_sphere(n, 1.0)
+    if d == 0:
+        return base * radius
+
+    anchors = fibonacci_sphere(d, 1.0)
+    totals = strengths.sum(axis=1, keepdims=True)
+    weights = np.divide(strengths, totals, out=np.zeros_like(strengths), where=totals > 0)
+    target = weights @ anchors
+
+    # Nodes without strengths keep their base position
+    blend = np.where(totals > 0, pull, 0.0)
+    direction = (1 - blend) * base + blend * target
+    norms = np.linalg.norm(direction, axis=1, keepdims=True)
+    direction = np.divide(direction, norms, out=base.copy(), where=norms > 1e-9)
+    return direction * radius
+
+
+def similarity_sphere(points, radius=5.0, pull=0.85):
+    """Place nodes by the direction of their similarity projection.
+
+    points are (n, 3) coordinates in which similar philosophers lie close
+    together (see SimilarityIndex.projection). They are centred, scaled to
+    the unit ball and blended with the Fibonacci layout, so identical
+    profiles land near each other instead of on one spot, and nodes
+    without features keep their base position.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    n = len(points)
+    base = fibonacci_sphere(n, 1.0)
+    norms = np.linalg.norm(points, axis=1)
+    scale = norms.max() if n and norms.max() > 0 else 1.0
+    has_position = norms > 1e-9
+
+    target = points / scale
+    blend = np.where(has_position, pull, 0.0)[:, None]
+    direction = (1 - blend) * base + blend * target
+    lengths = np.linalg.norm(direction, axis=1, keepdims=True)
+    direction = np.divide(direction, lengths, out=base.copy(), where=lengths > 1e-9)
+    return direction * radius
+
+
+def era_band_codes(eras):
+    """Map era names to band indices following ERA_ORDER; unknown eras go last"""
+    known = {era: i for i, era in enumerate(ERA_ORDER)}
+    extra = sorted({era for era in eras if era not in known})
+    known.update({era: len(ERA_ORDER) + i for i, era in enumerate(extra)})
+    codes = np.fromiter((known[era] for era in eras), dtype=np.int64, count=len(eras))
+
+    # Compact to the bands actually present so no band is left empty
+    present, codes = np.unique(codes, return_inverse=True)
+    return codes, len(present)
+
+
+def wedge_codes(primary_domains, primary_codes, strengths, domains):
+    """Choose a wedge for each node from its strongest wedge domain.
+
+    primary_domains lists the distinct primary domains and primary_codes
+    indexes into it per node. Nodes without strengths in any wedge domain
+    fall back to their primary domain's wedge, or to a stable spread over
+    the wedges when the primary domain is not a wedge domain.
+    """
+    wedge_names = [name for name, _ in WEDGE_DOMAINS]
+    column = {domain: j for j, domain in enumerate(domains)}
+
+    wedge_strengths = np.zeros((len(primary_codes), len(wedge_names)))
+    for k, name in enumerate(wedge_names):
+        if name in column:
+            wedge_strengths[:, k] = strengths[:, column[name]]
+
+    codes = wedge_strengths.argmax(axis=1)
+    has_strength = wedge_strengths.max(axis=1) > 0
+
+    wedge_index = {name: k for k, name in enumerate(wedge_names)}
+    fallback = np.array(
+        [wedge_index.get(domain, zlib.crc32(str(domain).encode()) % len(wedge_names))
+         for domain in primary_domains],
+        dtype=np.int64
+    )
+    return np.where(has_strength, codes, fallback[primary_codes])
+
+
+class OrbLayoutEngine:
+    """Computes orb coordinates for a whole corpus in one vectorized pass"""
+
+    def __init__(self, radius=5.0):
+        self.radius = radius
+
+    def compute(self, store, mode='fibonacci', similarity=None):
+        """Return an (n, 3) coordinate array for a PhilosopherStore.
+
+        The 'similarity' mode needs the store's SimilarityIndex.
+        """
+        n = len(store)
+        if mode == 'fibonacci' or n == 0:
+            return fibonacci_sphere(n, self.radius)
+
+        if mode == 'similarity':
+            if similarity is None:
+                raise ValueError("The similarity layout needs a SimilarityIndex")
+            return similarity_sphere(similarity.projection(3), self.radius)
+
+        frame = store.frame
+        if mode == 'era_bands':
+            era = frame['era'].cat
+            bands, n_bands = era_band_codes(list(era.categories))
+            return era_bands(bands[era.codes], n_bands, self.radius)
+
+        strengths = store.strength_matrix()
+
+        if mode == 'domain_wedges':
+            primary = frame['primaryDomain'].cat
+            codes = wedge_codes(list(primary.categories), primary.codes, strengths, store.domains)
+            return domain_wedges(codes, len(WEDGE_DOMAINS), self.radius)
+
+        if mode == 'domain_strengths':
+            return strength_weighted(strengths, self.radius)
+
+        raise ValueError(f"Unknown layout mode: {mode}")
@@ -0,0 +1,135 @@
+import numpy as np
+
+CLUSTER_PREFIX = 'cluster:'
+
+
+def cell_keys(coords, level, extent):
+    """Octree cell of each point at the given depth (2**level cells per axis)"""
+    cells = 1 << level
+    scaled = (np.asarray(coords, dtype=np.float64) + extent) / (2 * extent) * cells
+    ijk = np.clip(scaled.astype(np.int64), 0, cells - 1)
+    return (ijk[:, 0] * cells + ijk[:, 1]) * cells + ijk[:, 2]
+
+
+def octree_clusters(coords, level, extent):
+    """Group points by octree cell.
+
+    Returns (keys, inverse, counts, centroids): the occupied cell keys, the
+    cluster index of each point, points per cluster and cluster centroids.
+    """
+    keys, inverse, counts = np.unique(cell_keys(coords, level, extent),
+                                      return_inverse=True, return_counts=True)
+    centroids = np.empty((len(keys), 3), dtype=np.float32)
+    for axis in range(3):
+        centroids[:, axis] = np.bincount(inverse, weights=coords[:, axis], minlength=len(keys)) / counts
+    return keys, inverse, counts, centroids
+
+
+def choose_level(coords, extent, max_clusters, max_level=10):
+    """Deepest octree level whose occupied cells fit within max_clusters"""
+    best = 0
+    for level in range(1, max_level + 1):
+        if len(np.unique(cell_keys(coords, level, extent))) > max_clusters:
+            break
+        best = level
+    return best
+
+
+def cluster_id(level, key):
+    """Stable identifier for an octree cell, used in selections"""
+    return f"{CLUSTER_PREFIX}{level}:{key}"
+
+
+def parse_cluster_id(value):
+    """(level, key) from a cluster identifier, or None"""
+    if not isinstance(value, str) or not value.startswith(CLUSTER_PREFIX):
+        return None
+    level, key = value[len(CLUSTER_PREFIX):].split(':')
+    return int(level), int(key)
+
+
+class DetailPlan:
+    """What to draw for one orb render.
+
+    ``node_rows`` are positions into the frame drawn as individual nodes,
+    ``label_rows`` the subset that gets a text label, and the ``cluster_*``
+    arrays describe aggregated octree cells drawn as single markers.
+    """
+
+    def __init__(self, node_rows, label_rows, level=None, cluster_keys=None,
+                 cluster_counts=None, cluster_centroids=None):
+        self.node_rows = node_rows
+        self.label_rows = label_rows
+        self.level = level
+        self.cluster_keys = np.array([], dtype=np.int64) if cluster_keys is None else cluster_keys
+        self.cluster_counts = np.array([], dtype=np.int64) if cluster_counts is None else cluster_counts
+        self.cluster_centroids = (np.empty((0, 3), dtype=np.float32)
+                                  if cluster_centroids is None else cluster_centroids)
+
+    @property
+    def clustered(self):
+        return self.level is not None
+
+
+def plan_detail(coords, importance, extent, max_nodes=2000, label_top_n=40, expanded=()):
+    """Decide which nodes to draw individually and which to aggregate.
+
+    coords is the (n, 3) array of the nodes to render and importance one
+    score per node (higher is more important). At most max_nodes markers
+    are drawn in total and only the label_top_n most important nodes are
+    labelled. Cells listed in expanded (cluster ids from earlier renders)
+    are drawn node by node while the budget allows.
+    """
+    n = len(coords)
+    importance = np.asarray(importance, dtype=np.float64)
+    top = np.argsort(-importance, kind='stable')[:label_top_n]
+
+    if n <= max_nodes:
+        return DetailPlan(np.arange(n), np.sort(top))
+
+    # Reserve room for the labelled nodes and expanded cells
+    budget = max(max_nodes - len(top), 1)
+    level = choose_level(coords, extent, budget // 2)
+    keys, inverse, counts, centroids = octree_clusters(coords, level, extent)
+
+    individual = np.zeros(n, dtype=bool)
+    individual[top] = True
+    remaining = budget // 2
+    for value in expanded:
+        parsed = parse_cluster_id(value)
+        if parsed is None:
+            continue
+        # Expand the cell at this render's level that contains the selected cell
+        exp_level, exp_key = parsed
+        members = _members_of(coords, extent, exp_level, exp_key, level, keys, inverse)
+        if 0 < len(members) <= remaining:
+            individual[members] = True
+            remaining -= len(members)
+
+    # Clusters lose the members that are drawn individually
+    residual = np.bincount(inverse[~individual], minlength=len(keys))
+    keep = residual > 0
+    weights = (~individual).astype(np.float64)
+    centroids = np.stack([
+        np.bincount(inverse, weights=coords[:, axis] * weights, minlength=len(keys))
+        for axis in range(3)
+    ], axis=1)[keep] / residual[keep, None]
+
+    return DetailPlan(
+        node_rows=np.flatnonzero(individual),
+        label_rows=np.sort(top),
+        level=level,
+        cluster_keys=keys[keep],
+        cluster_counts=residual[keep],
+        cluster_centroids=centroids.astype(np.float32)
+    )
+
+
+def _members_of(coords, extent, exp_level, exp_key, level, keys, inverse):
+    """Rows inside an octree cell chosen at exp_level"""
+    if exp_level == level:
+        position = np.searchsorted(keys, exp_key)
+        if position < len(keys) and keys[position] == exp_key:
+            return np.flatnonzero(inverse == position)
+        return np.array([], dtype=np.int64)
+    return np.flatnonzero(cell_keys(coords, exp_level, extent) == exp_key)
@@ -0,0 +1,177 @@
+import numpy as np
+
+NGRAM = 3
+
+
+def _ngrams(text, n=NGRAM):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class FilterIndex:
+    """Inverted indexes over a PhilosopherStore, built once at load time.
+
+    - domain -> row bitmap (boolean array per domain)
+    - era -> row bitmap
+    - spiral stage -> row bitmap
+    - name trigram -> sorted row ids, for substring search
+    - the lowercased names as one UTF-8 byte array, scanned for terms
+      too short to have trigrams (built on first use)
+
+    Queries resolve to bitmap and posting-list intersections and return
+    row ids, so no DataFrame is scanned or copied.
+    """
+
+    def __init__(self, store, name_index=None):
+        n = len(store)
+        self.size = n
+
+        # Domain bitmaps straight from the CSR membership arrays
+        self.domain_codes = {domain: j for j, domain in enumerate(store.domains)}
+        self.domain_bitmaps = np.ascontiguousarray(store.domain_matrix().T)
+
+        era = store.frame['era'].cat
+        self.era_codes = {e: j for j, e in enumerate(era.categories)}
+        self.era_bitmaps = era.codes.to_numpy()[None, :] == np.arange(len(era.categories))[:, None]
+
+        stage = store.frame['spiralDynamicsStage'].cat
+        self.stage_codes = {s: j for j, s in enumerate(stage.categories)}
+        self.stage_bitmaps = stage.codes.to_numpy()[None, :] == np.arange(len(stage.categories))[:, None]
+
+        # Name indexes, reused when restored from the processed-data cache
+        self.names = [str(name).lower() for name in store.frame['name']]
+        self._name_bytes = None
+        if name_index is not None:
+            self.name_ngrams = name_index
+            return
+
+        postings = {}
+        for row, name in enumerate(self.names):
+            for gram in _ngrams(name):
+                postings.setdefault(gram, []).append(row)
+        self.name_ngrams = {gram: np.asarray(rows, dtype=np.int32) for gram, rows in postings.items()}
+
+    def rebased(self, store, remap, rows):
+        """Index for a store returned by PhilosopherStore.with_changes.
+
+        remap maps old rows to new ones (-1 when deleted) and rows are the
+        new positions of updated and inserted records. Name postings are
+        moved rather than rebuilt; only the changed names are tokenized.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        changed = np.zeros(len(store), dtype=bool)
+        changed[rows] = True
+
+        def move(old_rows):
+            moved = remap[old_rows]
+            moved = moved[moved >= 0]
+            return moved[~changed[moved]]
+
+        additions = {}
+        for row in rows:
+            name = str(store.frame['name'].iat[row]).lower()
+            for gram in _ngrams(name):
+                additions.setdefault(gram, []).append(row)
+
+        name_ngrams = {}
+        for gram, postings in self.name_ngrams.items():
+            moved = move(postings)
+            extra = additions.pop(gram, None)
+            if extra:
+                moved = np.union1d(moved, extra)
+            if len(moved):
+                name_ngrams[gram] = moved.astype(np.int32)
+        for gram, extra in additions.items():
+            name_ngrams[gram] = np.unique(np.asarray(extra, dtype=np.int32))
+
+        return FilterIndex(store, name_index=name_ngrams)
+
+    @property
+    def name_index(self):
+        """Name trigram postings, the part worth persisting"""
+        return self.name_ngrams
+
+    def domain_mask(self, domains, mode='any'):
+        """Rows in any (or all) of the given domains"""
+        codes = [self.domain_codes[d] for d in domains if d in self.domain_codes]
+        if mode == 'all':
+            if len(codes) < len(domains):
+                return np.zeros(self.size, dtype=bool)
+            return np.logical_and.reduce(self.domain_bitmaps[codes], axis=0)
+        if not codes:
+            return np.zeros(self.size, dtype=bool)
+        return np.logical_or.reduce(self.domain_bitmaps[codes], axis=0)
+
+    def era_mask(self, eras):
+        """Rows in any of the given eras"""
+        codes = [self.era_codes[e] for e in eras if e in self.era_codes]
+        if not codes:
+            return np.zeros(self.size, dtype=bool)
+        return np.logical_or.reduce(self.era_bitmaps[codes], axis=0)
+
+    def stage_mask(self, stages):
+        """Rows in any of the given spiral stages"""
+        codes = [self.stage_codes[s] for s in stages if s in self.stage_codes]
+        if not codes:
+            return np.zeros(self.size, dtype=bool)
+        return np.logical_or.reduce(self.stage_bitmaps[codes], axis=0)
+
+    def name_matches(self, term):
+        """Sorted row ids whose name matches the search term.
+
+        Terms match anywhere in the name (case-insensitive), like SQL's
+        LIKE '%term%'. Terms of three or more characters go through the
+        trigram postings; shorter ones have no trigrams and scan the names.
+        """
+        term = term.strip().lower()
+        if not term:
+            return np.arange(self.size)
+
+        if len(term) < NGRAM:
+            names = self._name_bytes
+            if names is None:
+                # UTF-8 keeps the array narrow, and byte substrings of
+                # UTF-8 text match exactly where the characters do
+                names = self._name_bytes = np.array([name.encode('utf-8') for name in self.names], dtype=bytes)
+            if not len(names):
+                return np.array([], dtype=np.int64)
+            return np.flatnonzero(np.strings.find(names, term.encode('utf-8')) >= 0)
+
+        # Intersect trigram postings, smallest first, then verify the candidates
+        grams = sorted(_ngrams(term), key=lambda g: len(self.name_ngrams.get(g, ())))
+        candidates = self.name_ngrams.get(grams[0])
+        if candidates is None:
+            return np.array([], dtype=np.int32)
+        for gram in grams[1:]:
+            if len(candidates) == 0:
+                break
+            candidates = np.intersect1d(candidates, self.name_ngrams.get(gram, ()), assume_unique=True)
+        if len(term) == NGRAM:
+            return candidates
+        return np.asarray([row for row in candidates if term in self.names[row]], dtype=np.int32)
+
+    def select(self, domains=None, eras=None, search_term=None, domain_mode='any', stages=None):
+        """Resolve a filter combination to sorted row ids.
+
+        domains, eras and stages are lists of names (empty or None means no
+        filter); domains combine with OR or AND according to domain_mode,
+        eras and stages always combine with OR.
+        """
+        mask = None
+        if domains:
+            mask = self.domain_mask(domains, domain_mode)
+        if eras:
+            era_mask = self.era_mask(eras)
+            mask = era_mask if mask is None else mask & era_mask
+        if stages:
+            stage_mask = self.stage_mask(stages)
+            mask = stage_mask if mask is None else mask & stage_mask
+
+        if search_term and search_term.strip():
+            rows = self.name_matches(search_term)
+            if mask is None:
+                return rows
+            return rows[mask[rows]]
+
+        if mask is None:
+            return np.arange(self.size)
+        return np.flatnonzero(mask)
@@ -0,0 +1,373 @@
+import hashlib
+import json
+import numpy as np
+import pandas as pd
+
+YEAR_MIN = np.iinfo(np.int16).min
+YEAR_MAX = np.iinfo(np.int16).max
+
+FRAME_COLUMNS = [
+    'id', 'name', 'birthYear', 'deathYear', 'era', 'primaryDomain',
+    'spiralDynamicsStage', 'x', 'y', 'z'
+]
+
+
+class DetailStore:
+    """Full philosopher records kept as compact UTF-8 JSON.
+
+    Records are only decoded when a caller asks for one, so biographies,
+    switch points and other large nested fields never live in memory as
+    Python objects for the whole corpus.
+    """
+
+    def __init__(self, blob=None, offsets=None):
+        self._blob = bytearray() if blob is None else blob
+        self._offsets = [0] if offsets is None else offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    @property
+    def nbytes(self):
+        return len(self._blob)
+
+    @property
+    def blob(self):
+        return self._blob
+
+    @property
+    def offsets(self):
+        return self._offsets
+
+    @staticmethod
+    def encode(record):
+        """Compact UTF-8 JSON of a record, exactly as stored"""
+        return json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def append(self, record):
+        self._blob += self.encode(record)
+        self._offsets.append(len(self._blob))
+
+    def finalize(self):
+        """Freeze the store into a contiguous buffer and offset array"""
+        self._blob = bytes(self._blob)
+        self._offsets = np.asarray(self._offsets, dtype=np.int64)
+        return self
+
+    def raw(self, i):
+        """Encoded bytes of record i"""
+        return bytes(self._blob[self._offsets[i]:self._offsets[i + 1]])
+
+    def get(self, i):
+        """Decode record i"""
+        return json.loads(self.raw(i))
+
+    def digests(self):
+        """record_digest of every encoded record, as a uint64 array"""
+        view = memoryview(self._blob)
+        offsets = self._offsets
+        return np.fromiter((record_digest(view[offsets[i]:offsets[i + 1]]) for i in range(len(self))),
+                           dtype=np.uint64, count=len(self))
+
+
+def record_digest(encoded):
+    """64-bit content hash of an encoded record"""
+    return int.from_bytes(hashlib.blake2b(encoded, digest_size=8).digest(), 'little')
+
+
+def _year(value):
+    """Coerce a year value to a plain int, 0 when unknown"""
+    if isinstance(value, bool):
+        return 0
+    if isinstance(value, (int, float)) and np.isfinite(value):
+        return int(value)
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        return 0
+
+
+class PhilosopherStore:
+    """Columnar, typed representation of the philosopher corpus.
+
+    - ``frame``: one row per philosopher with categorical era, domain and
+      stage columns, int16 years and float32 coordinates. The row position
+      is the philosopher's integer id throughout the app.
+    - ``domains``: the domain vocabulary shared by the sparse matrices.
+    - domain membership (primaryDomain + allDomains) as CSR
+      ``domain_indptr`` / ``domain_indices``.
+    - domainStrengths as CSR ``strength_indptr`` / ``strength_indices`` /
+      ``strength_values``.
+    - ``details``: full records in a lazily decoded side store.
+    - ``id_index``: philosopher id -> row position hash index.
+    """
+
+    def __init__(self, frame, domains, domain_indptr, domain_indices,
+                 strength_indptr, strength_indices, strength_values, details):
+        self.frame = frame
+        self.domains = domains
+        self.domain_indptr = domain_indptr
+        self.domain_indices = domain_indices
+        self.strength_indptr = strength_indptr
+        self.strength_indices = strength_indices
+        self.strength_values = strength_values
+        self.details = details
+
+        # First occurrence wins when ids repeat
+        self.id_index = {}
+        for row, philosopher_id in enumerate(frame['id']):
+            self.id_index.setdefault(philosopher_id, row)
+
+    def __len__(self):
+        return len(self.frame)
+
+    @classmethod
+    def from_records(cls, records):
+        """Build a store from an iterable of raw records in a single pass"""
+        columns = {
+            'id': [], 'name': [], 'birthYear': [], 'deathYear': [],
+            'era': [], 'primaryDomain': [], 'spiralDynamicsStage': []
+        }
+        vocabulary = {}
+        domain_indices, domain_counts = [], []
+        strength_indices, strength_values, strength_counts = [], [], []
+        details = DetailStore()
+
+        def code(domain):
+            return vocabulary.setdefault(domain, len(vocabulary))
+
+        for philosopher in records:
+            primary = philosopher.get('primaryDomain', 'Unknown')
+            columns['id'].append(philosopher.get('id', ''))
+            columns['name'].append(philosopher.get('name', ''))
+            columns['birthYear'].append(_year(philosopher.get('birthYear', 0)))
+            columns['deathYear'].append(_year(philosopher.get('deathYear', 0)))
+            columns['era'].append(philosopher.get('era', 'Unknown'))
+            columns['primaryDomain'].append(primary)
+            columns['spiralDynamicsStage'].append(philosopher.get('spiralDynamicsStage', 'Unknown'))
+
+            # Domain membership: primary domain plus every listed domain
+            member = {code(primary)} if 'primaryDomain' in philosopher else set()
+            all_domains = philosopher.get('allDomains', [])
+            if isinstance(all_domains, list):
+                member.update(code(d) for d in all_domains if isinstance(d, str))
+            domain_indices.extend(sorted(member))
+            domain_counts.append(len(member))
+
+            strengths = philosopher.get('domainStrengths', {})
+            count = 0
+            if isinstance(strengths, dict):
+                for domain, value in strengths.items():
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        strength_indices.append(code(domain))
+                        strength_values.append(value)
+                        count += 1
+            strength_counts.append(count)
+
+            details.append(philosopher)
+
+        n = len(columns['id'])
+        frame = pd.DataFrame({
+            'id': pd.Series(columns['id'], dtype=object),
+            'name': pd.Series(columns['name'], dtype=object),
+            'birthYear': np.clip(columns['birthYear'], YEAR_MIN, YEAR_MAX).astype(np.int16),
+            'deathYear': np.clip(columns['deathYear'], YEAR_MIN, YEAR_MAX).astype(np.int16),
+            'era': pd.Categorical(columns['era']),
+            'primaryDomain': pd.Categorical(columns['primaryDomain']),
+            'spiralDynamicsStage': pd.Categorical(columns['spiralDynamicsStage']),
+            'x': np.zeros(n, dtype=np.float32),
+            'y': np.zeros(n, dtype=np.float32),
+            'z': np.zeros(n, dtype=np.float32)
+        })
+
+        return cls(
+            frame=frame,
+            domains=list(vocabulary),
+            domain_indptr=_indptr(domain_counts),
+            domain_indices=np.asarray(domain_indices, dtype=np.int16),
+            strength_indptr=_indptr(strength_counts),
+            strength_indices=np.asarray(strength_indices, dtype=np.int16),
+            strength_values=np.asarray(strength_values, dtype=np.float32),
+            details=details.finalize()
+        )
+
+    def with_changes(self, updates, inserts, deletes):
+        """A new store with records replaced, appended and removed.
+
+        updates maps row -> new record, inserts lists new records and
+        deletes lists rows to drop. Updated rows keep their relative
+        position, inserts go to the end and later rows move up over
+        deleted ones. Only the changed records are encoded; everything else
+        is copied across in contiguous runs.
+
+        Returns (store, remap) where remap[old_row] is the row's new
+        position, or -1 if it was deleted.
+        """
+        updated_rows = list(updates)
+        delta = PhilosopherStore.from_records([updates[row] for row in updated_rows] + list(inserts))
+
+        n = len(self)
+        keep = np.ones(n, dtype=bool)
+        keep[np.asarray(list(deletes), dtype=np.int64)] = False
+        n_kept = int(keep.sum())
+        remap = np.full(n, -1, dtype=np.int64)
+        remap[keep] = np.arange(n_kept)
+
+        # Source of every new row: (0, old row) or (1, delta row)
+        n_new = n_kept + len(inserts)
+        source = np.zeros(n_new, dtype=np.int8)
+        index = np.empty(n_new, dtype=np.int64)
+        index[:n_kept] = np.flatnonzero(keep)
+        if updated_rows:
+            positions = remap[np.asarray(updated_rows, dtype=np.int64)]
+            source[positions] = 1
+            index[positions] = np.arange(len(updated_rows))
+        source[n_kept:] = 1
+        index[n_kept:] = len(updated_rows) + np.arange(len(inserts))
+
+        # Maximal runs of consecutive rows from the same store
+        breaks = np.flatnonzero((source[1:] != source[:-1]) | (index[1:] != index[:-1] + 1)) + 1
+        starts = np.r_[0, breaks] if n_new else np.array([], dtype=np.int64)
+        stops = np.r_[breaks, n_new] if n_new else np.array([], dtype=np.int64)
+        runs = [(int(source[a]), int(index[a]), int(index[a]) + int(b - a)) for a, b in zip(starts, stops)]
+        stores = (self, delta)
+
+        # Delta domain codes are translated into the merged vocabulary
+        domains = list(self.domains) + [d for d in delta.domains if d not in set(self.domains)]
+        domain_code = {d: j for j, d in enumerate(domains)}
+        delta_codes = np.array([domain_code[d] for d in delta.domains], dtype=np.int16)
+        translate = (None, delta_codes)
+
+        def rows_of(get):
+            return np.concatenate([get(stores[s])[a:b] for s, a, b in runs]) if runs else get(self)[:0]
+
+        def ragged(indptr_of, values_of, codes=False):
+            counts, values = [], []
+            for s, a, b in runs:
+                indptr = indptr_of(stores[s])
+                counts.append(np.diff(indptr[a:b + 1]))
+                chunk = values_of(stores[s])[indptr[a]:indptr[b]]
+                values.append(translate[s][chunk] if codes and s else chunk)
+            if not runs:
+                return np.zeros(1, dtype=np.int64), values_of(self)[:0]
+            indptr = np.zeros(n_new + 1, dtype=np.int64)
+            np.cumsum(np.concatenate(counts), out=indptr[1:])
+            return indptr, np.concatenate(values)
+
+        columns = {}
+        for name in ('id', 'name'):
+            columns[name] = pd.Series(rows_of(lambda st: st.frame[name].to_numpy(dtype=object)), dtype=object)
+        for name in ('birthYear', 'deathYear', 'x', 'y', 'z'):
+            columns[name] = rows_of(lambda st: st.frame[name].to_numpy())
+        for name in ('era', 'primaryDomain', 'spiralDynamicsStage'):
+            old, new = self.frame[name].cat, delta.frame[name].cat
+            categories = list(old.categories) + [c for c in new.categories if c not in set(old.categories)]
+            lookup = {c: j for j, c in enumerate(categories)}
+            new_codes = np.array([lookup[c] for c in new.categories], dtype=np.int32)
+            codes_in = new.codes.to_numpy()
+            codes = (old.codes.to_numpy().astype(np.int32),
+                     np.where(codes_in >= 0, new_codes[np.maximum(codes_in, 0)], -1).astype(np.int32)
+                     if len(new_codes) else codes_in.astype(np.int32))
+            merged = np.concatenate([codes[s][a:b] for s, a, b in runs]) if runs else codes[0][:0]
+            columns[name] = pd.Categorical.from_codes(merged, categories).remove_unused_categories()
+        frame = pd.DataFrame(columns)[FRAME_COLUMNS]
+
+        domain_indptr, domain_indices = ragged(lambda st: st.domain_indptr, lambda st: st.domain_indices, True)
+        strength_indptr, strength_indices = ragged(lambda st: st.strength_indptr,
+                                                   lambda st: st.strength_indices, True)
+        _, strength_values = ragged(lambda st: st.strength_indptr, lambda st: st.strength_values)
+
+        pieces, lengths = [], []
+        for s, a, b in runs:
+            details = stores[s].details
+            offsets = details.offsets
+            pieces.append(memoryview(details.blob)[offsets[a]:offsets[b]])
+            lengths.append(np.diff(np.asarray(offsets[a:b + 1], dtype=np.int64)))
+        offsets = np.zeros(n_new + 1, dtype=np.int64)
+        if lengths:
+            np.cumsum(np.concatenate(lengths), out=offsets[1:])
+
+        store = PhilosopherStore(
+            frame=frame,
+            domains=domains,
+            domain_indptr=domain_indptr,
+            domain_indices=domain_indices.astype(np.int16),
+            strength_indptr=strength_indptr,
+            strength_indices=strength_indices.astype(np.int16),
+            strength_values=strength_values.astype(np.float32),
+            details=DetailStore(b''.join(pieces), offsets)
+        )
+        return store, remap
+
+    def set_coordinates(self, coords):
+        """Store an (n, 3) coordinate array as float32 x, y, z columns"""
+        coords = np.asarray(coords, dtype=np.float32)
+        self.frame['x'] = coords[:, 0]
+        self.frame['y'] = coords[:, 1]
+        self.frame['z'] = coords[:, 2]
+
+    def domain_code(self, domain):
+        """Integer code of a domain name, or None if it never occurs"""
+        try:
+            return self.domains.index(domain)
+        except ValueError:
+            return None
+
+    def member_domains(self):
+        """Domains that appear as a primary or listed domain"""
+        present = np.bincount(self.domain_indices, minlength=len(self.domains)) > 0
+        return [domain for domain, used in zip(self.domains, present) if used]
+
+    def domain_mask(self, domain):
+        """Boolean row mask of philosophers belonging to a domain"""
+        mask = np.zeros(len(self), dtype=bool)
+        code = self.domain_code(domain)
+        if code is not None:
+            rows = np.repeat(np.arange(len(self)), np.diff(self.domain_indptr))
+            mask[rows[self.domain_indices == code]] = True
+        return mask
+
+    def domain_matrix(self):
+        """Dense (n, d) boolean domain-membership matrix"""
+        return _dense(self.domain_indptr, self.domain_indices,
+                      np.ones(len(self.domain_indices), dtype=bool), len(self), len(self.domains))
+
+    def strength_matrix(self):
+        """Dense (n, d) float32 matrix of domainStrengths"""
+        return _dense(self.strength_indptr, self.strength_indices,
+                      self.strength_values, len(self), len(self.domains))
+
+    def record(self, row):
+        """Full raw record at a row position"""
+        return self.details.get(row)
+
+    def row_of(self, philosopher_id):
+        """Row position of a philosopher id, or None"""
+        return self.id_index.get(philosopher_id)
+
+    def rows_of(self, philosopher_ids):
+        """Row positions of the ids that exist, in the order given"""
+        rows = (self.id_index.get(philosopher_id) for philosopher_id in philosopher_ids)
+        return np.fromiter((row for row in rows if row is not None), dtype=np.int64)
+
+    def memory_usage(self):
+        """Approximate resident bytes of the store"""
+        arrays = [
+            self.domain_indptr, self.domain_indices, self.strength_indptr,
+            self.strength_indices, self.strength_values
+        ]
+        return int(self.frame.memory_usage(deep=True).sum()
+                   + sum(a.nbytes for a in arrays) + self.details.nbytes)
+
+
+def _indptr(counts):
+    indptr = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr
+
+
+def _dense(indptr, indices, values, n_rows, n_cols):
+    matrix = np.zeros((n_rows, n_cols), dtype=values.dtype)
+    rows = np.repeat(np.arange(n_rows), np.diff(indptr))
+    matrix[rows, indices] = values
+    return matrix
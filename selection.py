@@ -0,0 +1,70 @@
+from orb_lod import parse_cluster_id
+
+
+def event_ids(event, store=None):
+    """(philosopher ids, cluster ids) named by a plotly selection event.
+
+    Every selectable trace carries its point's identity in customdata[0]:
+    a philosopher id or, in the compact orb encoding, the philosopher's
+    store row for nodes, and an orb_lod cluster id for cluster markers.
+    Points are resolved by that, never by their index within a trace, so
+    selections spanning several traces (box, lasso, shift-click) work.
+    Rows are resolved against store and skipped without one. Points
+    without an id (lines, labels) are skipped. Ids keep the order they
+    were selected in, without duplicates.
+    """
+    selection = (event or {}).get('selection') or {}
+    philosopher_ids, cluster_ids = {}, {}
+    for point in selection.get('points') or ():
+        customdata = point.get('customdata')
+        if isinstance(customdata, (list, tuple)):
+            customdata = customdata[0] if customdata else None
+        if isinstance(customdata, (int, float)) and not isinstance(customdata, bool):
+            row = int(customdata)
+            if store is not None and row == customdata and 0 <= row < len(store):
+                philosopher_ids[store.frame['id'].iat[row]] = None
+            continue
+        if not isinstance(customdata, str):
+            continue
+        if parse_cluster_id(customdata) is not None:
+            cluster_ids[customdata] = None
+        else:
+            philosopher_ids[customdata] = None
+    return list(philosopher_ids), list(cluster_ids)
+
+
+def known_ids(store, philosopher_ids):
+    """The ids that exist in the store, in the order given (O(1) per id)"""
+    if store is None:
+        return []
+    return [philosopher_id for philosopher_id in philosopher_ids if store.row_of(philosopher_id) is not None]
+
+
+def apply_selection(state, event, store):
+    """Fold a chart selection event into a session's selection state.
+
+    state is a mapping with ``selected_philosophers`` (every selected id),
+    ``selected_philosopher`` (the one shown in the details panel) and
+    ``expanded_clusters``. Selected philosophers replace the previous
+    selection and the first newly added one becomes the focus; selected
+    cluster markers are expanded. An empty event clears the selection
+    but keeps the focus. Returns True when anything changed.
+    """
+    philosopher_ids, cluster_ids = event_ids(event, store)
+    philosopher_ids = known_ids(store, philosopher_ids)
+    before = (list(state.get('selected_philosophers') or []), state.get('selected_philosopher'),
+              list(state.get('expanded_clusters') or []))
+
+    expanded = before[2] + [cluster for cluster in cluster_ids if cluster not in before[2]]
+    state['expanded_clusters'] = expanded
+    if philosopher_ids:
+        state['selected_philosophers'] = philosopher_ids
+        added = [philosopher_id for philosopher_id in philosopher_ids if philosopher_id not in before[0]]
+        if added:
+            state['selected_philosopher'] = added[0]
+        elif before[1] not in philosopher_ids:
+            state['selected_philosopher'] = philosopher_ids[0]
+    elif not cluster_ids:
+        state['selected_philosophers'] = []
+    after = (list(state.get('selected_philosophers') or []), state.get('selected_philosopher'), expanded)
+    return after != before
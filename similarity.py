@@ -0,0 +1,276 @@
+import re
+import threading
+
+import numpy as np
+
+# Genome axes: (record key, values of the -1 pole, values of the +1 pole),
+# spelled as in the research prompt's schema and the shipped corpus
+GENOME_AXES = [
+    ('beingVsBecoming', ('being',), ('becoming', 'process')),
+    ('oneVsMany', ('one', 'monism', 'monist', 'unity'), ('many', 'pluralism', 'pluralist', 'plurality')),
+    ('mindVsMatter', ('mind', 'idealism', 'idealist'),
+     ('matter', 'materialism', 'materialist', 'physicalism', 'physicalist')),
+    ('freedomVsDeterminism', ('freedom', 'free will', 'libertarian', 'libertarianism'),
+     ('determinism', 'determinist')),
+    ('transcendentVsImmanent', ('transcendent', 'transcendence'), ('immanent', 'immanence')),
+    ('realismVsAntiRealism', ('realist', 'realism'),
+     ('anti-realist', 'anti-realism', 'nominalist', 'nominalism')),
+    ('reasonVsExperience', ('reason', 'rationalism', 'rationalist'), ('experience', 'empiricism', 'empiricist')),
+    ('absoluteVsRelative', ('absolute', 'absolutism', 'absolutist'), ('relative', 'relativism', 'relativist'))
+]
+# Positions between the poles, on any axis
+GENOME_MIDDLE = ('both', 'dualist', 'dualism', 'synthesis', 'neutral', 'compatibilist', 'compatibilism',
+                 'balanced', 'mixed')
+
+# Share of the similarity carried by the genome; domain strengths carry the rest
+GENOME_WEIGHT = 0.6
+
+# Corpora up to this size are searched exactly; larger ones through an IVF index
+EXACT_LIMIT = 20_000
+
+
+def _snake(key):
+    return re.sub(r'(?<!^)(?=[A-Z])', '_', key).lower()
+
+
+def _value_key(value):
+    """Spelling-insensitive form of a genome value: 'Anti-Realist' -> 'antirealist'"""
+    return ''.join(c for c in value.lower() if c.isalpha())
+
+
+def _vocabulary(negative, positive):
+    """value key -> position of one axis"""
+    vocabulary = {_value_key(value): 0.0 for value in GENOME_MIDDLE}
+    vocabulary.update((_value_key(value), -1.0) for value in negative)
+    vocabulary.update((_value_key(value), 1.0) for value in positive)
+    return vocabulary
+
+
+def _axis_value(value, vocabulary):
+    """Position of a genome value in [-1, 1]: NaN when missing, None when
+    the value is not in the axis vocabulary"""
+    if isinstance(value, dict):
+        value = value.get('position')
+    if not isinstance(value, str) or not value.strip():
+        return np.nan
+    return vocabulary.get(_value_key(value))
+
+
+class SimilarityBuilder:
+    """Collects each record's genome positions while records stream past.
+
+    Values outside an axis's vocabulary count as unknown (NaN), never as
+    a middle position, and are tallied in ``unmapped`` so a load can
+    report what the vocabulary misses.
+    """
+
+    def __init__(self):
+        self._rows = []
+        self._memo = {}
+        self._axes = [(key, _snake(key), _vocabulary(negative, positive)) for key, negative, positive in GENOME_AXES]
+        # (axis, value) -> records holding it
+        self.unmapped = {}
+
+    def add(self, philosopher):
+        genome = philosopher.get('philosophicalGenome')
+        if not isinstance(genome, dict):
+            self._rows.append((np.nan,) * len(GENOME_AXES))
+            return
+        values = []
+        for key, snake, vocabulary in self._axes:
+            value = genome.get(key)
+            if value is None:
+                value = genome.get(snake)
+            if isinstance(value, str):
+                encoded = self._memo.get((key, value))
+                if encoded is None:
+                    encoded = self._memo[key, value] = _axis_value(value, vocabulary)
+            else:
+                encoded = _axis_value(value, vocabulary)
+            if encoded is None:
+                raw = value.get('position') if isinstance(value, dict) else value
+                self.unmapped[key, raw] = self.unmapped.get((key, raw), 0) + 1
+                encoded = np.nan
+            values.append(encoded)
+        self._rows.append(tuple(values))
+
+    def genome(self):
+        """(n, axes) float32 positions in [-1, 1], NaN where unknown"""
+        return np.asarray(self._rows, dtype=np.float32).reshape(len(self._rows), len(GENOME_AXES))
+
+
+def feature_matrix(genome, strengths):
+    """Unit-length rows of genome positions and domain strengths.
+
+    Each block is normalized on its own and weighted by GENOME_WEIGHT, so
+    cosine similarity is a dot product. Rows with neither stay zero.
+    """
+    def unit(block):
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        return np.divide(block, norms, out=np.zeros_like(block), where=norms > 0)
+
+    genome = unit(np.nan_to_num(np.asarray(genome, dtype=np.float32)))
+    strengths = unit(np.clip(np.asarray(strengths, dtype=np.float32) / 100, 0, None))
+    features = np.hstack([np.sqrt(GENOME_WEIGHT) * genome, np.sqrt(1 - GENOME_WEIGHT) * strengths])
+    return unit(features.astype(np.float32))
+
+
+def _top_k(scores, k):
+    """Indices of the k largest scores along the last axis, best first"""
+    k = min(k, scores.shape[-1])
+    if k <= 0:
+        return np.zeros(scores.shape[:-1] + (0,), dtype=np.int64)
+    top = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=-1), axis=-1, kind='stable')
+    return np.take_along_axis(top, order, axis=-1)
+
+
+class SimilarityIndex:
+    """Nearest neighbours by philosophical position and domain profile.
+
+    ``features`` is a dense float32 matrix of unit rows (see
+    feature_matrix), so similarity is cosine. Up to exact_limit rows every
+    query is one matrix-vector product. Larger corpora get an inverted
+    file index, built on first use: rows are assigned to the nearest of
+    about sqrt(n) spherical k-means centroids and a query only scores the
+    rows of its nprobe nearest lists. A cached load passes the saved
+    ``features`` and ``present`` arrays instead of recomputing them.
+    """
+
+    def __init__(self, store, genome, exact_limit=EXACT_LIMIT, nprobe=8, features=None, present=None):
+        self.genome = np.asarray(genome, dtype=np.float32)
+        if features is None:
+            features = feature_matrix(self.genome, store.strength_matrix())
+            present = features.any(axis=1)
+        self.features = features
+        self.present = present
+        self.size = len(self.features)
+        self.exact = self.size <= exact_limit
+        self.exact_limit = exact_limit
+        self.nprobe = nprobe
+        self._ivf = None
+        self._lock = threading.Lock()
+
+    def rebased(self, store, remap, rows, records):
+        """Index for a store returned by PhilosopherStore.with_changes.
+
+        remap maps old rows to new ones (-1 when deleted); rows are the new
+        positions of the changed records, in the order of records.
+        """
+        genome = np.full((len(store), len(GENOME_AXES)), np.nan, dtype=np.float32)
+        kept = np.flatnonzero(remap >= 0)
+        genome[remap[kept]] = self.genome[kept]
+        builder = SimilarityBuilder()
+        for philosopher in records:
+            builder.add(philosopher)
+        if len(rows):
+            genome[np.asarray(rows, dtype=np.int64)] = builder.genome()
+        return SimilarityIndex(store, genome, self.exact_limit, self.nprobe)
+
+    def _build_ivf(self, iterations=8, seed=0):
+        rng = np.random.default_rng(seed)
+        candidates = np.flatnonzero(self.present)
+        n_lists = int(np.clip(np.sqrt(len(candidates)), 1, 4096))
+        sample = self.features[rng.choice(candidates, min(len(candidates), 64 * n_lists), replace=False)]
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)]
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty lists keep their old centroid
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids).astype(np.float32)
+
+        assign = np.empty(len(candidates), dtype=np.int64)
+        for start in range(0, len(candidates), 65536):
+            block = candidates[start:start + 65536]
+            assign[start:start + len(block)] = np.argmax(self.features[block] @ centroids.T, axis=1)
+        order = np.argsort(assign, kind='stable')
+        indptr = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assign, minlength=n_lists), out=indptr[1:])
+        return centroids, indptr, candidates[order]
+
+    def ivf(self):
+        """(centroids, list indptr, list rows), built once on first use"""
+        with self._lock:
+            if self._ivf is None:
+                self._ivf = self._build_ivf()
+            return self._ivf
+
+    def _candidates(self, vectors):
+        """Rows in the nprobe lists nearest to any of the vectors"""
+        centroids, indptr, list_rows = self.ivf()
+        probe = np.unique(_top_k(np.atleast_2d(vectors) @ centroids.T, self.nprobe))
+        return np.concatenate([list_rows[indptr[p]:indptr[p + 1]] for p in probe])
+
+    def search(self, vector, k=10, exclude=None, mask=None):
+        """Top-k rows most similar to a feature vector as (rows, similarities)"""
+        vector = np.asarray(vector, dtype=np.float32)
+        if self.exact or not self.present.any():
+            rows = np.flatnonzero(self.present)
+        else:
+            rows = self._candidates(vector)
+        if mask is not None:
+            rows = rows[mask[rows]]
+        if exclude is not None:
+            rows = rows[rows != exclude]
+        scores = self.features[rows] @ vector
+        top = _top_k(scores, k)
+        return rows[top], scores[top]
+
+    def neighbors(self, row, k=10, mask=None):
+        """Top-k rows most similar to a row, the row itself excluded"""
+        if not self.present[row]:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        return self.search(self.features[row], k, exclude=row, mask=mask)
+
+    def all_pairs(self, k=10, rows=None, block=256):
+        """Top-k neighbours of many rows at once.
+
+        Returns (neighbors, similarities), both (len(rows), k) and padded
+        with -1 / NaN where fewer neighbours exist. Exact below exact_limit;
+        above it query rows are grouped by IVF list and each group is scored
+        against the union of its members' probed lists.
+        """
+        rows = np.flatnonzero(self.present) if rows is None else np.asarray(rows, dtype=np.int64)
+        neighbors = np.full((len(rows), k), -1, dtype=np.int64)
+        similarities = np.full((len(rows), k), np.nan, dtype=np.float32)
+        if not len(rows) or not self.present.any():
+            return neighbors, similarities
+
+        if self.exact:
+            targets = np.flatnonzero(self.present)
+            groups = [(np.arange(a, min(a + block, len(rows))), targets) for a in range(0, len(rows), block)]
+        else:
+            # Group the query rows by their IVF list; each group shares candidates
+            centroids, _, _ = self.ivf()
+            home = np.argmax(self.features[rows] @ centroids.T, axis=1)
+            order = np.argsort(home, kind='stable')
+            bounds = np.flatnonzero(np.r_[True, home[order][1:] != home[order][:-1], True])
+            groups = []
+            for a, b in zip(bounds[:-1], bounds[1:]):
+                for i in range(a, b, block):
+                    members = order[i:min(i + block, b)]
+                    groups.append((members, self._candidates(self.features[rows[members]])))
+
+        for positions, targets in groups:
+            scores = self.features[rows[positions]] @ self.features[targets].T
+            # Never a row's own neighbour
+            scores[rows[positions][:, None] == targets[None, :]] = -np.inf
+            top = _top_k(scores, k)
+            found = top.shape[1]
+            neighbors[positions, :found] = targets[top]
+            similarities[positions, :found] = np.take_along_axis(scores, top, axis=1)
+        invalid = ~np.isfinite(similarities)
+        neighbors[invalid] = -1
+        similarities[invalid] = np.nan
+        return neighbors, similarities
+
+    def projection(self, dims=3):
+        """Rows projected on the top principal components of the features"""
+        features = self.features.astype(np.float64)
+        centered = features - features[self.present].mean(axis=0) if self.present.any() else features
+        _, vectors = np.linalg.eigh(centered.T @ centered)
+        projected = centered @ vectors[:, ::-1][:, :dims]
+        projected[~self.present] = 0
+        return projected
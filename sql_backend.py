@@ -0,0 +1,428 @@
+import json
+import re
+import sqlite3
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from corpus_loader import CorpusReader
+from influence_graph import INFLUENCE, relations
+
+SCHEMA_PATH = Path(__file__).resolve().parent / 'nexus' / 'db' / 'schema.sql'
+
+# Genome axes as JSON keys and their philosophers table columns
+GENOME_COLUMNS = {
+    'beingVsBecoming': 'being_vs_becoming',
+    'oneVsMany': 'one_vs_many',
+    'mindVsMatter': 'mind_vs_matter',
+    'freedomVsDeterminism': 'freedom_vs_determinism',
+    'transcendentVsImmanent': 'transcendent_vs_immanent',
+    'realismVsAntiRealism': 'realism_vs_antirealism',
+    'reasonVsExperience': 'reason_vs_experience',
+    'absoluteVsRelative': 'absolute_vs_relative'
+}
+
+PHILOSOPHER_COLUMNS = [
+    'id', 'name', 'birth_year', 'death_year', 'birth_city', 'birth_region', 'birth_country',
+    'birth_latitude', 'birth_longitude', 'primary_domain', 'era', 'era_position',
+    'spiral_dynamics_stage', 'spiral_justification', *GENOME_COLUMNS.values(),
+    'comprehensive_biography', 'intellectual_journey', 'historical_context'
+]
+
+# Text columns only read when a philosopher is selected
+BIOGRAPHY_COLUMNS = ('comprehensive_biography', 'intellectual_journey', 'historical_context')
+
+# Record keys the orb's processing reads (store columns, graph, genome
+# similarity, implications, embeddings); the summaries keep only these
+SUMMARY_KEYS = (
+    'id', 'name', 'birthYear', 'deathYear', 'era', 'primaryDomain', 'spiralDynamicsStage', 'allDomains',
+    'domainStrengths', 'philosophicalGenome', 'influences', 'critiques', 'implicationChains', 'embedding'
+)
+
+# SQLite additions to the shared schema: the full source record for the
+# details panel, domain membership exactly as the JSON path counts it, and
+# indexes for the filters pushed down from the app
+SQLITE_EXTRAS = """
+CREATE TABLE IF NOT EXISTS philosopher_records (
+  philosopher_id VARCHAR(100) PRIMARY KEY,
+  record TEXT,
+  FOREIGN KEY (philosopher_id) REFERENCES philosophers(id) ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS philosopher_domain_members (
+  philosopher_id VARCHAR(100),
+  domain TEXT,
+  FOREIGN KEY (philosopher_id) REFERENCES philosophers(id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_philosopher_domain_members_domain
+  ON philosopher_domain_members(domain, philosopher_id);
+CREATE INDEX IF NOT EXISTS idx_philosopher_domains_domain ON philosopher_domains(domain, philosopher_id);
+CREATE INDEX IF NOT EXISTS idx_domain_cascades_switch_point ON domain_cascades(switch_point_id);
+CREATE INDEX IF NOT EXISTS idx_philosophers_name ON philosophers(name COLLATE NOCASE);
+"""
+
+
+def sqlite_schema(sql):
+    """Translate the PostgreSQL schema in nexus/db/schema.sql for SQLite"""
+    sql = re.sub(r'\s+CASCADE;', ';', sql)
+    sql = re.sub(r'\bSERIAL PRIMARY KEY\b', 'INTEGER PRIMARY KEY AUTOINCREMENT', sql)
+    return sql
+
+
+def _text(value):
+    return None if value is None else str(value)
+
+
+def _truncate(value, length):
+    if value is None:
+        return None
+    value = str(value)
+    return value[:length]
+
+
+def normalize(philosopher):
+    """Row for the philosophers table, following the Node import script"""
+    location = philosopher.get('birthLocation') or {}
+    coordinates = location.get('coordinates') or [None, None]
+    genome = philosopher.get('philosophicalGenome') or {}
+
+    era_position = philosopher.get('eraPosition')
+    if isinstance(era_position, (int, float)) and not isinstance(era_position, bool):
+        era_position = era_position / 100 if era_position > 1 else era_position
+        era_position = min(max(era_position, 0), 0.99)
+    else:
+        era_position = 0.5
+
+    def genome_value(key):
+        value = genome.get(key)
+        if isinstance(value, dict):
+            value = value.get('position')
+        return _truncate(value or '', 100)
+
+    return (
+        philosopher.get('id'),
+        philosopher.get('name'),
+        philosopher.get('birthYear'),
+        philosopher.get('deathYear'),
+        location.get('city'),
+        location.get('region'),
+        location.get('modernCountry'),
+        coordinates[0] if len(coordinates) > 0 else None,
+        coordinates[1] if len(coordinates) > 1 else None,
+        # Filter columns are kept whole, with the store's defaults, so SQL
+        # filters match the JSON path (SQLite does not enforce VARCHAR sizes)
+        _text(philosopher.get('primaryDomain', 'Unknown')),
+        _text(philosopher.get('era', 'Unknown')),
+        era_position,
+        _text(philosopher.get('spiralDynamicsStage', 'Unknown')),
+        philosopher.get('spiralJustification'),
+        *(genome_value(key) for key in GENOME_COLUMNS),
+        philosopher.get('comprehensiveBiography') or philosopher.get('biography'),
+        philosopher.get('intellectualJourney'),
+        philosopher.get('historicalContext')
+    )
+
+
+def _domain_rows(philosopher):
+    """philosopher_domains rows: the raw domainStrengths values, as the JSON path reads them"""
+    strengths = philosopher.get('domainStrengths')
+    if not isinstance(strengths, dict):
+        return []
+    return [(philosopher.get('id'), domain, value) for domain, value in strengths.items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)]
+
+
+def _member_rows(philosopher):
+    """philosopher_domain_members rows: primaryDomain plus every listed
+    domain, like PhilosopherStore membership"""
+    domains = [philosopher['primaryDomain']] if 'primaryDomain' in philosopher else []
+    listed = philosopher.get('allDomains', [])
+    if isinstance(listed, list):
+        domains.extend(listed)
+    domains = [domain for domain in domains if isinstance(domain, str)]
+    return [(philosopher.get('id'), domain) for domain in dict.fromkeys(domains)]
+
+
+def _summary(philosopher):
+    """The parts of a record the orb's processing reads: no biography,
+    quotes, works or switch point arguments"""
+    summary = {key: philosopher[key] for key in SUMMARY_KEYS if key in philosopher}
+    ideas = philosopher.get('keyIdeas')
+    if isinstance(ideas, list):
+        summary['keyIdeas'] = [{'critiques': idea.get('critiques')} for idea in ideas
+                               if isinstance(idea, dict) and idea.get('critiques')]
+    points = philosopher.get('switchPoints')
+    if isinstance(points, list):
+        summary['switchPoints'] = [
+            {key: point[key] for key in ('question', 'position', 'domainCascades') if key in point}
+            for point in points if isinstance(point, dict)
+        ]
+    return summary
+
+
+def _like_pattern(term):
+    """LIKE pattern matching term anywhere, with %, _ and \\ taken literally"""
+    return '%' + re.sub(r'([\\%_])', r'\\\1', term) + '%'
+
+
+class SQLiteBackend:
+    """Philosopher data in an embedded SQLite file using nexus/db/schema.sql.
+
+    Domain, era, stage and name filters run as SQL against the indexed
+    tables and return matching ids, the orb only ever holds records cut
+    down to the fields its processing reads, and biographies and full
+    records are fetched one philosopher at a time when selected.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        # One connection per thread; Streamlit runs sessions on several threads
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path)
+            connection.execute('PRAGMA foreign_keys = ON')
+            # Python's lowercasing, so non-ASCII name searches fold case
+            # exactly like FilterIndex
+            connection.create_function('py_lower', 1, lambda value: str(value).lower(), deterministic=True)
+            self._local.connection = connection
+        return connection
+
+    def create_schema(self, schema_path=SCHEMA_PATH):
+        """(Re)create all tables; existing data is dropped"""
+        with self.connection as connection:
+            connection.executescript(sqlite_schema(Path(schema_path).read_text(encoding='utf-8')))
+            connection.executescript(SQLITE_EXTRAS)
+
+    def import_records(self, records, batch_size=500):
+        """Batch-insert raw records, replacing philosophers with the same id.
+
+        Influence and critique edges are inserted once every philosopher is
+        present, keeping only edges whose endpoints are both in the corpus
+        (the orb's graph is built from the stored records instead, and keeps
+        philosophers outside the corpus as external nodes).
+        Returns the number of philosophers imported.
+        """
+        connection = self.connection
+        placeholders = ', '.join('?' * len(PHILOSOPHER_COLUMNS))
+        updates = ', '.join(f"{c} = excluded.{c}" for c in PHILOSOPHER_COLUMNS[1:])
+        insert_philosopher = (
+            f"INSERT INTO philosophers ({', '.join(PHILOSOPHER_COLUMNS)}) VALUES ({placeholders}) "
+            f"ON CONFLICT (id) DO UPDATE SET {updates}, updated_at = CURRENT_TIMESTAMP"
+        )
+        next_switch_point = (connection.execute('SELECT COALESCE(MAX(id), 0) FROM switch_points')
+                             .fetchone()[0] + 1)
+
+        edges = []
+        count = 0
+        batch = []
+
+        def flush(batch):
+            ids = [(philosopher.get('id'),) for philosopher in batch]
+            # Replaced philosophers lose their old child rows
+            for table in ('philosopher_domains', 'philosopher_domain_members', 'switch_points'):
+                connection.executemany(f"DELETE FROM {table} WHERE philosopher_id = ?", ids)
+            connection.executemany(insert_philosopher, [normalize(p) for p in batch])
+            connection.executemany(
+                "INSERT INTO philosopher_domains (philosopher_id, domain, strength) VALUES (?, ?, ?)",
+                [row for p in batch for row in _domain_rows(p)])
+            connection.executemany(
+                "INSERT INTO philosopher_domain_members (philosopher_id, domain) VALUES (?, ?)",
+                [row for p in batch for row in _member_rows(p)])
+            connection.executemany(
+                "INSERT OR REPLACE INTO philosopher_records (philosopher_id, record) VALUES (?, ?)",
+                [(p.get('id'), json.dumps(p, ensure_ascii=False, separators=(',', ':'))) for p in batch])
+
+            nonlocal next_switch_point
+            switch_points, cascades = [], []
+            for p in batch:
+                for switch_point in p.get('switchPoints') or []:
+                    if not isinstance(switch_point, dict) or not switch_point.get('question') \
+                            or not switch_point.get('position'):
+                        continue
+                    switch_points.append((next_switch_point, p.get('id'), switch_point['question'],
+                                          switch_point['position'], switch_point.get('argument')))
+                    for domain, impact in (switch_point.get('domainCascades') or {}).items():
+                        if impact:
+                            cascades.append((next_switch_point, domain, str(impact)))
+                    next_switch_point += 1
+            connection.executemany(
+                "INSERT INTO switch_points (id, philosopher_id, question, position, argument) "
+                "VALUES (?, ?, ?, ?, ?)", switch_points)
+            connection.executemany(
+                "INSERT INTO domain_cascades (switch_point_id, domain, impact) VALUES (?, ?, ?)", cascades)
+
+        with connection:
+            for philosopher in records:
+                if not philosopher.get('id') or not philosopher.get('name'):
+                    continue
+                edges.extend(relations(philosopher))
+                batch.append(philosopher)
+                count += 1
+                if len(batch) >= batch_size:
+                    flush(batch)
+                    batch = []
+            if batch:
+                flush(batch)
+            self._insert_edges(edges)
+        return count
+
+    def _insert_edges(self, edges):
+        connection = self.connection
+        by_id = {row[0] for row in connection.execute('SELECT id FROM philosophers')}
+        by_name = {}
+        for philosopher_id, name in connection.execute('SELECT id, name FROM philosophers'):
+            by_name.setdefault(name.lower(), philosopher_id)
+
+        def resolve(ref):
+            ref_id, name = ref
+            if ref_id in by_id:
+                return ref_id
+            return by_name.get(name.lower()) if name else None
+
+        influences, critiques = {}, {}
+        for source_ref, target_ref, strength, kind in edges:
+            source, target = resolve(source_ref), resolve(target_ref)
+            if source is None or target is None or source == target:
+                continue
+            table = influences if kind == INFLUENCE else critiques
+            key = (source, target)
+            table[key] = max(table.get(key, 0), round(strength))
+
+        # The schema has no unique constraint on edges, so skip existing pairs
+        connection.executemany(
+            "INSERT INTO influences (source_philosopher_id, target_philosopher_id, strength) "
+            "SELECT ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM influences "
+            "WHERE source_philosopher_id = ? AND target_philosopher_id = ?)",
+            [(s, t, v, s, t) for (s, t), v in influences.items()])
+        connection.executemany(
+            "INSERT INTO critiques (critic_philosopher_id, target_philosopher_id, strength) "
+            "SELECT ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM critiques "
+            "WHERE critic_philosopher_id = ? AND target_philosopher_id = ?)",
+            [(s, t, v, s, t) for (s, t), v in critiques.items()])
+
+    def import_json(self, path, batch_size=500):
+        """Import a JSON corpus file; returns (count, LoadReport)"""
+        reader = CorpusReader(path)
+        count = self.import_records(reader, batch_size)
+        return count, reader.report
+
+    def count(self):
+        return self.connection.execute('SELECT COUNT(*) FROM philosophers').fetchone()[0]
+
+    def iter_summaries(self, text_index=None):
+        """Narrow records for the orb, in import order.
+
+        Each record is the stored source record cut down to the keys the
+        orb's processing reads (see _summary), so the store, influence
+        graph (external nodes included), genome similarity and implication
+        graph come out exactly as when the JSON file is loaded. Given a
+        TextSearchIndex, each full record is also queued into it under its
+        row, so full-text search ranks the same as on the JSON path.
+        """
+        cursor = self.connection.execute(
+            'SELECT r.record FROM philosophers p JOIN philosopher_records r ON r.philosopher_id = p.id '
+            'ORDER BY p.rowid')
+        for row, (text,) in enumerate(cursor):
+            record = json.loads(text)
+            if text_index is not None:
+                text_index.add(row, record)
+            yield _summary(record)
+
+    def select_ids(self, domains=None, eras=None, search_term=None, domain_mode='any', stages=None):
+        """Ids of philosophers matching the filters, evaluated in SQL.
+
+        Mirrors FilterIndex.select: domains combine with OR or AND, eras
+        and stages with OR, and the search term matches anywhere in the
+        name, case-insensitively. Full-text search is not done here; it
+        ranks with the in-process BM25 index like the JSON path.
+        """
+        clauses, params = [], []
+        if domains:
+            if domain_mode == 'all':
+                for domain in domains:
+                    clauses.append('EXISTS (SELECT 1 FROM philosopher_domain_members d '
+                                   'WHERE d.domain = ? AND d.philosopher_id = p.id)')
+                    params.append(domain)
+            else:
+                clauses.append(f"p.id IN (SELECT d.philosopher_id FROM philosopher_domain_members d "
+                               f"WHERE d.domain IN ({', '.join('?' * len(domains))}))")
+                params.extend(domains)
+        if eras:
+            clauses.append(f"p.era IN ({', '.join('?' * len(eras))})")
+            params.extend(eras)
+        if stages:
+            clauses.append(f"p.spiral_dynamics_stage IN ({', '.join('?' * len(stages))})")
+            params.extend(stages)
+        term = search_term.strip().lower() if search_term else ''
+        if term:
+            if term.isascii():
+                # LIKE folds ASCII case, which is all an ASCII term needs
+                clauses.append("p.name LIKE ? ESCAPE '\\'")
+                params.append(_like_pattern(term))
+            else:
+                clauses.append('instr(py_lower(p.name), ?) > 0')
+                params.append(term)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        return [row[0] for row in self.connection.execute(
+            f'SELECT p.id FROM philosophers p {where} ORDER BY p.rowid', params)]
+
+    def biography(self, philosopher_id):
+        """Long text fields of one philosopher, or None"""
+        row = self.connection.execute(
+            f"SELECT {', '.join(BIOGRAPHY_COLUMNS)} FROM philosophers WHERE id = ?", (philosopher_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('comprehensiveBiography', 'intellectualJourney', 'historicalContext'), row))
+
+    def record(self, philosopher_id):
+        """Full source record of one philosopher, or None"""
+        row = self.connection.execute(
+            'SELECT record FROM philosopher_records WHERE philosopher_id = ?', (philosopher_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def switch_points(self, philosopher_id):
+        """Switch points of one philosopher with their domain cascades"""
+        frame = pd.read_sql_query(
+            'SELECT s.id, s.question, s.position, s.argument, c.domain, c.impact '
+            'FROM switch_points s LEFT JOIN domain_cascades c ON c.switch_point_id = s.id '
+            'WHERE s.philosopher_id = ? ORDER BY s.id', self.connection, params=(philosopher_id,))
+        points = []
+        for _, group in frame.groupby('id', sort=False):
+            first = group.iloc[0]
+            points.append({
+                'question': first['question'],
+                'position': first['position'],
+                'argument': first['argument'],
+                'domainCascades': {d: i for d, i in zip(group['domain'], group['impact']) if d is not None}
+            })
+        return points
+
+
+def main(argv=None):
+    """Import a JSON corpus into a SQLite database:
+
+        python sql_backend.py nexus/data/philosophers.json data/philosophers.db
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import a philosopher corpus into SQLite")
+    parser.add_argument('source', help="JSON corpus file")
+    parser.add_argument('database', help="SQLite database file to create")
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args(argv)
+
+    backend = SQLiteBackend(args.database)
+    backend.create_schema()
+    count, report = backend.import_json(args.source, args.batch_size)
+    print(f"Imported {count} philosophers into {args.database} ({report.summary()})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,350 @@
+import copy
+import re
+from collections import Counter
+
+import numpy as np
+
+# Relative weight of each searchable field in the BM25 term frequency
+FIELD_WEIGHTS = {
+    'name': 3.0,
+    'works': 2.0,
+    'switchPoints': 1.5,
+    'quotes': 1.5,
+    'biography': 1.0
+}
+
+_WORD_RE = re.compile(r'\w+')
+STOPWORDS = frozenset(
+    'a an and are as at be by for from has he his in is it its of on or that the '
+    'this to was were which with'.split()
+)
+
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords"""
+    return [t for t in _WORD_RE.findall(str(text).lower()) if t not in STOPWORDS]
+
+
+def _collect(value, keys, out):
+    """Extend out[key] with every list stored under one of keys inside value"""
+    if isinstance(value, dict):
+        for k, v in value.items():
+            if k in out and isinstance(v, list):
+                out[k].extend(v)
+            elif isinstance(v, (dict, list)):
+                _collect(v, keys, out)
+    elif isinstance(value, list):
+        for v in value:
+            if isinstance(v, (dict, list)):
+                _collect(v, keys, out)
+    return out
+
+
+def searchable_fields(philosopher):
+    """Text of each searchable field of a raw record"""
+    switch_points = [
+        ' '.join(str(sp.get(part, '')) for part in ('question', 'position', 'argument'))
+        for sp in philosopher.get('switchPoints') or [] if isinstance(sp, dict)
+    ]
+    nested = _collect(philosopher, None, {'keyQuotes': [], 'majorWorks': [], 'keyWorks': []})
+    quotes = [q.get('quote', '') if isinstance(q, dict) else q for q in nested['keyQuotes']]
+    works = [
+        w.get('title', '') if isinstance(w, dict) else w
+        for w in nested['majorWorks'] + nested['keyWorks']
+    ]
+    return {
+        'name': philosopher.get('name', ''),
+        'biography': philosopher.get('comprehensiveBiography') or philosopher.get('biography') or '',
+        'switchPoints': ' '.join(switch_points),
+        'quotes': ' '.join(str(q) for q in quotes),
+        'works': ' '.join(str(w) for w in works)
+    }
+
+
+class TextSearchIndex:
+    """In-process BM25 full-text index over philosopher records.
+
+    Postings live in a compact CSR segment (term -> rows, weighted term
+    frequencies) built once at load time. ``update`` and ``remove`` mark the
+    row's segment postings stale and keep its new postings in a small delta
+    dict until ``compact`` folds them back into the segment, so edits never
+    rebuild the whole index.
+    """
+
+    def __init__(self, k1=1.2, b=0.75, field_weights=FIELD_WEIGHTS):
+        self.k1 = k1
+        self.b = b
+        self.field_weights = field_weights
+        self.vocabulary = {}
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.rows = np.array([], dtype=np.int32)
+        self.tfs = np.array([], dtype=np.float32)
+        self.doc_len = np.array([], dtype=np.float32)
+        self.live = np.array([], dtype=bool)
+        self.stale = np.array([], dtype=bool)
+        self._delta = {}
+        self._delta_terms = {}
+        self._dirty = False
+        self._pending = ([], [], [], [])
+
+    def __len__(self):
+        return int(self.live.sum())
+
+    @classmethod
+    def from_arrays(cls, terms, indptr, rows, tfs, doc_len, live, **params):
+        """Rebuild a compacted index from its persisted arrays"""
+        index = cls(**params)
+        index.vocabulary = {term: i for i, term in enumerate(terms)}
+        index.indptr, index.rows, index.tfs = indptr, rows, tfs
+        index.doc_len = np.array(doc_len, dtype=np.float32)
+        index.live = np.array(live, dtype=bool)
+        index.stale = np.zeros(len(index.live), dtype=bool)
+        return index
+
+    def copy(self):
+        """Copy that can be edited while the original is still searched.
+
+        The postings segment is shared, since edits only ever replace it;
+        the per-row arrays, vocabulary and delta postings, which edits
+        change in place, are copied.
+        """
+        index = copy.copy(self)
+        index.doc_len, index.live, index.stale = self.doc_len.copy(), self.live.copy(), self.stale.copy()
+        index.vocabulary = dict(self.vocabulary)
+        index._delta = {row: dict(entry) for row, entry in self._delta.items()}
+        index._delta_terms = {term_id: set(rows) for term_id, rows in self._delta_terms.items()}
+        return index
+
+    @property
+    def terms(self):
+        """Vocabulary in term-id order"""
+        return list(self.vocabulary)
+
+    def _term_weights(self, philosopher):
+        weights = Counter()
+        for field, text in searchable_fields(philosopher).items():
+            weight = self.field_weights.get(field, 1.0)
+            for token in tokenize(text):
+                weights[token] += weight
+        return weights
+
+    def _term_id(self, term):
+        return self.vocabulary.setdefault(term, len(self.vocabulary))
+
+    def _grow(self, size):
+        if size > len(self.doc_len):
+            extra = size - len(self.doc_len)
+            self.doc_len = np.concatenate([self.doc_len, np.zeros(extra, dtype=np.float32)])
+            self.live = np.concatenate([self.live, np.zeros(extra, dtype=bool)])
+            self.stale = np.concatenate([self.stale, np.zeros(extra, dtype=bool)])
+
+    def add(self, row, philosopher):
+        """Queue a record for the initial build; call finalize() afterwards"""
+        weights = self._term_weights(philosopher)
+        terms, rows, tfs, lengths = self._pending
+        for term, tf in weights.items():
+            terms.append(self._term_id(term))
+            rows.append(row)
+            tfs.append(tf)
+        lengths.append((row, sum(weights.values())))
+
+    def finalize(self):
+        """Build the CSR segment from the queued records"""
+        terms, rows, tfs, lengths = self._pending
+        self._pending = ([], [], [], [])
+        if lengths:
+            doc_rows, doc_lengths = zip(*lengths)
+            self._grow(max(doc_rows) + 1)
+            self.doc_len[list(doc_rows)] = doc_lengths
+            self.live[list(doc_rows)] = True
+        self._build(np.asarray(terms, dtype=np.int64), np.asarray(rows, dtype=np.int32),
+                    np.asarray(tfs, dtype=np.float32))
+        return self
+
+    def _build(self, terms, rows, tfs):
+        order = np.lexsort((rows, terms))
+        self.indptr = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=len(self.vocabulary)), out=self.indptr[1:])
+        self.rows = rows[order]
+        self.tfs = tfs[order]
+        self.stale = np.zeros(len(self.stale), dtype=bool)
+        self._delta = {}
+        self._delta_terms = {}
+        self._dirty = False
+
+    def update(self, row, philosopher):
+        """Replace (or add) the indexed text of one row"""
+        self.remove(row)
+        weights = self._term_weights(philosopher)
+        self._grow(row + 1)
+        entry = {}
+        for term, tf in weights.items():
+            term_id = self._term_id(term)
+            entry[term_id] = tf
+            self._delta_terms.setdefault(term_id, set()).add(row)
+        self._delta[row] = entry
+        self.doc_len[row] = sum(weights.values())
+        self.live[row] = True
+
+    def remove(self, row):
+        """Drop a row from the index"""
+        if row >= len(self.live):
+            return
+        self.stale[row] = True
+        self._dirty = True
+        self.live[row] = False
+        self.doc_len[row] = 0
+        for term_id in self._delta.pop(row, {}):
+            self._delta_terms[term_id].discard(row)
+
+    def compact(self):
+        """Fold delta postings into the CSR segment"""
+        if not self._dirty:
+            return
+        term_ids = np.repeat(np.arange(len(self.indptr) - 1), np.diff(self.indptr))
+        keep = ~self.stale[self.rows]
+        terms, rows, tfs = [term_ids[keep]], [self.rows[keep]], [self.tfs[keep]]
+        for row, entry in self._delta.items():
+            terms.append(np.fromiter(entry.keys(), dtype=np.int64, count=len(entry)))
+            rows.append(np.full(len(entry), row, dtype=np.int32))
+            tfs.append(np.fromiter(entry.values(), dtype=np.float32, count=len(entry)))
+        self._build(np.concatenate(terms), np.concatenate(rows), np.concatenate(tfs))
+
+    def remap(self, remap, size):
+        """Move rows to new positions; rows mapped to -1 are dropped.
+
+        remap must keep the surviving rows in order, as the remap returned
+        by PhilosopherStore.with_changes does. Only replaces arrays, so a
+        shallow copy can be remapped while the original is still searched.
+        """
+        self.compact()
+        term_ids = np.repeat(np.arange(len(self.indptr) - 1), np.diff(self.indptr))
+        rows = remap[self.rows]
+        keep = rows >= 0
+        self.indptr = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids[keep], minlength=len(self.vocabulary)), out=self.indptr[1:])
+        self.rows = rows[keep].astype(np.int32)
+        self.tfs = np.asarray(self.tfs)[keep]
+
+        old = np.flatnonzero(remap[:len(self.doc_len)] >= 0)
+        doc_len = np.zeros(size, dtype=np.float32)
+        live = np.zeros(size, dtype=bool)
+        doc_len[remap[old]] = self.doc_len[old]
+        live[remap[old]] = self.live[old]
+        self.doc_len, self.live = doc_len, live
+        self.stale = np.zeros(size, dtype=bool)
+        self._delta = {}
+        self._delta_terms = {}
+
+    def _postings(self, term_id):
+        """Current (rows, tfs) of a term, skipping stale segment postings"""
+        rows = tfs = None
+        if term_id < len(self.indptr) - 1:
+            span = slice(self.indptr[term_id], self.indptr[term_id + 1])
+            rows, tfs = self.rows[span], self.tfs[span]
+            if self._dirty:
+                keep = ~self.stale[rows]
+                rows, tfs = rows[keep], tfs[keep]
+        delta_rows = self._delta_terms.get(term_id)
+        if delta_rows:
+            extra_rows = np.fromiter(delta_rows, dtype=np.int32, count=len(delta_rows))
+            extra_tfs = np.array([self._delta[r][term_id] for r in delta_rows], dtype=np.float32)
+            if rows is None:
+                return extra_rows, extra_tfs
+            return np.concatenate([rows, extra_rows]), np.concatenate([tfs, extra_tfs])
+        if rows is None:
+            return np.array([], dtype=np.int32), np.array([], dtype=np.float32)
+        return rows, tfs
+
+    def scores(self, query):
+        """BM25 score of every row for a query (zero where nothing matches)"""
+        size = len(self.doc_len)
+        total = np.zeros(size, dtype=np.float32)
+        n_docs = len(self)
+        if n_docs == 0:
+            return total
+        avg_len = float(self.doc_len.sum()) / n_docs or 1.0
+        norm = self.k1 * (1 - self.b + self.b * self.doc_len / avg_len)
+
+        for term in set(tokenize(query)):
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            rows, tfs = self._postings(term_id)
+            if len(rows) == 0:
+                continue
+            idf = np.log1p((n_docs - len(rows) + 0.5) / (len(rows) + 0.5))
+            total += np.bincount(rows, weights=idf * tfs * (self.k1 + 1) / (tfs + norm[rows]),
+                                 minlength=size).astype(np.float32)
+        return total
+
+    def search(self, query, k=20, mask=None):
+        """Top-k matching rows for a query as (rows, scores), best first.
+
+        mask optionally restricts results to a boolean row selection;
+        k=None returns every matching row.
+        """
+        scores = self.scores(query)
+        if mask is not None:
+            scores = np.where(mask[:len(scores)], scores, 0)
+        matches = np.flatnonzero(scores > 0)
+        if k is not None and len(matches) > k:
+            matches = matches[np.argpartition(-scores[matches], k - 1)[:k]]
+        order = np.argsort(-scores[matches], kind='stable')
+        return matches[order], scores[matches][order]
+
+
+class EmbeddingIndex:
+    """Optional dense vectors for semantic search, one float32 row per record.
+
+    Vectors are L2-normalized on the way in so a cosine top-k is a single
+    matrix-vector product. Rows without a vector stay zero and never match.
+    """
+
+    def __init__(self, size, dim):
+        self.vectors = np.zeros((size, dim), dtype=np.float32)
+        self.present = np.zeros(size, dtype=bool)
+
+    @property
+    def dim(self):
+        return self.vectors.shape[1]
+
+    def set(self, rows, vectors):
+        """Store vectors for the given rows, growing the matrix if needed"""
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.int64))
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        if len(rows) and rows.max() >= len(self.vectors):
+            extra = int(rows.max()) + 1 - len(self.vectors)
+            self.vectors = np.vstack([self.vectors, np.zeros((extra, self.dim), dtype=np.float32)])
+            self.present = np.concatenate([self.present, np.zeros(extra, dtype=bool)])
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.vectors[rows] = vectors / np.where(norms > 0, norms, 1)
+        self.present[rows] = True
+
+    def remap(self, remap, size):
+        """Move rows to new positions; rows mapped to -1 are dropped"""
+        old = np.flatnonzero(remap[:len(self.vectors)] >= 0)
+        vectors = np.zeros((size, self.dim), dtype=np.float32)
+        present = np.zeros(size, dtype=bool)
+        vectors[remap[old]] = self.vectors[old]
+        present[remap[old]] = self.present[old]
+        self.vectors, self.present = vectors, present
+
+    def remove(self, row):
+        if row < len(self.vectors):
+            self.vectors[row] = 0
+            self.present[row] = False
+
+    def search(self, vector, k=20, mask=None):
+        """Top-k rows by cosine similarity as (rows, similarities)"""
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        similarity = self.vectors @ (vector / norm)
+        candidates = self.present if mask is None else self.present & mask[:len(self.present)]
+        rows = np.flatnonzero(candidates)
+        if len(rows) > k:
+            rows = rows[np.argpartition(-similarity[rows], k - 1)[:k]]
+        order = np.argsort(-similarity[rows], kind='stable')
+        return rows[order], similarity[rows][order]
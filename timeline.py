@@ -0,0 +1,130 @@
+import numpy as np
+
+# Lifespan assumed when only one of birthYear and deathYear is known
+TYPICAL_LIFESPAN = 70
+# Longer lifespans are treated as data errors and kept off the fast path
+MAX_LIFESPAN = 130
+
+
+def format_year(year):
+    """Render a year for display, e.g. 384 BCE"""
+    year = int(year)
+    return f"{-year} BCE" if year < 0 else str(year)
+
+
+class LifespanIndex:
+    """Sorted interval index over philosopher lifespans.
+
+    Birth and death years are kept as ``start`` and ``end`` arrays plus
+    two sort orders (rows by start, ends sorted), so every query is a few
+    binary searches and one vectorized filter:
+
+    - alive(year): rows whose lifespan contains the year. Only rows born
+      in the MAX_LIFESPAN years before it can qualify, so the candidates
+      are one slice of the start order.
+    - contemporaries(row): rows whose lifespan overlaps the row's.
+    - alive_counts(years) and density(step): how many were alive, for
+      many years at once.
+
+    A year of 0 means unknown (the store's convention). Rows with one
+    unknown year get TYPICAL_LIFESPAN; rows with neither are undated and
+    never match. The few spans longer than MAX_LIFESPAN are checked
+    separately on every query.
+    """
+
+    def __init__(self, store):
+        frame = store.frame
+        birth = frame['birthYear'].to_numpy().astype(np.int32)
+        death = frame['deathYear'].to_numpy().astype(np.int32)
+        self.size = len(store)
+
+        self.dated = (birth != 0) | (death != 0)
+        start = np.where(birth != 0, birth, death - TYPICAL_LIFESPAN)
+        end = np.where(death != 0, death, birth + TYPICAL_LIFESPAN)
+        self.start = np.minimum(start, end)
+        self.end = np.maximum(start, end)
+
+        dated_rows = np.flatnonzero(self.dated)
+        long = (self.end - self.start)[dated_rows] > MAX_LIFESPAN
+        self.long_rows = dated_rows[long]
+        indexed = dated_rows[~long]
+
+        self.by_start = indexed[np.argsort(self.start[indexed], kind='stable')]
+        self.sorted_starts = self.start[self.by_start]
+        # Every dated row, for counting
+        self.all_starts = np.sort(self.start[dated_rows])
+        self.all_ends = np.sort(self.end[dated_rows])
+
+    def __len__(self):
+        return len(self.all_starts)
+
+    @property
+    def span(self):
+        """(earliest, latest) year covered, or None without dated rows"""
+        if not len(self.all_starts):
+            return None
+        return int(self.all_starts[0]), int(self.all_ends[-1])
+
+    def _overlapping(self, lo, hi):
+        """Sorted rows whose lifespan overlaps [lo, hi]"""
+        a = np.searchsorted(self.sorted_starts, lo - MAX_LIFESPAN, side='left')
+        b = np.searchsorted(self.sorted_starts, hi, side='right')
+        candidates = self.by_start[a:b]
+        rows = candidates[self.end[candidates] >= lo]
+        if len(self.long_rows):
+            long = self.long_rows
+            rows = np.concatenate([rows, long[(self.start[long] <= hi) & (self.end[long] >= lo)]])
+        return np.sort(rows)
+
+    def alive(self, year):
+        """Sorted rows of the philosophers alive in a year"""
+        return self._overlapping(year, year)
+
+    def alive_mask(self, year):
+        """Boolean row mask of the philosophers alive in a year"""
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.alive(year)] = True
+        return mask
+
+    def contemporaries(self, row):
+        """Rows whose lifespan overlaps the row's, longest overlap first.
+
+        Returns (rows, overlap_years); the row itself is excluded and an
+        undated row has no contemporaries.
+        """
+        if not self.dated[row]:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int32)
+        lo, hi = self.start[row], self.end[row]
+        rows = self._overlapping(lo, hi)
+        rows = rows[rows != row]
+        overlap = np.minimum(self.end[rows], hi) - np.maximum(self.start[rows], lo) + 1
+        order = np.argsort(-overlap, kind='stable')
+        return rows[order], overlap[order]
+
+    def alive_counts(self, years):
+        """Number of philosophers alive in each of an array of years"""
+        years = np.asarray(years)
+        born = np.searchsorted(self.all_starts, years, side='right')
+        dead = np.searchsorted(self.all_ends, years, side='left')
+        return born - dead
+
+    def density(self, step=10, rows=None):
+        """Philosophers alive at some point in each period of step years.
+
+        Periods are aligned to multiples of step. Returns (period_starts,
+        counts), covering the span of the given rows (default: all rows).
+        """
+        if rows is None:
+            starts, ends = self.all_starts, self.all_ends
+        else:
+            rows = np.asarray(rows, dtype=np.int64)
+            rows = rows[self.dated[rows]]
+            starts, ends = np.sort(self.start[rows]), np.sort(self.end[rows])
+        if not len(starts):
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+        first = starts[0] // step * step
+        periods = np.arange(first, ends[-1] + 1, step, dtype=np.int64)
+        # Born before a period ends, minus died before it began
+        born = np.searchsorted(starts, periods + step - 1, side='right')
+        dead = np.searchsorted(ends, periods, side='left')
+        return periods, born - dead
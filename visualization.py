@@ -1,17 +1,193 @@
 import plotly.graph_objects as go
-import plotly.express as px
 import numpy as np
 import pandas as pd
+from functools import lru_cache
+from orb_layout import WEDGE_DOMAINS
+from orb_lod import plan_detail, cluster_id
+from figure_payload import rows_digest
+from instrumentation import instrumented
+
+DOMAIN_COLORS = {
+    'Logic': '#FF0000',
+    'Ethics': '#00FFFF',
+    'Metaphysics': '#FF00FF',
+    'Politics': '#FFFF00',
+    'Aesthetics': '#FFA500'
+}
+
+WEDGE_RADII = (4, 5, 6)
+
+# Compact encoding splits an era's nodes by domain only from this many
+# nodes on; below it per-node domain strings cost less than extra traces
+COMPACT_SPLIT_MIN = 512
+
+THEMES = {
+    'phosphor': {
+        'primary': '#00FF00',
+        'background': 'rgba(0,0,0,1)',
+        'legend_background': 'rgba(0,0,0,0.9)',
+        'font_family': 'monospace'
+    }
+}
+
+
+def _frozen(*arrays):
+    """Mark cached geometry read-only so callers cannot mutate it"""
+    for array in arrays:
+        array.flags.writeable = False
+    return arrays
+
+
+def _join_segments(segments):
+    """Concatenate line segments into one array with NaN separators"""
+    parts = []
+    for segment in segments:
+        parts.append(segment)
+        parts.append([np.nan])
+    return np.concatenate(parts[:-1]) if parts else np.array([])
+
+
+@lru_cache(maxsize=8)
+def wireframe_geometry(radius=5):
+    """Longitude and latitude lines of the orb as one NaN-separated polyline"""
+    u = np.linspace(0, 2 * np.pi, 30)
+    v = np.linspace(0, np.pi, 20)
+    
+    xs, ys, zs = [], [], []
+    # Longitude lines
+    for theta in u[::3]:
+        xs.append(radius * np.sin(v) * np.cos(theta))
+        ys.append(radius * np.sin(v) * np.sin(theta))
+        zs.append(radius * np.cos(v))
+    # Latitude lines
+    for phi in v[1:-1:2]:
+        xs.append(radius * np.sin(phi) * np.cos(u))
+        ys.append(radius * np.sin(phi) * np.sin(u))
+        zs.append(radius * np.cos(phi) * np.ones_like(u))
+    
+    return _frozen(*(_join_segments(c).astype(np.float32) for c in (xs, ys, zs)))
+
+
+@lru_cache(maxsize=8)
+def wedge_geometry(radii=WEDGE_RADII):
+    """Equatorial arcs of every domain wedge as one NaN-separated polyline.
+
+    Returns x, y, z and a per-vertex wedge index for coloring through
+    wedge_colorscale().
+    """
+    xs, ys, codes = [], [], []
+    for k, (domain, angle_offset) in enumerate(WEDGE_DOMAINS):
+        angle_rad = np.radians(angle_offset)
+        angles = np.linspace(angle_rad, angle_rad + np.radians(72), 10)
+        for r in radii:
+            xs.append(r * np.cos(angles))
+            ys.append(r * np.sin(angles))
+            codes.append(np.full(len(angles), k, dtype=np.int8))
+    
+    x = _join_segments(xs).astype(np.float32)
+    y = _join_segments(ys).astype(np.float32)
+    z = np.where(np.isnan(x), np.nan, 0.0).astype(np.float32)
+    # Separator vertices take the color of the segment they follow
+    code = np.concatenate([np.append(c, c[-1]) for c in codes])[:len(x)]
+    return _frozen(x, y, z, code)
+
+
+@lru_cache(maxsize=1)
+def wedge_colorscale():
+    """Stepped colorscale mapping wedge indices to their domain colors"""
+    n = len(WEDGE_DOMAINS)
+    scale = []
+    for k, (domain, _) in enumerate(WEDGE_DOMAINS):
+        scale.append([k / n, DOMAIN_COLORS[domain]])
+        scale.append([(k + 1) / n, DOMAIN_COLORS[domain]])
+    return scale
+
+
+@lru_cache(maxsize=16)
+def static_scene(radius=5, theme='phosphor'):
+    """Cached figure dict of the orb's static scene for a radius and theme.
+
+    Callers must copy it (e.g. through go.Figure) before modifying.
+    """
+    orb = PhilosophicalOrb(None, render_mode='batched', radius=radius, theme=theme)
+    return orb.build_static_scene().to_dict()
+
 
 class PhilosophicalOrb:
-    """Creates 3D visualizations for the philosophical nexus"""
+    """Creates 3D visualizations for the philosophical nexus.
+
+    In the default ``batched`` render mode the wireframe and the domain
+    wedges are each drawn as a single trace built from cached geometry,
+    and the whole static scene (sphere, wedges and layout) is cached per
+    radius and theme so each rerun only builds the philosopher node
+    traces. ``legacy`` rebuilds everything with one trace per line.
     
-    def __init__(self, data_processor):
+    With ``lod`` enabled (batched mode only) large node sets are drawn
+    through add_philosopher_nodes_lod so the figure stays bounded.
+    
+    The ``compact`` encoding keeps the node payload small: coordinates
+    travel as float32 typed arrays, customdata as one int32 typed array
+    of (store row, birth year, death year), and era, domain and color are
+    per-trace constants (one trace per era and domain) instead of strings
+    repeated for every node. ``plain`` sends one trace per era with
+    per-node hover fields and the philosopher id first in customdata
+    (see selection.py for how both resolve). With a payload_cache, cached_3d_orb
+    rebuilds earlier renders of the same rows from their gzip-compressed
+    JSON instead of constructing them again (the browser payload is the
+    same either way).
+    """
+    
+    def __init__(self, data_processor, render_mode='batched', radius=5, theme='phosphor',
+                 lod=True, max_nodes=2000, label_top_n=40, label_by='centrality',
+                 encoding='compact', payload_cache=None):
         self.data_processor = data_processor
+        self.render_mode = render_mode
+        self.radius = radius
+        self.theme = theme
+        self.colors = THEMES[theme]
+        self.lod = lod
+        self.max_nodes = max_nodes
+        self.label_top_n = label_top_n
+        self.label_by = label_by
+        self.encoding = encoding
+        self.payload_cache = payload_cache
+    
+    @instrumented()
+    def cached_3d_orb(self, philosophers_df, expanded_clusters=(), version=None):
+        """create_3d_orb through the payload cache.
+
+        The key is the dataset version, the rows drawn (in order), their
+        coordinates' layout and the expanded clusters, so every filter
+        state that selects the same rows shares one entry. A hit skips
+        figure construction, not the serialization st.plotly_chart does.
+        """
+        if self.payload_cache is None:
+            return self.create_3d_orb(philosophers_df, expanded_clusters)
+        
+        key = (
+            version, rows_digest(philosophers_df.index.to_numpy()),
+            rows_digest(philosophers_df[['x', 'y', 'z']].to_numpy(dtype=np.float32).view(np.int32).ravel()),
+            tuple(expanded_clusters)
+        )
+        fig = self.payload_cache.get(key)
+        if fig is None:
+            fig = self.create_3d_orb(philosophers_df, expanded_clusters)
+            self.payload_cache.put(key, fig)
+        return fig
     
-    def create_3d_orb(self, philosophers_df):
+    @instrumented()
+    def create_3d_orb(self, philosophers_df, expanded_clusters=()):
         """Create the main 3D orb visualization"""
         
+        if self.render_mode == 'batched':
+            # Start from the cached static scene and only add the nodes
+            fig = go.Figure(static_scene(self.radius, self.theme))
+            if self.lod:
+                self.add_philosopher_nodes_lod(fig, philosophers_df, expanded_clusters)
+            else:
+                self.add_philosopher_nodes(fig, philosophers_df)
+            return fig
+        
         fig = go.Figure()
         
         # Add wireframe sphere
@@ -28,6 +204,15 @@ class PhilosophicalOrb:
         
         return fig
     
+    def build_static_scene(self):
+        """Figure with everything except the philosopher nodes"""
+        fig = go.Figure()
+        self.add_wireframe_sphere_batched(fig, self.radius)
+        self.add_domain_wedges_batched(fig)
+        self.configure_layout(fig)
+        return fig
+    
+    @instrumented()
     def add_wireframe_sphere(self, fig, radius=5):
         """Add wireframe sphere to represent the orb structure"""
         
@@ -45,7 +230,7 @@ class PhilosophicalOrb:
             fig.add_trace(go.Scatter3d(
                 x=x_line, y=y_line, z=z_line,
                 mode='lines',
-                line=dict(color='#00FF00', width=1),
+                line=dict(color=self.colors['primary'], width=1),
                 showlegend=False,
                 hoverinfo='skip'
             ))
@@ -60,17 +245,35 @@ class PhilosophicalOrb:
             fig.add_trace(go.Scatter3d(
                 x=x_line, y=y_line, z=z_line,
                 mode='lines',
-                line=dict(color='#00FF00', width=1),
+                line=dict(color=self.colors['primary'], width=1),
                 showlegend=False,
                 hoverinfo='skip'
             ))
     
-    def add_philosopher_nodes(self, fig, philosophers_df):
+    @instrumented()
+    def add_wireframe_sphere_batched(self, fig, radius=5):
+        """Add the wireframe sphere as a single line trace"""
+        x_line, y_line, z_line = wireframe_geometry(radius)
+        
+        fig.add_trace(go.Scatter3d(
+            x=x_line, y=y_line, z=z_line,
+            mode='lines',
+            line=dict(color=self.colors['primary'], width=1),
+            showlegend=False,
+            hoverinfo='skip'
+        ))
+    
+    @instrumented()
+    def add_philosopher_nodes(self, fig, philosophers_df, labels=True):
         """Add philosopher nodes to the visualization"""
         
         if philosophers_df.empty:
             return
         
+        if self.encoding == 'compact':
+            self.add_philosopher_nodes_compact(fig, philosophers_df, labels)
+            return
+        
         # Group by era for better visualization
         eras = philosophers_df['era'].unique()
         
@@ -81,27 +284,145 @@ class PhilosophicalOrb:
                 x=era_df['x'],
                 y=era_df['y'],
                 z=era_df['z'],
-                mode='markers+text',
+                mode='markers+text' if labels else 'markers',
                 marker=dict(
                     size=8,
                     color=era_df['color'],
                     opacity=0.8,
-                    line=dict(width=2, color='#00FF00')
+                    line=dict(width=2, color=self.colors['primary'])
                 ),
                 text=era_df['name'],
                 textposition="top center",
-                textfont=dict(size=10, color='#00FF00'),
+                textfont=dict(size=10, color=self.colors['primary']),
                 name=era,
                 hovertemplate=(
                     "<b>%{text}</b><br>" +
                     "Era: " + era + "<br>" +
-                    "Domain: %{customdata[0]}<br>" +
+                    "Domain: %{customdata[1]}<br>" +
+                    "Years: %{customdata[2]} - %{customdata[3]}<br>" +
+                    "<extra></extra>"
+                ),
+                # The id comes first so selections resolve by id (see selection.py)
+                customdata=era_df[['id', 'primaryDomain', 'birthYear', 'deathYear']].values
+            ))
+    
+    def add_philosopher_nodes_compact(self, fig, philosophers_df, labels=True):
+        """Philosopher nodes as one trace per era and primary domain.
+
+        Era, domain and (when uniform) color are trace constants. The
+        coordinates are float32 and customdata is int32 (store row, birth
+        year, death year), so plotly sends both as base64 typed arrays.
+        Eras under COMPACT_SPLIT_MIN nodes stay one trace with the domain
+        in hovertext. The legend keeps one entry per era.
+        """
+        coords = philosophers_df[['x', 'y', 'z']].to_numpy(dtype=np.float32)
+        # Selectable points carry their store row first (see selection.py)
+        hover = np.column_stack([
+            philosophers_df.index.to_numpy(),
+            philosophers_df['birthYear'].to_numpy(),
+            philosophers_df['deathYear'].to_numpy()
+        ]).astype(np.int32)
+        names = philosophers_df['name'].to_numpy()
+        colors = philosophers_df['color'].astype(str).to_numpy()
+        label_style = dict(
+            textposition="top center",
+            textfont=dict(size=10, color=self.colors['primary'])
+        ) if labels else {}
+        
+        domains = philosophers_df['primaryDomain'].astype(str).to_numpy()
+        groups = []
+        for era, era_rows in philosophers_df.groupby('era', observed=True, sort=True).indices.items():
+            if len(era_rows) < COMPACT_SPLIT_MIN:
+                groups.append((era, None, era_rows))
+                continue
+            era_domains = domains[era_rows]
+            for domain in np.unique(era_domains):
+                groups.append((era, domain, era_rows[era_domains == domain]))
+        
+        eras_seen = set()
+        for era, domain, rows in groups:
+            color = colors[rows]
+            fig.add_trace(go.Scatter3d(
+                x=coords[rows, 0], y=coords[rows, 1], z=coords[rows, 2],
+                mode='markers+text' if labels else 'markers',
+                marker=dict(
+                    size=8,
+                    color=color[0] if (color == color[0]).all() else color,
+                    opacity=0.8,
+                    line=dict(width=2, color=self.colors['primary'])
+                ),
+                text=names[rows],
+                name=era,
+                legendgroup=era,
+                showlegend=era not in eras_seen,
+                hovertemplate=(
+                    "<b>%{text}</b><br>" +
+                    "Era: " + era + "<br>" +
+                    "Domain: " + (domain or "%{hovertext}") + "<br>" +
                     "Years: %{customdata[1]} - %{customdata[2]}<br>" +
                     "<extra></extra>"
                 ),
-                customdata=era_df[['primaryDomain', 'birthYear', 'deathYear']].values
+                customdata=hover[rows],
+                hovertext=domains[rows] if domain is None else None,
+                **label_style
+            ))
+            eras_seen.add(era)
+    
+    @instrumented()
+    def add_philosopher_nodes_lod(self, fig, philosophers_df, expanded_clusters=()):
+        """Add philosopher nodes with level of detail.
+        
+        Large node sets collapse into octree cluster markers showing their
+        member counts, only the top nodes by importance get text labels,
+        and clusters listed in expanded_clusters are drawn node by node.
+        The number of markers stays within max_nodes for any corpus size.
+        """
+        if philosophers_df.empty:
+            return
+        
+        coords = philosophers_df[['x', 'y', 'z']].to_numpy(dtype=np.float32)
+        importance = self.data_processor.get_importance(philosophers_df.index.to_numpy(), self.label_by)
+        plan = plan_detail(
+            coords, importance, extent=self.radius * 1.05,
+            max_nodes=self.max_nodes, label_top_n=self.label_top_n,
+            expanded=expanded_clusters
+        )
+        
+        self.add_philosopher_nodes(fig, philosophers_df.iloc[plan.node_rows], labels=False)
+        
+        if len(plan.label_rows) > 0:
+            labelled = philosophers_df.iloc[plan.label_rows]
+            fig.add_trace(go.Scatter3d(
+                x=labelled['x'], y=labelled['y'], z=labelled['z'],
+                mode='text',
+                text=labelled['name'],
+                textposition="top center",
+                textfont=dict(size=10, color=self.colors['primary']),
+                showlegend=False,
+                hoverinfo='skip'
+            ))
+        
+        if plan.clustered and len(plan.cluster_keys) > 0:
+            counts = plan.cluster_counts
+            fig.add_trace(go.Scatter3d(
+                x=plan.cluster_centroids[:, 0],
+                y=plan.cluster_centroids[:, 1],
+                z=plan.cluster_centroids[:, 2],
+                mode='markers+text',
+                marker=dict(
+                    size=6 + 4 * np.log2(counts),
+                    color=self.colors['primary'],
+                    opacity=0.35,
+                    line=dict(width=1, color=self.colors['primary'])
+                ),
+                text=counts.astype(str),
+                textfont=dict(size=9, color=self.colors['primary']),
+                name='Clusters',
+                customdata=np.stack([[cluster_id(plan.level, key) for key in plan.cluster_keys], counts], axis=-1),
+                hovertemplate="%{customdata[1]} philosophers<br>Select to expand<extra></extra>"
             ))
     
+    @instrumented()
     def add_domain_wedges(self, fig):
         """Add visual indicators for the five philosophical domains"""
         
@@ -134,25 +455,47 @@ class PhilosophicalOrb:
                     hoverinfo='skip'
                 ))
     
+    @instrumented()
+    def add_domain_wedges_batched(self, fig):
+        """Add all domain wedges as a single line trace with per-vertex colors"""
+        radii = tuple(self.radius * r / 5 for r in WEDGE_RADII)
+        x_wedge, y_wedge, z_wedge, codes = wedge_geometry(radii)
+        
+        fig.add_trace(go.Scatter3d(
+            x=x_wedge, y=y_wedge, z=z_wedge,
+            mode='lines',
+            line=dict(
+                color=codes, colorscale=wedge_colorscale(),
+                cmin=-0.5, cmax=len(WEDGE_DOMAINS) - 0.5,
+                width=2, dash='dot'
+            ),
+            name='Domains',
+            showlegend=False,
+            hoverinfo='skip'
+        ))
+    
     def configure_layout(self, fig):
         """Configure the 3D plot layout"""
         
+        # Leave room around the orb for the outer wedge ring
+        extent = self.radius * 1.6
+        
         fig.update_layout(
             title=dict(
                 text="PHILOSOPHICAL NEXUS ORB",
-                font=dict(color='#00FF00', size=24, family='monospace'),
+                font=dict(color=self.colors['primary'], size=24, family=self.colors['font_family']),
                 x=0.5,
                 y=0.98
             ),
             scene=dict(
-                bgcolor='rgba(0,0,0,1)',
+                bgcolor=self.colors['background'],
                 xaxis=dict(
                     showbackground=False,
                     showticklabels=False,
                     showgrid=False,
                     zeroline=False,
                     title="",
-                    range=[-8, 8]
+                    range=[-extent, extent]
                 ),
                 yaxis=dict(
                     showbackground=False,
@@ -160,7 +503,7 @@ class PhilosophicalOrb:
                     showgrid=False,
                     zeroline=False,
                     title="",
-                    range=[-8, 8]
+                    range=[-extent, extent]
                 ),
                 zaxis=dict(
                     showbackground=False,
@@ -168,7 +511,7 @@ class PhilosophicalOrb:
                     showgrid=False,
                     zeroline=False,
                     title="",
-                    range=[-8, 8]
+                    range=[-extent, extent]
                 ),
                 camera=dict(
                     eye=dict(x=1.5, y=1.5, z=1.5),
@@ -176,42 +519,125 @@ class PhilosophicalOrb:
                 ),
                 aspectmode='cube'
             ),
-            paper_bgcolor='rgba(0,0,0,1)',
-            plot_bgcolor='rgba(0,0,0,1)',
-            font=dict(color='#00FF00', family='monospace'),
+            paper_bgcolor=self.colors['background'],
+            plot_bgcolor=self.colors['background'],
+            font=dict(color=self.colors['primary'], family=self.colors['font_family']),
             margin=dict(l=0, r=0, t=40, b=0),
             height=700,
             showlegend=True,
             legend=dict(
-                bgcolor='rgba(0,0,0,0.9)',
-                bordercolor='#00FF00',
+                bgcolor=self.colors['legend_background'],
+                bordercolor=self.colors['primary'],
                 borderwidth=1,
                 x=0.02,
                 y=0.98
             )
         )
     
+    @instrumented()
     def create_network_graph(self, philosophers_df):
         """Create a network graph showing relationships between philosophers"""
         
-        # This would implement the relationship network
-        # For now, return a placeholder
         fig = go.Figure()
+        graph = getattr(self.data_processor, 'graph', None)
+        nodes = philosophers_df.index.to_numpy()
         
-        fig.add_annotation(
-            text="Network Graph Feature Coming Soon",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5,
-            xanchor='center', yanchor='middle',
-            font=dict(size=20, color='#00FF00'),
-            showarrow=False
-        )
+        if graph is not None and len(nodes) > 0:
+            # Flatten the orb onto a longitude/latitude plane
+            lon = np.degrees(np.arctan2(philosophers_df['y'], philosophers_df['x']))
+            radius = np.sqrt(philosophers_df['x'] ** 2 + philosophers_df['y'] ** 2 + philosophers_df['z'] ** 2)
+            lat = np.degrees(np.arcsin(np.clip(philosophers_df['z'] / np.where(radius > 0, radius, 1), -1, 1)))
+            position = np.full((graph.node_count, 2), np.nan, dtype=np.float32)
+            position[nodes, 0] = lon
+            position[nodes, 1] = lat
+            
+            src, dst, _, kind = graph.edges_within(nodes)
+            for code, (label, color) in enumerate([('Influence', self.colors['primary']), ('Critique', '#FF00FF')]):
+                selected = kind == code
+                if not selected.any():
+                    continue
+                # One trace per edge kind: source, target, NaN separator
+                segments = np.full((selected.sum(), 3, 2), np.nan, dtype=np.float32)
+                segments[:, 0] = position[src[selected]]
+                segments[:, 1] = position[dst[selected]]
+                fig.add_trace(go.Scatter(
+                    x=segments[:, :, 0].ravel(), y=segments[:, :, 1].ravel(),
+                    mode='lines',
+                    line=dict(color=color, width=1),
+                    opacity=0.5,
+                    name=label,
+                    hoverinfo='skip'
+                ))
+            
+            # Node size follows PageRank
+            rank = graph.pagerank[nodes]
+            size = 8 + 22 * (rank / rank.max() if rank.max() > 0 else rank)
+            fig.add_trace(go.Scatter(
+                x=lon, y=lat,
+                mode='markers+text',
+                marker=dict(size=size, color=philosophers_df['color'].astype(str),
+                            line=dict(width=1, color=self.colors['primary'])),
+                text=philosophers_df['name'],
+                textposition='top center',
+                textfont=dict(size=10, color=self.colors['primary']),
+                name='Philosophers',
+                customdata=np.stack([philosophers_df['id'], rank], axis=-1),
+                hovertemplate="<b>%{text}</b><br>PageRank: %{customdata[1]:.3f}<extra></extra>"
+            ))
+        
+        if len(fig.data) < 2:
+            fig.add_annotation(
+                text="No influence links among the selected philosophers",
+                xref="paper", yref="paper",
+                x=0.5, y=0.05,
+                xanchor='center', yanchor='bottom',
+                font=dict(size=16, color=self.colors['primary']),
+                showarrow=False
+            )
         
         fig.update_layout(
             xaxis=dict(visible=False),
-            yaxis=dict(visible=False),
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)'
+            yaxis=dict(visible=False, scaleanchor='x'),
+            paper_bgcolor=self.colors['background'],
+            plot_bgcolor=self.colors['background'],
+            font=dict(color=self.colors['primary'], family=self.colors['font_family']),
+            margin=dict(l=0, r=0, t=40, b=0),
+            height=700,
+            legend=dict(
+                bgcolor=self.colors['legend_background'],
+                bordercolor=self.colors['primary'],
+                borderwidth=1,
+                x=0.02,
+                y=0.98
+            )
+        )
+        
+        return fig
+    
+    @instrumented()
+    def create_timeline_density(self, periods, counts, year=None, step=10):
+        """Bar chart of philosophers alive per period, with the current year marked"""
+        
+        fig = go.Figure(go.Bar(
+            x=periods + step / 2, y=counts, width=step,
+            marker=dict(color=self.colors['primary'], line=dict(width=0)),
+            opacity=0.7,
+            customdata=periods,
+            hovertemplate="%{customdata}s: %{y} alive<extra></extra>"
+        ))
+        if year is not None:
+            fig.add_vline(x=year, line=dict(color='#FF00FF', width=2))
+        
+        fig.update_layout(
+            xaxis=dict(showgrid=False, zeroline=False, title=""),
+            yaxis=dict(showgrid=False, zeroline=False, title=""),
+            paper_bgcolor=self.colors['background'],
+            plot_bgcolor=self.colors['background'],
+            font=dict(color=self.colors['primary'], family=self.colors['font_family']),
+            margin=dict(l=0, r=0, t=10, b=0),
+            height=140,
+            bargap=0,
+            showlegend=False
         )
         
         return fig